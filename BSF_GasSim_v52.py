@@ -13,22 +13,41 @@
 
 import streamlit as st
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
-import time
 import os
 import base64
-import io
+import functools
+import math
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import SimpleNamespace
 
-# reportlab wird lazy importiert — nur beim PDF-Button-Klick
+# reportlab ist optional — fehlt es, schlägt erst der PDF-Export fehl
 # Installation falls nötig: pip install reportlab
-
-def img_b64(path):
-    if os.path.exists(path):
-        with open(path,'rb') as f:
-            return base64.b64encode(f.read()).decode()
-    return None
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import mm
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+    from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table,
+                                     TableStyle, HRFlowable, PageBreak, Flowable,
+                                     Image as RLImage)
+    from reportlab.pdfgen import canvas as rl_canvas
+    _RL_OK = True
+except ImportError:
+    _RL_OK = False
+
+def _require_reportlab():
+    if not _RL_OK:
+        raise ImportError(
+            "reportlab nicht installiert.\n"
+            "Bitte im Terminal ausführen:\n\n"
+            "  pip install reportlab\n\n"
+            "Dann Streamlit neu starten."
+        )
 
 # ── PDF REPORT GENERATOR ────────────────────────────────────
 # Erweiterbar für beliebige Gase (CO2, NH3, CH4, H2S, VOC, ...)
@@ -38,76 +57,209 @@ def hex2rgb(h):
     h = h.lstrip('#')
     return tuple(int(h[i:i+2],16)/255.0 for i in (0,2,4))
 
+# Stützpunkte je PDF-Kurve: 170 mm Breite → ~3 pt Abstand, feiner als die Linienstärke
+CURVE_POINTS = 150
+
+# Tagesraster der PDF-Diagramme: (Stunde, Beschriftung) für T1..T13
+_GRID_TICKS = tuple((hh, f'T{i+1}') for i, hh in enumerate(range(0, 289, 24)))
+
+# ── Farben + Styles (ReportLab RGB 0-1) — einmal pro Prozess, nicht pro Rerun/Bericht ──
+# st.cache_resource: Modul-Globals entstehen bei jedem Rerun neu.
+# Die Objekte werden beim Bauen nur gelesen und dürfen zwischen Sessions geteilt werden.
+@st.cache_resource(show_spinner=False)
+def _rl_dark():
+    """Dunkles Theme für make_pdf_report: Farben C_*, Stil-Fabrik sty(), Signatur-Stile"""
+    hx = colors.HexColor
+    t = SimpleNamespace(
+        C_DARK=hx('#07090E'), C_BLUE=hx('#36A9E1'),  C_GREEN=hx('#00C48C'), C_ORANGE=hx('#F5A623'),
+        C_RED=hx('#E84545'),  C_YELLOW=hx('#FFD600'), C_MUTED=hx('#4A6080'), C_BORDER=hx('#1C2D3F'),
+        C_WHITE=hx('#E2EEF8'), C_MID=hx('#0D1520'))
+    normal = getSampleStyleSheet()['Normal']
+
+    @functools.lru_cache(maxsize=None)
+    def sty(name, **kw):
+        """ParagraphStyle — gleiche Argumente, gleiche Instanz"""
+        kw.setdefault('textColor', t.C_WHITE)
+        kw.setdefault('fontName', 'Helvetica')
+        return ParagraphStyle(name, parent=normal, **kw)
+    t.sty = sty
+    # Signaturtabelle: drei Stile statt neun gleichartiger sl…sl9
+    t.S_SIG_LABEL   = sty('sl',      fontSize=8,   textColor=t.C_MUTED)
+    t.S_SIG_LINE    = sty('sl_line', fontSize=8,   textColor=t.C_WHITE)
+    t.S_SIG_CAPTION = sty('sl_cap',  fontSize=7.5, textColor=t.C_MUTED)
+    # Hex → Color memoisiert: Diagramme/Seitenrahmen nutzen wenige feste Farben
+    t.hex_color = functools.lru_cache(maxsize=64)(colors.HexColor)
+    return t
+
+_RL = _rl_dark() if _RL_OK else None
+
+if _RL_OK:
+    class GasChartFlowable(Flowable):
+        """
+        Gas-Diagramm, direkt auf den PDF-Canvas gezeichnet (ohne Drawing/Shape-Baum).
+        Kurve, IST-Wert und Peak kommen fertig berechnet aus gas_chart_rl().
+        peak: (stunde, ppm, rate)
+        """
+        PAD_L, PAD_R, PAD_B, PAD_T = 32, 52, 18, 14
+        THR_COLS = ('#00C48C', '#F5A623', '#E84545')
+
+        def __init__(self, gc_hex, hours_arr, arr, thresholds,
+                     h_now, val_now, peak, rate_unit, w, h):
+            Flowable.__init__(self)
+            self.gc_hex     = gc_hex
+            self.hours_arr  = hours_arr
+            self.arr        = arr
+            self.thresholds = thresholds
+            self.h_now      = h_now
+            self.val_now    = val_now
+            self.peak       = peak
+            self.rate_unit  = rate_unit
+            self.width, self.height = w, h
+
+        def wrap(self, availWidth, availHeight):
+            return self.width, self.height
+
+        def draw(self):
+            c = self.canv
+            w, h = self.width, self.height
+            PAD_L, PAD_R, PAD_B, PAD_T = self.PAD_L, self.PAD_R, self.PAD_B, self.PAD_T
+            CW = w - PAD_L - PAD_R   # chart width in pt
+            CH2= h - PAD_B - PAD_T   # chart height in pt
+            arr, thresholds = self.arr, self.thresholds
+
+            y_max = max(float(arr.max()*1.15),
+                        max(tv for tv,_ in thresholds)*1.1 if thresholds else 100)
+
+            def px(hval): return PAD_L + (hval/288.0)*CW
+            def py(ppm):  return PAD_B + (min(ppm,y_max)/y_max)*CH2
+
+            gc    = _RL.hex_color(self.gc_hex)
+            muted = _RL.hex_color('#4A6080')
+            grid  = _RL.hex_color('#1C2D3F')
+
+            # Hintergrund
+            c.setFillColor(_RL.hex_color('#07090E'))
+            c.rect(0, 0, w, h, fill=1, stroke=0)
+            c.setFillColor(_RL.hex_color('#0D1520'))
+            c.rect(PAD_L, PAD_B, CW, CH2, fill=1, stroke=0)
+
+            # Gitternetz + Stundenmarkierungen
+            c.setStrokeColor(grid); c.setLineWidth(0.4); c.setDash([2,3])
+            c.setFillColor(muted);  c.setFont('Helvetica', 6)
+            for hh, lbl in _GRID_TICKS:
+                x = px(hh)
+                c.line(x, PAD_B, x, PAD_B+CH2)
+                c.drawString(x+1, PAD_B-9, lbl)
+
+            # Y-Achse Ticks (5 Stufen)
+            c.setLineWidth(0.3); c.setDash()
+            c.setFont('Helvetica', 5.5)
+            for i in range(6):
+                yv = y_max * i/5
+                yp = py(yv)
+                c.line(PAD_L-2, yp, PAD_L+CW, yp)
+                c.drawRightString(PAD_L-4, yp-3, f'{yv:.0f}')
+
+            # Schwellenwert-Linien
+            c.setLineWidth(0.8); c.setDash([4,3])
+            for (tv, tlbl), tc_hex in zip(thresholds, self.THR_COLS):
+                if tv <= y_max:
+                    tc = _RL.hex_color(tc_hex)
+                    yp = py(tv)
+                    c.setStrokeColor(tc); c.setFillColor(tc)
+                    c.line(PAD_L, yp, PAD_L+CW, yp)
+                    c.drawString(PAD_L+CW+3, yp-3, tlbl)
+            c.setDash()
+
+            # Kurvenpunkte vektorisiert
+            xs = (PAD_L + (self.hours_arr/288.0)*CW).tolist()
+            ys = (PAD_B + (np.minimum(arr, y_max)/y_max)*CH2).tolist()
+            y_base = py(0)
+
+            # Kurvensegmente einmal als PDF-Operatoren formatieren ("x y l"),
+            # für Füllung und Linie gemeinsam — kein Path-Objekt pro Punkt
+            seg = ' l '.join(map('{:.2f} {:.2f}'.format, xs, ys))
+
+            # Füllung unter der Kurve (Alpha über ExtGState statt Color-Objekt)
+            c.setFillColorRGB(*hex2rgb(self.gc_hex))
+            c.setFillAlpha(0.18)
+            c.addLiteral(f'{xs[0]:.2f} {y_base:.2f} m {seg} l {xs[-1]:.2f} {y_base:.2f} l h f')
+            c.setFillAlpha(1)
+
+            # Kurve selbst
+            c.setStrokeColor(gc); c.setLineWidth(1.8); c.setLineJoin(1)
+            c.addLiteral(f'{xs[0]:.2f} {ys[0]:.2f} m {seg} l S')
+            c.setLineJoin(0)
+
+            # IST-Linie (Masttag)
+            yellow = _RL.hex_color('#FFD600')
+            xnow = px(self.h_now)
+            c.setStrokeColor(yellow); c.setLineWidth(1.0); c.setDash([4,2])
+            c.line(xnow, PAD_B, xnow, PAD_B+CH2)
+            c.setDash()
+            c.setFillColor(yellow); c.setFont('Courier', 6)
+            c.drawString(xnow+2, py(self.val_now),
+                         f'{self.h_now:.0f}h: {self.val_now:.0f} ppm')
+
+            # Peak-Annotation
+            peak_h, peak_v, peak_rate = self.peak
+            xp = px(peak_h); yp2 = py(peak_v)
+            c.setStrokeColor(gc); c.setLineWidth(0.8)
+            c.line(xp, yp2, xp, yp2+10)
+            c.setFillColor(gc)
+            c.drawCentredString(xp, yp2+11,
+                                f'{peak_v:.0f} ppm  {peak_rate:.4f} {self.rate_unit}')
+
+            # Achsenbeschriftung
+            c.setFillColor(_RL.hex_color('#7A9CC0')); c.setFont('Helvetica', 6)
+            c.drawCentredString(PAD_L+CW/2, 2, 'Stunden [h]')
+            c.drawCentredString(8, PAD_B+CH2/2, 'ppm')
+
+class _PdfSink:
+    """Schreibziel für SimpleDocTemplate. ReportLab erzeugt das PDF komplett im
+    Speicher und ruft write() genau einmal auf — die Bytes werden nur referenziert,
+    nicht wie bei BytesIO hinein- und wieder herauskopiert."""
+    __slots__ = ('parts',)
+    def __init__(self): self.parts = []
+    def write(self, b): self.parts.append(b)
+    def getvalue(self):
+        return self.parts[0] if len(self.parts) == 1 else b''.join(self.parts)
+
 def make_pdf_report(params: dict) -> bytes:
     """
     Generiert PDF-Bericht mit allen Simulationsparametern und Diagrammen.
     params: dict mit allen aktuellen Einstellungen aus der Streamlit-Session.
     Erweiterbar: params['gases'] = Liste von Gasparameter-Dicts.
     """
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import mm
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-        from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table,
-                                         TableStyle, HRFlowable, PageBreak,
-                                         Image as RLImage)
-        from reportlab.pdfgen import canvas as rl_canvas
-    except ImportError:
-        raise ImportError(
-            "reportlab nicht installiert.\n"
-            "Bitte im Terminal ausführen:\n\n"
-            "  pip install reportlab\n\n"
-            "Dann Streamlit neu starten."
-        )
+    _require_reportlab()
 
-    buf = io.BytesIO()
+    buf = _PdfSink()
     W, H = A4  # 595 x 842 pt
 
-    # ── Farben (ReportLab RGB 0-1) ──
-    C_DARK   = colors.HexColor('#07090E')
-    C_BLUE   = colors.HexColor('#36A9E1')
-    C_GREEN  = colors.HexColor('#00C48C')
-    C_ORANGE = colors.HexColor('#F5A623')
-    C_RED    = colors.HexColor('#E84545')
-    C_YELLOW = colors.HexColor('#FFD600')
-    C_MUTED  = colors.HexColor('#4A6080')
-    C_BORDER = colors.HexColor('#1C2D3F')
-    C_WHITE  = colors.HexColor('#E2EEF8')
-    C_MID    = colors.HexColor('#0D1520')
-
-    # ── Styles ──
-    ss = getSampleStyleSheet()
-    def sty(name, **kw):
-        kw.setdefault('textColor', C_WHITE)
-        kw.setdefault('fontName', 'Helvetica')
-        return ParagraphStyle(name, parent=ss['Normal'], **kw)
-
-    S_TITLE   = sty('T', fontSize=22, textColor=C_BLUE,  spaceAfter=2, leading=26)
-    S_SUB     = sty('S', fontSize=9,  textColor=C_MUTED, spaceAfter=8)
-    S_H1      = sty('H1',fontSize=13, textColor=C_BLUE,  spaceBefore=10, spaceAfter=4,
+    S_TITLE   = _RL.sty('T', fontSize=22, textColor=_RL.C_BLUE,  spaceAfter=2, leading=26)
+    S_SUB     = _RL.sty('S', fontSize=9,  textColor=_RL.C_MUTED, spaceAfter=8)
+    S_H1      = _RL.sty('H1',fontSize=13, textColor=_RL.C_BLUE,  spaceBefore=10, spaceAfter=4,
                     fontName='Helvetica-Bold')
-    S_H2      = sty('H2',fontSize=10, textColor=C_GREEN, spaceBefore=6, spaceAfter=3,
+    S_H2      = _RL.sty('H2',fontSize=10, textColor=_RL.C_GREEN, spaceBefore=6, spaceAfter=3,
                     fontName='Helvetica-Bold')
-    S_BODY    = sty('B', fontSize=8.5,textColor=C_WHITE, leading=13)
-    S_MONO    = sty('M', fontSize=8,  textColor=C_BLUE,  fontName='Courier', leading=12)
-    S_WARN    = sty('W', fontSize=8,  textColor=C_RED,   fontName='Helvetica-Bold')
-    S_CAPTION = sty('C', fontSize=7.5,textColor=C_MUTED, alignment=TA_CENTER)
+    S_BODY    = _RL.sty('B', fontSize=8.5,textColor=_RL.C_WHITE, leading=13)
+    S_MONO    = _RL.sty('M', fontSize=8,  textColor=_RL.C_BLUE,  fontName='Courier', leading=12)
+    S_WARN    = _RL.sty('W', fontSize=8,  textColor=_RL.C_RED,   fontName='Helvetica-Bold')
+    S_CAPTION = _RL.sty('C', fontSize=7.5,textColor=_RL.C_MUTED, alignment=TA_CENTER)
 
-    def hr(col=C_BORDER): return HRFlowable(width='100%', thickness=0.5, color=col, spaceAfter=4, spaceBefore=4)
+    def hr(col=_RL.C_BORDER): return HRFlowable(width='100%', thickness=0.5, color=col, spaceAfter=4, spaceBefore=4)
 
     def kv_table(rows, col_w=None):
         """Key-Value Tabelle mit dunklem Hintergrund"""
         cw = col_w or [55*mm, 110*mm]
-        data = [[Paragraph(f"<b>{k}</b>", sty('k', fontSize=8, textColor=C_MUTED, fontName='Helvetica-Bold')),
-                 Paragraph(str(v), sty('v', fontSize=8.5, textColor=C_WHITE))]
+        data = [[Paragraph(f"<b>{k}</b>", _RL.sty('k', fontSize=8, textColor=_RL.C_MUTED, fontName='Helvetica-Bold')),
+                 Paragraph(str(v), _RL.sty('v', fontSize=8.5, textColor=_RL.C_WHITE))]
                 for k, v in rows]
         t = Table(data, colWidths=cw)
         t.setStyle(TableStyle([
-            ('BACKGROUND', (0,0),(-1,-1), C_MID),
-            ('ROWBACKGROUNDS', (0,0),(-1,-1), [C_MID, C_DARK]),
-            ('GRID', (0,0),(-1,-1), 0.3, C_BORDER),
+            ('BACKGROUND', (0,0),(-1,-1), _RL.C_MID),
+            ('ROWBACKGROUNDS', (0,0),(-1,-1), [_RL.C_MID, _RL.C_DARK]),
+            ('GRID', (0,0),(-1,-1), 0.3, _RL.C_BORDER),
             ('LEFTPADDING', (0,0),(-1,-1), 6),
             ('RIGHTPADDING',(0,0),(-1,-1), 6),
             ('TOPPADDING',  (0,0),(-1,-1), 4),
@@ -117,26 +269,26 @@ def make_pdf_report(params: dict) -> bytes:
 
     def stufen_table(stufen_data):
         """Lüfterstufen-Tabelle"""
-        header = [Paragraph(h, sty('th', fontSize=8, textColor=C_MUTED, fontName='Helvetica-Bold', alignment=TA_CENTER))
+        header = [Paragraph(h, _RL.sty('th', fontSize=8, textColor=_RL.C_MUTED, fontName='Helvetica-Bold', alignment=TA_CENTER))
                   for h in ['Stufe', 'CO<sub>2</sub> Schwelle', 'NH<sub>3</sub> Schwelle', 'Lüfter %', 'Lüfter m³/h (Z1)']]
-        stage_cols = [C_MUTED, C_GREEN, C_ORANGE, C_RED]
+        stage_cols = [_RL.C_MUTED, _RL.C_GREEN, _RL.C_ORANGE, _RL.C_RED]
         snames = ['ECO', 'STUFE 1', 'STUFE 2', 'ALARM']
         rows = [header]
         for i, (name, co2, nh3, pct, col) in enumerate(zip(snames,
             stufen_data['co2'], stufen_data['nh3'], stufen_data['pct'], stage_cols)):
             q1 = pct/100.0 * params['vol_z1'] * 6.0
             rows.append([
-                Paragraph(f"<b>{name}</b>", sty(f's{i}', fontSize=8.5, textColor=col, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-                Paragraph(f"{co2:,} ppm", sty('cv', fontSize=8.5, textColor=C_WHITE, alignment=TA_CENTER)),
-                Paragraph(f"{nh3} ppm",   sty('nv', fontSize=8.5, textColor=C_WHITE, alignment=TA_CENTER)),
-                Paragraph(f"{pct} %",     sty('pv', fontSize=8.5, textColor=C_YELLOW,alignment=TA_CENTER)),
-                Paragraph(f"{q1:.0f}",    sty('qv', fontSize=8.5, textColor=C_BLUE,  alignment=TA_CENTER)),
+                Paragraph(f"<b>{name}</b>", _RL.sty(f's{i}', fontSize=8.5, textColor=col, fontName='Helvetica-Bold', alignment=TA_CENTER)),
+                Paragraph(f"{co2:,} ppm", _RL.sty('cv', fontSize=8.5, textColor=_RL.C_WHITE, alignment=TA_CENTER)),
+                Paragraph(f"{nh3} ppm",   _RL.sty('nv', fontSize=8.5, textColor=_RL.C_WHITE, alignment=TA_CENTER)),
+                Paragraph(f"{pct} %",     _RL.sty('pv', fontSize=8.5, textColor=_RL.C_YELLOW,alignment=TA_CENTER)),
+                Paragraph(f"{q1:.0f}",    _RL.sty('qv', fontSize=8.5, textColor=_RL.C_BLUE,  alignment=TA_CENTER)),
             ])
         t = Table(rows, colWidths=[30*mm, 38*mm, 38*mm, 24*mm, 36*mm])
         t.setStyle(TableStyle([
-            ('BACKGROUND', (0,0),(-1,0), C_BORDER),
-            ('ROWBACKGROUNDS',(0,1),(-1,-1),[C_MID, C_DARK]),
-            ('GRID',(0,0),(-1,-1),0.3,C_BORDER),
+            ('BACKGROUND', (0,0),(-1,0), _RL.C_BORDER),
+            ('ROWBACKGROUNDS',(0,1),(-1,-1),[_RL.C_MID, _RL.C_DARK]),
+            ('GRID',(0,0),(-1,-1),0.3,_RL.C_BORDER),
             ('LEFTPADDING',(0,0),(-1,-1),5),
             ('RIGHTPADDING',(0,0),(-1,-1),5),
             ('TOPPADDING',(0,0),(-1,-1),4),
@@ -146,219 +298,119 @@ def make_pdf_report(params: dict) -> bytes:
 
     def gas_chart_rl(gas_name, mass_kg, flow_pct, vol, rate_fn, rho, ambient,
                      thresholds, hours_arr, days_arr, mast_day,
-                     rate_unit='g/kg/h', w=170*mm, h=60*mm):
+                     rate_unit='g/kg/h', w=170*mm, h=60*mm, profile=None):
         """
         Zeichnet Gas-Kurve direkt mit ReportLab — kein Plotly/Kaleido nötig.
         Erweiterbar für beliebige Gase: gas_name bestimmt Farbe.
         thresholds: [(ppm_val, label_str), ...]
+        profile: vorberechnetes rate_fn(days_arr) — zonenunabhängig, daher
+                 einmal pro Gas berechnen und an beide Zonen übergeben.
         """
-        from reportlab.graphics.shapes import (Drawing, Line, PolyLine, Rect,
-                                                String, Group)
-        from reportlab.graphics import renderPDF
-
-        def _ppm(day):
-            E_kg_h = mass_kg * rate_fn(day) / 1000.0
-            E_m3_h = E_kg_h / rho
-            Q = max(flow_pct/100.0 * vol * 6.0, 1.0)
-            return ambient + (E_m3_h / Q) * 1e6
-
-        arr = np.array([_ppm(d) for d in days_arr])
+        if profile is None:
+            profile = rate_fn(days_arr)
+        Q = max(flow_pct/100.0 * vol * 6.0, 1.0)
+        # g/kg/h → ppm: alle Skalare zu einem Faktor zusammengezogen
+        k_ppm = mass_kg / 1000.0 / rho / Q * 1e6
+        def _ppm(rate):
+            # rate: Skalar oder ndarray [g/kg/h]
+            return ambient + rate * k_ppm
+
+        arr = _ppm(profile)
         h_now = (mast_day - 1.0) * 24.0
-        val_now = _ppm(mast_day)
+        val_now = float(_ppm(rate_fn(mast_day)))
+
+        # Peak
+        pidx = int(arr.argmax())
+        peak = (float(hours_arr[pidx]), float(arr[pidx]), float(profile[pidx]))
 
         # Farben je Gas
         gc_map = {'CO2':'#36A9E1','NH3':'#F5A623','CH4':'#FFD600',
                   'H2S':'#E84545','CO':'#00C48C','VOC':'#C084FC'}
         gc_hex = gc_map.get(gas_name, '#36A9E1')
-        gc = colors.HexColor(gc_hex)
-
-        thr_cols = [colors.HexColor('#00C48C'),
-                    colors.HexColor('#F5A623'),
-                    colors.HexColor('#E84545')]
-
-        # Koordinatensystem
-        PAD_L=32; PAD_R=52; PAD_B=18; PAD_T=14
-        CW = w - PAD_L - PAD_R   # chart width in pt
-        CH2= h - PAD_B - PAD_T   # chart height in pt
-
-        y_max = max(float(arr.max()*1.15),
-                    max(tv for tv,_ in thresholds)*1.1 if thresholds else 100)
-
-        def px(hval): return PAD_L + (hval/288.0)*CW
-        def py(ppm):  return PAD_B + (min(ppm,y_max)/y_max)*CH2
-
-        d = Drawing(w, h)
-
-        # Hintergrund
-        d.add(Rect(0, 0, w, h, fillColor=colors.HexColor('#07090E'),
-                   strokeColor=None))
-        d.add(Rect(PAD_L, PAD_B, CW, CH2,
-                   fillColor=colors.HexColor('#0D1520'), strokeColor=None))
-
-        # Gitternetz + Stundenmarkierungen
-        for hh, lbl in [(h, f'T{d}') for d,h in enumerate(range(0, 289, 24), 1)]:
-            x = px(hh)
-            d.add(Line(x, PAD_B, x, PAD_B+CH2,
-                       strokeColor=colors.HexColor('#1C2D3F'),
-                       strokeWidth=0.4, strokeDashArray=[2,3]))
-            d.add(String(x+1, PAD_B-9, lbl,
-                         fontSize=6, fillColor=colors.HexColor('#4A6080'),
-                         fontName='Helvetica'))
-
-        # Y-Achse Ticks (5 Stufen)
-        for i in range(6):
-            yv = y_max * i/5
-            yp = py(yv)
-            d.add(Line(PAD_L-2, yp, PAD_L+CW, yp,
-                       strokeColor=colors.HexColor('#1C2D3F'),
-                       strokeWidth=0.3))
-            d.add(String(PAD_L-4, yp-3, f'{yv:.0f}',
-                         fontSize=5.5, fillColor=colors.HexColor('#4A6080'),
-                         fontName='Helvetica', textAnchor='end'))
-
-        # Schwellenwert-Linien
-        for (tv, tlbl), tc in zip(thresholds, thr_cols):
-            if tv <= y_max:
-                yp = py(tv)
-                d.add(Line(PAD_L, yp, PAD_L+CW, yp,
-                           strokeColor=tc, strokeWidth=0.8,
-                           strokeDashArray=[4,3]))
-                d.add(String(PAD_L+CW+3, yp-3, tlbl,
-                             fontSize=5.5, fillColor=tc,
-                             fontName='Helvetica'))
-
-        # Füllbereich unter Kurve (vereinfacht: Rechteck-Approximation)
-        fill_pts = []
-        for i, (hv, pv) in enumerate(zip(hours_arr, arr)):
-            fill_pts.extend([px(hv), py(0)])
-        # Kurven-Polygon (Füllung)
-        poly_pts = [px(hours_arr[0]), py(0)]
-        for hv, pv in zip(hours_arr, arr):
-            poly_pts.extend([px(hv), py(pv)])
-        poly_pts.extend([px(hours_arr[-1]), py(0)])
-
-        from reportlab.graphics.shapes import Polygon
-        r,g,b = hex2rgb(gc_hex)
-        d.add(Polygon(poly_pts,
-                      fillColor=colors.Color(r,g,b,alpha=0.18),
-                      strokeColor=None))
-
-        # Kurve selbst
-        curve_pts = []
-        for hv, pv in zip(hours_arr, arr):
-            curve_pts.extend([px(hv), py(pv)])
-        d.add(PolyLine(curve_pts, strokeColor=gc, strokeWidth=1.8,
-                       strokeLineJoin=1))
-
-        # IST-Linie (Masttag)
-        xnow = px(h_now)
-        d.add(Line(xnow, PAD_B, xnow, PAD_B+CH2,
-                   strokeColor=colors.HexColor('#FFD600'),
-                   strokeWidth=1.0, strokeDashArray=[4,2]))
-        ynow = py(val_now)
-        d.add(String(xnow+2, ynow, f'{h_now:.0f}h: {val_now:.0f} ppm',
-                     fontSize=6, fillColor=colors.HexColor('#FFD600'),
-                     fontName='Courier'))
-
-        # Peak-Annotation
-        pidx = int(arr.argmax())
-        peak_h = hours_arr[pidx]; peak_v = arr[pidx]
-        peak_rate = rate_fn(days_arr[pidx])
-        xp = px(peak_h); yp2 = py(peak_v)
-        d.add(Line(xp, yp2, xp, yp2+10,
-                   strokeColor=gc, strokeWidth=0.8))
-        lbl_txt = f'{peak_v:.0f} ppm  {peak_rate:.4f} {rate_unit}'
-        d.add(String(xp, yp2+11, lbl_txt,
-                     fontSize=6, fillColor=gc,
-                     fontName='Courier', textAnchor='middle'))
-
-        # Achsenbeschriftung
-        d.add(String(PAD_L+CW/2, 2, 'Stunden [h]',
-                     fontSize=6, fillColor=colors.HexColor('#7A9CC0'),
-                     fontName='Helvetica', textAnchor='middle'))
-        d.add(String(8, PAD_B+CH2/2, 'ppm',
-                     fontSize=6, fillColor=colors.HexColor('#7A9CC0'),
-                     fontName='Helvetica', textAnchor='middle'))
-
-        return d
 
-    # ── PAGE TEMPLATE ──────────────────────────────
-    # Logo-Pfade
-    _logo_cs  = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'coolsulting_logo_white.png')                 if '__file__' in dir() else 'coolsulting_logo_white.png'
-    # Fallback für Streamlit Cloud
-    import glob
-    _logo_candidates = glob.glob('**/coolsulting_logo_white.png', recursive=True) + ['coolsulting_logo_white.png']
-    _logo_cs = next((p for p in _logo_candidates if os.path.exists(p)), None)
+        return GasChartFlowable(gc_hex, hours_arr, arr, thresholds,
+                                h_now, val_now, peak, rate_unit, w, h)
 
+    # ── PAGE TEMPLATE ──────────────────────────────
     HEADER_H = 16*mm  # höhere Kopfzeile gegen Overlap
     FOOTER_H = 22*mm  # Fußzeile mit Firmenadressen
 
-    def on_page(canv, doc):
-        canv.saveState()
+    def _draw_chrome(canv):
+        # Statischer Seitenrahmen (Hintergrund, Kopf-/Fußzeile, Adressen)
         # Dunkler Hintergrund
-        canv.setFillColor(C_DARK)
+        canv.setFillColor(_RL.C_DARK)
         canv.rect(0, 0, W, H, fill=1, stroke=0)
 
         # ── KOPFZEILE ──────────────────────────────────
-        canv.setFillColor(colors.HexColor('#0D1520'))
+        canv.setFillColor(_RL.hex_color('#0D1520'))
         canv.rect(0, H-HEADER_H, W, HEADER_H, fill=1, stroke=0)
-        canv.setStrokeColor(C_BLUE)
+        canv.setStrokeColor(_RL.C_BLUE)
         canv.setLineWidth(1.5)
         canv.line(0, H-HEADER_H, W, H-HEADER_H)
 
         # Titel links
-        canv.setFillColor(C_BLUE)
+        canv.setFillColor(_RL.C_BLUE)
         canv.setFont('Helvetica-Bold', 9)
         canv.drawString(15*mm, H-7*mm, 'BSF KÜHLLAGER GAS-SIMULATOR')
-        canv.setFillColor(C_MUTED)
-        canv.setFont('Helvetica', 7)
-        canv.drawString(15*mm, H-12*mm, f'LP 640_07 Rev.02  ·  {params["date"]}  ·  Seite {doc.page}')
-
-
 
         # ── FUSSZEILE ──────────────────────────────────
-        canv.setFillColor(colors.HexColor('#0D1520'))
+        canv.setFillColor(_RL.hex_color('#0D1520'))
         canv.rect(0, 0, W, FOOTER_H, fill=1, stroke=0)
-        canv.setStrokeColor(C_BORDER)
+        canv.setStrokeColor(_RL.C_BORDER)
         canv.setLineWidth(0.5)
         canv.line(0, FOOTER_H, W, FOOTER_H)
 
         # Firmenblock links: Polar Energy
-        canv.setFillColor(C_MUTED)
+        canv.setFillColor(_RL.C_MUTED)
         canv.setFont('Helvetica-Bold', 6.5)
         canv.drawString(15*mm, FOOTER_H-5*mm, 'In Zusammenarbeit mit:')
         canv.setFont('Helvetica-Bold', 6.5)
-        canv.setFillColor(C_WHITE)
+        canv.setFillColor(_RL.C_WHITE)
         canv.drawString(15*mm, FOOTER_H-10*mm, 'Polar Energy Leithinger GmbH')
         canv.setFont('Helvetica', 6)
-        canv.setFillColor(C_MUTED)
+        canv.setFillColor(_RL.C_MUTED)
         canv.drawString(15*mm, FOOTER_H-14.5*mm, 'Dr.-Gross-Str. 36-38 · 4600 Wels')
         canv.drawString(15*mm, FOOTER_H-18.5*mm, 'office@polar-energy.at')
 
         # Trennlinie Mitte
-        canv.setStrokeColor(C_BORDER)
+        canv.setStrokeColor(_RL.C_BORDER)
         canv.line(W/2-20*mm, 2*mm, W/2-20*mm, FOOTER_H-2*mm)
 
         # Firmenblock Mitte: coolsulting
         canv.setFont('Helvetica-Bold', 6.5)
-        canv.setFillColor(C_WHITE)
+        canv.setFillColor(_RL.C_WHITE)
         canv.drawString(W/2-18*mm, FOOTER_H-10*mm, 'Coolsulting e.U.')
         canv.setFont('Helvetica', 6)
-        canv.setFillColor(C_MUTED)
+        canv.setFillColor(_RL.C_MUTED)
         canv.drawString(W/2-18*mm, FOOTER_H-14.5*mm, 'Mozartstrasse 11 · 4020 Linz, Österreich')
 
+        # Copyright
+        canv.setFont('Helvetica', 6)
+        canv.setFillColor(_RL.C_MUTED)
+        canv.drawCentredString(W/2+25*mm, FOOTER_H-15*mm, '© coolsulting e.U.')
 
+    def on_page(canv, doc):
+        # Rahmen einmal als Form-XObject ablegen, danach pro Seite nur referenzieren
+        if not canv.hasForm('chrome'):
+            canv.beginForm('chrome', 0, 0, W, H)
+            _draw_chrome(canv)
+            canv.endForm()
+        canv.saveState()
+        canv.doForm('chrome')
 
-        # Copyright + Seitennum
+        # Dynamisch: Datum + Seitennummer
+        canv.setFillColor(_RL.C_MUTED)
+        canv.setFont('Helvetica', 7)
+        canv.drawString(15*mm, H-12*mm, f'LP 640_07 Rev.02  ·  {params["date"]}  ·  Seite {doc.page}')
         canv.setFont('Helvetica', 6)
-        canv.setFillColor(C_MUTED)
         canv.drawCentredString(W/2+25*mm, FOOTER_H-10*mm, f'Seite {doc.page}')
-        canv.drawCentredString(W/2+25*mm, FOOTER_H-15*mm, '© coolsulting e.U.')
         canv.restoreState()
 
     doc = SimpleDocTemplate(buf, pagesize=A4,
         leftMargin=15*mm, rightMargin=15*mm,
-        topMargin=HEADER_H+4*mm, bottomMargin=FOOTER_H+4*mm)
+        topMargin=HEADER_H+4*mm, bottomMargin=FOOTER_H+4*mm,
+        pageCompression=1,   # Content-Streams flate-komprimiert (explizit, nicht rl_config)
+        invariant=1)         # deterministische Bytes (kein Zeitstempel/Zufalls-ID)
 
     story = []
     p = params
@@ -367,24 +419,24 @@ def make_pdf_report(params: dict) -> bytes:
     # SEITE 1 — DECKBLATT + ZUSAMMENFASSUNG
     # ════════════════════════════════════════════
     story.append(Spacer(1, 6*mm))
-    story.append(Paragraph('BSF KÜHLLAGER', sty('TT', fontSize=28, textColor=C_BLUE,
+    story.append(Paragraph('BSF KÜHLLAGER', _RL.sty('TT', fontSize=28, textColor=_RL.C_BLUE,
                             fontName='Helvetica-Bold', spaceAfter=1, leading=32)))
     story.append(Paragraph('GAS-SIMULATIONS-BERICHT',
-                            sty('T2', fontSize=20, textColor=C_WHITE,
+                            _RL.sty('T2', fontSize=20, textColor=_RL.C_WHITE,
                                 fontName='Helvetica-Bold', spaceAfter=6, leading=24)))
     story.append(Spacer(1, 2*mm))
     story.append(Paragraph(f'Projekt: Henke / Steyerberg  ·  LP 640_07 Rev.02',
-                            sty('PS', fontSize=9, textColor=C_MUTED, spaceAfter=3)))
+                            _RL.sty('PS', fontSize=9, textColor=_RL.C_MUTED, spaceAfter=3)))
     story.append(Paragraph(f'Erstellt: {p["date"]}  ·  Masttag: {p["mast_day"]:.1f} / 8  ·  Simulator v5.0',
-                            sty('PS2', fontSize=9, textColor=C_MUTED, spaceAfter=6)))
-    story.append(hr(C_BLUE))
+                            _RL.sty('PS2', fontSize=9, textColor=_RL.C_MUTED, spaceAfter=6)))
+    story.append(hr(_RL.C_BLUE))
     story.append(Spacer(1, 4*mm))
 
     # STATUS-AMPEL
     def status_pill(label, val, unit, warn_col):
-        col = C_RED if warn_col == 'red' else (C_ORANGE if warn_col == 'orange' else C_GREEN)
+        col = _RL.C_RED if warn_col == 'red' else (_RL.C_ORANGE if warn_col == 'orange' else _RL.C_GREEN)
         return Paragraph(f'<b>{label}</b>: <font color="#{col.hexval()[1:]}">{val} {unit}</font>',
-            sty('pill', fontSize=9, textColor=C_WHITE))
+            _RL.sty('pill', fontSize=9, textColor=_RL.C_WHITE))
 
     # KPI-Tabelle Seite 1
     co2_z1_now = p['co2_z1']; nh3_z1_now = p['nh3_z1']
@@ -393,36 +445,36 @@ def make_pdf_report(params: dict) -> bytes:
     def nh3_warn(v): return 'red' if v>p['nh3_s3'] else ('orange' if v>p['nh3_s2'] else ('yellow' if v>p['nh3_s1'] else 'green'))
 
     kpi_data = [
-        [Paragraph('<b>PARAMETER</b>', sty('kh0', fontSize=8, textColor=C_MUTED, fontName='Helvetica-Bold', alignment=TA_LEFT)),
-         Paragraph('<b>ZONE 01</b>', sty('kh0z1', fontSize=8, textColor=C_MUTED, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-         Paragraph('<b>ZONE 02</b>', sty('kh0z2', fontSize=8, textColor=C_MUTED, fontName='Helvetica-Bold', alignment=TA_CENTER))],
-        [Paragraph('<b>CO<sub>2</sub> [ppm]</b>', sty('kh',fontSize=9,textColor=C_MUTED,alignment=TA_LEFT)),
-         Paragraph(f'<b>{co2_z1_now:.0f}</b>', sty('kv1',fontSize=12,textColor=C_BLUE,fontName='Helvetica-Bold')),
-         Paragraph(f'<b>{co2_z2_now:.0f}</b>', sty('kv2',fontSize=12,textColor=C_GREEN,fontName='Helvetica-Bold'))],
-        [Paragraph('<b>NH<sub>3</sub> [ppm]</b>', sty('kh2',fontSize=9,textColor=C_MUTED,alignment=TA_LEFT)),
-         Paragraph(f'<b>{nh3_z1_now:.1f}</b>', sty('kv3',fontSize=12,textColor=C_ORANGE,fontName='Helvetica-Bold')),
-         Paragraph(f'<b>{nh3_z2_now:.1f}</b>', sty('kv4',fontSize=12,textColor=C_YELLOW,fontName='Helvetica-Bold'))],
-        [Paragraph('<b>Lüfter m³/h</b>', sty('kh3',fontSize=9,textColor=C_MUTED,alignment=TA_LEFT)),
-         Paragraph(f'{p["q1"]:.0f} m³/h  ({p["flow_z1"]:.0f}%)', sty('kv5',fontSize=9,textColor=C_WHITE)),
-         Paragraph(f'{p["q2"]:.0f} m³/h', sty('kv6',fontSize=9,textColor=C_WHITE))],
-        [Paragraph('<b>Larvenmasse</b>', sty('kh4',fontSize=9,textColor=C_MUTED,alignment=TA_LEFT)),
-         Paragraph(f'{p["mass_z1"]:.1f} t', sty('kv7',fontSize=9,textColor=C_WHITE)),
-         Paragraph(f'{p["mass_z2"]:.1f} t', sty('kv8',fontSize=9,textColor=C_WHITE))],
-        [Paragraph('<b>Raumvolumen</b>', sty('kh5',fontSize=9,textColor=C_MUTED,alignment=TA_LEFT)),
-         Paragraph(f'{p["vol_z1"]:.1f} m³', sty('kv9',fontSize=9,textColor=C_WHITE)),
-         Paragraph(f'{p["vol_z2"]:.1f} m³', sty('kv10',fontSize=9,textColor=C_WHITE))],
-        [Paragraph('<b>ACH</b>', sty('kh6',fontSize=9,textColor=C_MUTED,alignment=TA_LEFT)),
-         Paragraph(f'{p["ach_z1"]:.2f} h⁻¹', sty('kv11',fontSize=9,textColor=C_WHITE)),
-         Paragraph(f'{p["ach_z2"]:.2f} h⁻¹', sty('kv12',fontSize=9,textColor=C_WHITE))],
+        [Paragraph('<b>PARAMETER</b>', _RL.sty('kh0', fontSize=8, textColor=_RL.C_MUTED, fontName='Helvetica-Bold', alignment=TA_LEFT)),
+         Paragraph('<b>ZONE 01</b>', _RL.sty('kh0z1', fontSize=8, textColor=_RL.C_MUTED, fontName='Helvetica-Bold', alignment=TA_CENTER)),
+         Paragraph('<b>ZONE 02</b>', _RL.sty('kh0z2', fontSize=8, textColor=_RL.C_MUTED, fontName='Helvetica-Bold', alignment=TA_CENTER))],
+        [Paragraph('<b>CO<sub>2</sub> [ppm]</b>', _RL.sty('kh',fontSize=9,textColor=_RL.C_MUTED,alignment=TA_LEFT)),
+         Paragraph(f'<b>{co2_z1_now:.0f}</b>', _RL.sty('kv1',fontSize=12,textColor=_RL.C_BLUE,fontName='Helvetica-Bold')),
+         Paragraph(f'<b>{co2_z2_now:.0f}</b>', _RL.sty('kv2',fontSize=12,textColor=_RL.C_GREEN,fontName='Helvetica-Bold'))],
+        [Paragraph('<b>NH<sub>3</sub> [ppm]</b>', _RL.sty('kh2',fontSize=9,textColor=_RL.C_MUTED,alignment=TA_LEFT)),
+         Paragraph(f'<b>{nh3_z1_now:.1f}</b>', _RL.sty('kv3',fontSize=12,textColor=_RL.C_ORANGE,fontName='Helvetica-Bold')),
+         Paragraph(f'<b>{nh3_z2_now:.1f}</b>', _RL.sty('kv4',fontSize=12,textColor=_RL.C_YELLOW,fontName='Helvetica-Bold'))],
+        [Paragraph('<b>Lüfter m³/h</b>', _RL.sty('kh3',fontSize=9,textColor=_RL.C_MUTED,alignment=TA_LEFT)),
+         Paragraph(f'{p["q1"]:.0f} m³/h  ({p["flow_z1"]:.0f}%)', _RL.sty('kv5',fontSize=9,textColor=_RL.C_WHITE)),
+         Paragraph(f'{p["q2"]:.0f} m³/h', _RL.sty('kv6',fontSize=9,textColor=_RL.C_WHITE))],
+        [Paragraph('<b>Larvenmasse</b>', _RL.sty('kh4',fontSize=9,textColor=_RL.C_MUTED,alignment=TA_LEFT)),
+         Paragraph(f'{p["mass_z1"]:.1f} t', _RL.sty('kv7',fontSize=9,textColor=_RL.C_WHITE)),
+         Paragraph(f'{p["mass_z2"]:.1f} t', _RL.sty('kv8',fontSize=9,textColor=_RL.C_WHITE))],
+        [Paragraph('<b>Raumvolumen</b>', _RL.sty('kh5',fontSize=9,textColor=_RL.C_MUTED,alignment=TA_LEFT)),
+         Paragraph(f'{p["vol_z1"]:.1f} m³', _RL.sty('kv9',fontSize=9,textColor=_RL.C_WHITE)),
+         Paragraph(f'{p["vol_z2"]:.1f} m³', _RL.sty('kv10',fontSize=9,textColor=_RL.C_WHITE))],
+        [Paragraph('<b>ACH</b>', _RL.sty('kh6',fontSize=9,textColor=_RL.C_MUTED,alignment=TA_LEFT)),
+         Paragraph(f'{p["ach_z1"]:.2f} h⁻¹', _RL.sty('kv11',fontSize=9,textColor=_RL.C_WHITE)),
+         Paragraph(f'{p["ach_z2"]:.2f} h⁻¹', _RL.sty('kv12',fontSize=9,textColor=_RL.C_WHITE))],
     ]
     kpi_t = Table(kpi_data, colWidths=[50*mm, 80*mm, 46*mm])
     kpi_t.setStyle(TableStyle([
-        ('BACKGROUND',(0,0),(-1,0),C_BORDER),
-        ('TEXTCOLOR',(0,0),(-1,0),C_MUTED),
+        ('BACKGROUND',(0,0),(-1,0),_RL.C_BORDER),
+        ('TEXTCOLOR',(0,0),(-1,0),_RL.C_MUTED),
         ('FONTNAME',(0,0),(-1,0),'Helvetica-Bold'),
         ('FONTSIZE',(0,0),(-1,0),8),
-        ('ROWBACKGROUNDS',(0,1),(-1,-1),[C_MID, C_DARK]),
-        ('GRID',(0,0),(-1,-1),0.3,C_BORDER),
+        ('ROWBACKGROUNDS',(0,1),(-1,-1),[_RL.C_MID, _RL.C_DARK]),
+        ('GRID',(0,0),(-1,-1),0.3,_RL.C_BORDER),
         ('LEFTPADDING',(0,0),(-1,-1),7),
         ('RIGHTPADDING',(0,0),(-1,-1),7),
         ('TOPPADDING',(0,0),(-1,-1),7),
@@ -461,19 +513,19 @@ def make_pdf_report(params: dict) -> bytes:
         ['H<sub>2</sub>S',  'H<sub>2</sub>S', '1.363', '— (ausstehend)',      'Exponentiell',    'Schwerer als Luft (zukünftig)'],
     ]
     gas_cols_w = [16*mm, 14*mm, 22*mm, 38*mm, 35*mm, 51*mm]
-    gas_t_data = [[Paragraph(h, sty(f'gh{i}', fontSize=7.5, textColor=C_MUTED, fontName='Helvetica-Bold'))
+    gas_t_data = [[Paragraph(h, _RL.sty(f'gh{i}', fontSize=7.5, textColor=_RL.C_MUTED, fontName='Helvetica-Bold'))
                    for i,h in enumerate(gas_header)]]
     for row in gas_rows:
-        gas_t_data.append([Paragraph(c, sty(f'gc', fontSize=7.5, textColor=C_WHITE)) for c in row])
+        gas_t_data.append([Paragraph(c, _RL.sty(f'gc', fontSize=7.5, textColor=_RL.C_WHITE)) for c in row])
     gas_t = Table(gas_t_data, colWidths=gas_cols_w)
     gas_t.setStyle(TableStyle([
-        ('BACKGROUND',(0,0),(-1,0),C_BORDER),
-        ('ROWBACKGROUNDS',(0,1),(-1,-1),[C_MID,C_DARK]),
-        ('GRID',(0,0),(-1,-1),0.3,C_BORDER),
+        ('BACKGROUND',(0,0),(-1,0),_RL.C_BORDER),
+        ('ROWBACKGROUNDS',(0,1),(-1,-1),[_RL.C_MID,_RL.C_DARK]),
+        ('GRID',(0,0),(-1,-1),0.3,_RL.C_BORDER),
         ('LEFTPADDING',(0,0),(-1,-1),5),
         ('TOPPADDING',(0,0),(-1,-1),3),
         ('BOTTOMPADDING',(0,0),(-1,-1),3),
-        ('TEXTCOLOR',(0,1),(1,-1),C_BLUE),
+        ('TEXTCOLOR',(0,1),(1,-1),_RL.C_BLUE),
     ]))
     story.append(gas_t)
     story.append(Spacer(1, 4*mm))
@@ -487,7 +539,7 @@ def make_pdf_report(params: dict) -> bytes:
         'Die Lüfterstufen schalten automatisch wenn CO<sub>2</sub> ODER NH<sub>3</sub> den '
         'jeweiligen Schwellwert überschreiten (OR-Logik). '
         'ALARM-Stufe bleibt aktiv bis beide Gase unter S2-Schwelle fallen.',
-        sty('note', fontSize=7.5, textColor=C_MUTED)))
+        _RL.sty('note', fontSize=7.5, textColor=_RL.C_MUTED)))
 
     story.append(PageBreak())
 
@@ -501,19 +553,31 @@ def make_pdf_report(params: dict) -> bytes:
         S_SUB))
     story.append(hr())
 
-    hours_arr = np.linspace(0, 288, 400)
-    days_arr  = 1.0 + hours_arr / 24.0
+    # float32 genügt für die Diagramm-Geometrie; Annotationen werden als Python-float formatiert
+    hours_arr = np.linspace(0, 288, CURVE_POINTS, dtype=np.float32)
+    days_arr  = np.float32(1.0) + hours_arr / np.float32(24.0)
 
-    import math
+    # Vektorisiert: day darf Skalar oder ndarray sein.
+    # sin() wird bei 0 gekappt — nach Tag 8 wäre die Basis negativ (x**1.8 → NaN/komplex)
     def _co2_rate(day, r=None):
         ra = r or p['co2_rate']
-        x = day/8.0
-        return ra * (0.3 + 2.7 * math.sin(math.pi*x)**1.8)
+        # ein Arbeitsarray, alle Schritte in-place (keine Zwischen-Arrays)
+        t = np.array(day, dtype=np.result_type(day, 1.0))
+        t *= np.pi / 8.0
+        np.sin(t, out=t)
+        np.maximum(t, 0.0, out=t)
+        t **= 1.8
+        t *= 2.7 * ra
+        t += 0.3 * ra
+        return t
     def _nh3_rate(day, b=None):
         ba = b or p['nh3_rate']
-        x = day/8.0
-        if x < 0.45: return ba*(1.0+0.5*x/0.45)
-        return ba*1.5*math.exp(2.6*(x-0.45))
+        x = np.asarray(day) / 8.0
+        return np.where(x < 0.45, ba*(1.0+0.5*x/0.45), ba*1.5*np.exp(2.6*(x-0.45)))
+
+    # Ratenprofile einmal pro Gas — identisch für Zone 01 und Zone 02
+    co2_profile = _co2_rate(days_arr)
+    nh3_profile = _nh3_rate(days_arr)
 
     # CO2 Z1 Chart
     story.append(Paragraph('CO<sub>2</sub> — Zone 01 [ppm]', S_H2))
@@ -522,7 +586,8 @@ def make_pdf_report(params: dict) -> bytes:
         [(p['co2_s1'], f'{p["co2_s1"]:,} ppm'),
          (p['co2_s2'], f'{p["co2_s2"]:,} ppm'),
          (p['co2_s3'], f'{p["co2_s3"]:,} ppm — ALARM')],
-        hours_arr, days_arr, p['mast_day'], rate_unit='g/kg/h'))
+        hours_arr, days_arr, p['mast_day'], rate_unit='g/kg/h',
+        profile=co2_profile))
     story.append(Spacer(1, 3*mm))
 
     # NH3 Z1 Chart
@@ -532,7 +597,8 @@ def make_pdf_report(params: dict) -> bytes:
         [(p['nh3_s1'], f'{p["nh3_s1"]} ppm'),
          (p['nh3_s2'], f'{p["nh3_s2"]} ppm'),
          (p['nh3_s3'], f'{p["nh3_s3"]} ppm — ALARM')],
-        hours_arr, days_arr, p['mast_day'], rate_unit='mg/kg/h'))
+        hours_arr, days_arr, p['mast_day'], rate_unit='mg/kg/h',
+        profile=nh3_profile))
     story.append(Spacer(1, 3*mm))
 
     # Kubaturberechnung Z1
@@ -566,7 +632,8 @@ def make_pdf_report(params: dict) -> bytes:
         [(p['co2_s1'], f'{p["co2_s1"]:,} ppm'),
          (p['co2_s2'], f'{p["co2_s2"]:,} ppm'),
          (p['co2_s3'], f'{p["co2_s3"]:,} ppm — ALARM')],
-        hours_arr, days_arr, p['mast_day'], rate_unit='g/kg/h'))
+        hours_arr, days_arr, p['mast_day'], rate_unit='g/kg/h',
+        profile=co2_profile))
     story.append(Spacer(1, 3*mm))
 
     story.append(Paragraph('NH<sub>3</sub> — Zone 02 [ppm]  (exponentiell ab Stunde 72)', S_H2))
@@ -575,7 +642,8 @@ def make_pdf_report(params: dict) -> bytes:
         [(p['nh3_s1'], f'{p["nh3_s1"]} ppm'),
          (p['nh3_s2'], f'{p["nh3_s2"]} ppm'),
          (p['nh3_s3'], f'{p["nh3_s3"]} ppm — ALARM')],
-        hours_arr, days_arr, p['mast_day'], rate_unit='mg/kg/h'))
+        hours_arr, days_arr, p['mast_day'], rate_unit='mg/kg/h',
+        profile=nh3_profile))
     story.append(Spacer(1, 3*mm))
 
     story.append(Paragraph('KUBATURBERECHNUNG — ZONE 02', S_H2))
@@ -592,7 +660,7 @@ def make_pdf_report(params: dict) -> bytes:
     story.append(Spacer(1, 5*mm))
 
     # ── ERWEITERUNGSHINWEIS ──
-    story.append(hr(C_BLUE))
+    story.append(hr(_RL.C_BLUE))
     story.append(Paragraph('ERWEITERUNGSMÖGLICHKEITEN', S_H1))
     story.append(Spacer(1, 2*mm))
     ext_text = (
@@ -608,16 +676,16 @@ def make_pdf_report(params: dict) -> bytes:
         'wobei E = Emissionsrate in m³/h (aus g/kg/h ÷ Gasdichte) und '
         'Q = Volumenstrom des Lüfters in m³/h.'
     )
-    story.append(Paragraph(ext_text, sty('ext', fontSize=8, textColor=C_WHITE, leading=13)))
+    story.append(Paragraph(ext_text, _RL.sty('ext', fontSize=8, textColor=_RL.C_WHITE, leading=13)))
 
     # ════════════════════════════════════════════
     # HAFTUNGSAUSSCHLUSS
     # ════════════════════════════════════════════
     story.append(PageBreak())
     story.append(Spacer(1, 6*mm))
-    story.append(Paragraph('HAFTUNGSAUSSCHLUSS', sty('HA_T', fontSize=14,
-                            textColor=C_RED, fontName='Helvetica-Bold', spaceAfter=4)))
-    story.append(hr(C_RED))
+    story.append(Paragraph('HAFTUNGSAUSSCHLUSS', _RL.sty('HA_T', fontSize=14,
+                            textColor=_RL.C_RED, fontName='Helvetica-Bold', spaceAfter=4)))
+    story.append(hr(_RL.C_RED))
     story.append(Spacer(1, 3*mm))
 
     disclaimer_paragraphs = [
@@ -649,31 +717,31 @@ def make_pdf_report(params: dict) -> bytes:
     ]
 
     for title, text in disclaimer_paragraphs:
-        story.append(Paragraph(title, sty('dh', fontSize=9, textColor=C_ORANGE,
+        story.append(Paragraph(title, _RL.sty('dh', fontSize=9, textColor=_RL.C_ORANGE,
                                 fontName='Helvetica-Bold', spaceBefore=6, spaceAfter=2)))
-        story.append(Paragraph(text, sty('db', fontSize=8, textColor=C_WHITE,
+        story.append(Paragraph(text, _RL.sty('db', fontSize=8, textColor=_RL.C_WHITE,
                                 leading=12, spaceAfter=4)))
 
     story.append(Spacer(1, 6*mm))
-    story.append(hr(C_BORDER))
+    story.append(hr(_RL.C_BORDER))
     story.append(Spacer(1, 3*mm))
     # Signaturen
     sig_data = [[
-        Paragraph('Erstellt durch:', sty('sl', fontSize=8, textColor=C_MUTED)),
-        Paragraph('Geprüft durch:', sty('sl2', fontSize=8, textColor=C_MUTED)),
-        Paragraph('Datum:', sty('sl3', fontSize=8, textColor=C_MUTED)),
+        Paragraph('Erstellt durch:', _RL.S_SIG_LABEL),
+        Paragraph('Geprüft durch:', _RL.S_SIG_LABEL),
+        Paragraph('Datum:', _RL.S_SIG_LABEL),
     ],[
-        Paragraph('____________________________', sty('sl4', fontSize=8, textColor=C_WHITE)),
-        Paragraph('____________________________', sty('sl5', fontSize=8, textColor=C_WHITE)),
-        Paragraph(p["date"][:10], sty('sl6', fontSize=8, textColor=C_WHITE)),
+        Paragraph('____________________________', _RL.S_SIG_LINE),
+        Paragraph('____________________________', _RL.S_SIG_LINE),
+        Paragraph(p["date"][:10], _RL.S_SIG_LINE),
     ],[
-        Paragraph('Coolsulting e.U.', sty('sl7', fontSize=7.5, textColor=C_MUTED)),
-        Paragraph('Polar Energy Leithinger GmbH', sty('sl8', fontSize=7.5, textColor=C_MUTED)),
-        Paragraph('', sty('sl9', fontSize=7.5, textColor=C_MUTED)),
+        Paragraph('Coolsulting e.U.', _RL.S_SIG_CAPTION),
+        Paragraph('Polar Energy Leithinger GmbH', _RL.S_SIG_CAPTION),
+        Paragraph('', _RL.S_SIG_CAPTION),
     ]]
     sig_t = Table(sig_data, colWidths=[60*mm, 70*mm, 46*mm])
     sig_t.setStyle(TableStyle([
-        ('BACKGROUND',(0,0),(-1,-1), C_DARK),
+        ('BACKGROUND',(0,0),(-1,-1), _RL.C_DARK),
         ('GRID',(0,0),(-1,-1),0,colors.white),
         ('TOPPADDING',(0,0),(-1,-1),5),
         ('BOTTOMPADDING',(0,0),(-1,-1),5),
@@ -686,6 +754,19 @@ def make_pdf_report(params: dict) -> bytes:
 
 
 # ── PDF BUTTON IN SIDEBAR ────────────────────────────────────
+@st.cache_resource
+def _pdf_pool():
+    # Ein Worker-Thread pro Prozess — PDF-Bau blockiert die UI nicht
+    return ThreadPoolExecutor(max_workers=1)
+
+_PDF_POOL = _pdf_pool()
+_PDF_CACHE_MAX = 4  # fertige PDFs pro Session (LRU)
+
+def _pdf_params_key(p):
+    # Stabiler Schlüssel über die kanonische JSON-Form der Parameter
+    return hashlib.blake2b(json.dumps(p, sort_keys=True, default=str).encode(),
+                           digest_size=16).hexdigest()
+
 # ── DESIGN ──────────────────────────────────────────────────
 BLUE   = "#36A9E1"
 GREEN  = "#6EE87A"
@@ -700,11 +781,24 @@ WHITE  = "#D8E8F4"
 MUTED  = "#2C4560"
 
 # rgba() Hilfsfunktionen (Plotly-kompatibel, kein 8-stelliger Hex!)
-def rgba_blue(a=0.12):  return f"rgba(54,169,225,{a})"
-def rgba_green(a=0.12): return f"rgba(110,232,122,{a})"
-def rgba_red(a=0.12):   return f"rgba(239,71,111,{a})"
-def rgba_orange(a=0.12):return f"rgba(255,155,66,{a})"
-def rgba_yellow(a=0.12):return f"rgba(255,209,102,{a})"
+_RGB = dict(blue="54,169,225", green="110,232,122", red="239,71,111",
+            orange="255,155,66", yellow="255,209,102")
+# Im Code verwendete Alphas vorformatiert — Helfer sind dann ein Dict-Zugriff
+RGBA = {(c, a): f"rgba({_RGB[c]},{a})" for c, alphas in (
+            ('blue',   (0.12, 0.13)), ('green',  (0.12, 0.13)),
+            ('red',    (0.12, 0.05, 0.07)),
+            ('orange', (0.12, 0.14)), ('yellow', (0.12, 0.14)),
+        ) for a in alphas}
+
+def _rgba_fmt(c, a):
+    """Seltene Alphas ausserhalb RGBA — direkt formatiert (ein f-String, kein Cache nötig)."""
+    return f"rgba({_RGB[c]},{a})"
+
+def rgba_blue(a=0.12):  return RGBA.get(('blue', a))   or _rgba_fmt('blue', a)
+def rgba_green(a=0.12): return RGBA.get(('green', a))  or _rgba_fmt('green', a)
+def rgba_red(a=0.12):   return RGBA.get(('red', a))    or _rgba_fmt('red', a)
+def rgba_orange(a=0.12):return RGBA.get(('orange', a)) or _rgba_fmt('orange', a)
+def rgba_yellow(a=0.12):return RGBA.get(('yellow', a)) or _rgba_fmt('yellow', a)
 
 # ── RAUMPARAMETER (LP 640_07 Rev.02) ────────────────────────
 Z1_L, Z1_B, Z1_H = 21.359, 9.750, 3.800
@@ -748,104 +842,127 @@ CO2_RATE_PEAK   = 0.38   # g CO2/kg/h (Peak Tag 4)
 # NH3: exponentieller Anstieg ab Tag 4 (Chen et al. 2019)
 NH3_RATE_BASE   = 0.001   # g NH3/kg/h = 1 mg/kg/h (Tag 1) — realistischer BSF-Ausstoss, Peak Tag 8 ca. 6 mg/kg/h
 NH3_RATE_PEAK   = 0.00627 # g NH3/kg/h = 6.27 mg/kg/h (Tag 8 Peak bei Base 0.001)
+NH3_PEAK_MULT   = 1.5 * math.exp(2.6 * (1.0 - 0.45))  # Rate Tag 8 / Basisrate
 
 # ── GRENZWERTE (Arbeitsschutz + Prozess) ─────────────────────
 CO2_OPT = 1_000;  CO2_S1 = 3_000;  CO2_S2 = 5_000;  CO2_S3 = 10_000  # ppm
 NH3_OPT =     8;  NH3_S1 =    12;  NH3_S2 =    25;  NH3_S3 =     50   # ppm
 
 # ── FAN-STUFEN ───────────────────────────────────────────────
-FAN_STAGES = [
-    (0,       20,  "#2C4560", "ECO — 20%"),
-    (CO2_S1,  40,  GREEN,     "STUFE 1 — 40%"),
-    (CO2_S2,  70,  ORANGE,    "STUFE 2 — 70%"),
-    (CO2_S3, 100,  RED,       "ALARM — 100%"),
-]
+# Je Eigenschaft ein paralleles Array, Index = Stufe 0..3 (siehe stage_idx)
+FAN_PCT    = np.array([20, 40, 70, 100])             # Lüfter [%]
+FAN_COLOR  = (MUTED, GREEN, ORANGE, RED)
+FAN_LABEL  = ("ECO — 20%", "STUFE 1 — 40%", "STUFE 2 — 70%", "ALARM — 100%")
 
 # ──────────────────────────────────────────
 
+@st.cache_data(show_spinner=False)
 def img_b64(path):
-    """Bild als base64-String laden (für inline HTML)"""
+    """Bild als base64-String laden (für inline HTML) — einmal pro Pfad, nicht pro Rerun"""
     if os.path.exists(path):
         with open(path, "rb") as f:
             return base64.b64encode(f.read()).decode()
     return None
 
+@st.cache_resource(show_spinner=False)
+def img_bytes(path):
+    """Bilddatei als bytes (für st.image) — kein stat/Lesen je Rerun; None wenn nicht vorhanden"""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return None
+
 
 # ══════════════════════════════════════════════════════════════
 # PDF BERICHT GENERATOR
 # ══════════════════════════════════════════════════════════════
+# ── Farben (Corporate Design °coolsulting) + Tabellen-Grundstil — einmal pro Prozess
+@st.cache_resource(show_spinner=False)
+def _rl_print():
+    """Heller Druckstil für generate_pdf_report: Farben CP_*, Tabellen-Grundstil, Statusfarben"""
+    hx = colors.HexColor
+    t = SimpleNamespace(
+        CP_BLUE=hx("#36A9E1"),  CP_DARK=hx("#3C3C3B"),   CP_LIGHT=hx("#F0F8FD"),
+        CP_GREEN=hx("#00C08B"), CP_ORANGE=hx("#F5A623"), CP_RED=hx("#E63946"),
+        CP_MUTED=hx("#8899AA"), CP_WHITE=colors.white,   CP_BLACK=hx("#1A1A2E"))
+    t.TBL_BASE = [
+        ('FONTNAME',    (0,0),(-1,0),  'Helvetica-Bold'),
+        ('FONTSIZE',    (0,0),(-1,-1), 8.5),
+        ('BACKGROUND',  (0,0),(-1,0),  t.CP_BLUE),
+        ('TEXTCOLOR',   (0,0),(-1,0),  t.CP_WHITE),
+        ('ROWBACKGROUNDS',(0,1),(-1,-1),[t.CP_LIGHT, t.CP_WHITE]),
+        ('GRID',        (0,0),(-1,-1), 0.3, t.CP_MUTED),
+        ('LEFTPADDING', (0,0),(-1,-1), 4),
+        ('RIGHTPADDING',(0,0),(-1,-1), 4),
+        ('TOPPADDING',  (0,0),(-1,-1), 3),
+        ('BOTTOMPADDING',(0,0),(-1,-1),3),
+        ('VALIGN',      (0,0),(-1,-1), 'MIDDLE'),
+    ]
+    t.TBL_BASE_STYLE = TableStyle(t.TBL_BASE)  # Tabellen ohne Zusatzstil teilen sich diese Instanz
+    t.STATUS_COLS = (t.CP_DARK, t.CP_GREEN, t.CP_ORANGE, t.CP_RED)
+    # Abstände/Spaltenbreiten in pt — einmal umgerechnet statt N*mm je Aufruf
+    t.M1, t.M2, t.M3, t.M4, t.M6, t.M16, t.M18 = (n*mm for n in (1, 2, 3, 4, 6, 16, 18))
+    t.CW_PARAMS = (75*mm, 52*mm, 42*mm)
+    t.CW_IST    = (35*mm, 38*mm, 38*mm, 36*mm, 22*mm)
+    t.CW_SW     = (30*mm, 28*mm, 47*mm, 47*mm, 17*mm)
+    t.CW_ANLAGE = (60*mm, 57*mm, 52*mm)
+
+    @functools.lru_cache(maxsize=None)
+    def sty(name, **kw):
+        """ParagraphStyle — gleiche Argumente, gleiche Instanz"""
+        kw.setdefault("textColor", t.CP_DARK)
+        return ParagraphStyle(name, **{"fontName": "Helvetica", "fontSize": 9, "leading": 13, **kw})
+    t.sty = sty
+    return t
+
+_RLP = _rl_print() if _RL_OK else None
+
+_STATUS_TXT = ("ECO / OK", "STUFE 1", "STUFE 2", "ALARM")
+
+@st.cache_data(max_entries=8, show_spinner=False)
 def generate_pdf_report(params: dict) -> bytes:
-    """Erstellt einen druckbaren PDF-Simulationsbericht."""
-    buf = io.BytesIO()
+    """Erstellt einen druckbaren PDF-Simulationsbericht.
+    Gecacht nach Parameterwerten — params['date'] (minutengenau) gehört zum Schlüssel."""
+    _require_reportlab()
+    buf = _PdfSink()
     doc = SimpleDocTemplate(buf, pagesize=A4,
-        leftMargin=18*mm, rightMargin=18*mm,
-        topMargin=16*mm, bottomMargin=16*mm)
-
-    # ── Farben (Corporate Design °coolsulting)
-    C_BLUE  = colors.HexColor("#36A9E1")
-    C_DARK  = colors.HexColor("#3C3C3B")
-    C_LIGHT = colors.HexColor("#F0F8FD")
-    C_GREEN = colors.HexColor("#00C08B")
-    C_ORANGE= colors.HexColor("#F5A623")
-    C_RED   = colors.HexColor("#E63946")
-    C_MUTED = colors.HexColor("#8899AA")
-    C_WHITE = colors.white
-    C_BLACK = colors.HexColor("#1A1A2E")
-
-    # ── Styles
-    def sty(name, **kw):
-        defaults = dict(fontName="Helvetica", fontSize=9,
-                        textColor=C_DARK, leading=13)
-        defaults.update(kw)
-        return ParagraphStyle(name, **defaults)
+        leftMargin=_RLP.M18, rightMargin=_RLP.M18,
+        topMargin=_RLP.M16, bottomMargin=_RLP.M16)
 
+    # ── Styles (prozessweit gecacht über _RLP.sty — Farben vergleichen per Wert)
+    sty = _RLP.sty
     S_TITLE   = sty("title",   fontSize=20, fontName="Helvetica-Bold",
-                    textColor=C_BLUE, spaceAfter=2*mm, leading=24)
-    S_SUBTITLE= sty("sub",     fontSize=10, textColor=C_MUTED, spaceAfter=4*mm)
+                    textColor=_RLP.CP_BLUE, spaceAfter=_RLP.M2, leading=24)
+    S_SUBTITLE= sty("sub",     fontSize=10, textColor=_RLP.CP_MUTED, spaceAfter=_RLP.M4)
     S_H1      = sty("h1",      fontSize=12, fontName="Helvetica-Bold",
-                    textColor=C_BLUE, spaceBefore=4*mm, spaceAfter=2*mm)
+                    textColor=_RLP.CP_BLUE, spaceBefore=_RLP.M4, spaceAfter=_RLP.M2)
     S_H2      = sty("h2",      fontSize=10, fontName="Helvetica-Bold",
-                    textColor=C_DARK, spaceBefore=3*mm, spaceAfter=1*mm)
-    S_BODY    = sty("body",    fontSize=9,  textColor=C_DARK, spaceAfter=1*mm)
-    S_SMALL   = sty("small",   fontSize=7.5,textColor=C_MUTED)
-    S_WARN    = sty("warn",    fontSize=9,  textColor=C_RED,  fontName="Helvetica-Bold")
-    S_OK      = sty("ok",      fontSize=9,  textColor=C_GREEN,fontName="Helvetica-Bold")
+                    textColor=_RLP.CP_DARK, spaceBefore=_RLP.M3, spaceAfter=_RLP.M1)
+    S_BODY    = sty("body",    fontSize=9,  textColor=_RLP.CP_DARK, spaceAfter=_RLP.M1)
+    S_SMALL   = sty("small",   fontSize=7.5,textColor=_RLP.CP_MUTED)
+    S_WARN    = sty("warn",    fontSize=9,  textColor=_RLP.CP_RED,  fontName="Helvetica-Bold")
+    S_OK      = sty("ok",      fontSize=9,  textColor=_RLP.CP_GREEN,fontName="Helvetica-Bold")
+    S_TC_HEADER = sty("tc_head", fontSize=8.5, textColor=_RLP.CP_WHITE, fontName="Helvetica-Bold")
+    S_TC_BODY   = sty("tc_body", fontSize=8.5, textColor=_RLP.CP_DARK)
 
     def tbl(data, col_widths, style_extra=None):
-        base = [
-            ('FONTNAME',    (0,0),(-1,0),  'Helvetica-Bold'),
-            ('FONTSIZE',    (0,0),(-1,-1), 8.5),
-            ('BACKGROUND',  (0,0),(-1,0),  C_BLUE),
-            ('TEXTCOLOR',   (0,0),(-1,0),  C_WHITE),
-            ('ROWBACKGROUNDS',(0,1),(-1,-1),[C_LIGHT, C_WHITE]),
-            ('GRID',        (0,0),(-1,-1), 0.3, C_MUTED),
-            ('LEFTPADDING', (0,0),(-1,-1), 4),
-            ('RIGHTPADDING',(0,0),(-1,-1), 4),
-            ('TOPPADDING',  (0,0),(-1,-1), 3),
-            ('BOTTOMPADDING',(0,0),(-1,-1),3),
-            ('VALIGN',      (0,0),(-1,-1), 'MIDDLE'),
-        ]
-        if style_extra:
-            base += style_extra
         t = Table(data, colWidths=col_widths)
-        t.setStyle(TableStyle(base))
+        t.setStyle(TableStyle(_RLP.TBL_BASE + style_extra) if style_extra else _RLP.TBL_BASE_STYLE)
         return t
 
     p  = params
-    now= datetime.now().strftime("%d.%m.%Y %H:%M")
-    story = []
-
+    now= p.get("date") or datetime.now().strftime("%d.%m.%Y %H:%M")
     # ── HEADER ────────────────────────────────────────────────
-    story.append(Paragraph("BSF GAS-SIMULATOR", S_TITLE))
-    story.append(Paragraph(
-        f"Simulationsbericht &nbsp;&nbsp;|&nbsp;&nbsp; "
-        f"°coolsulting × REPLOID Group AG &nbsp;&nbsp;|&nbsp;&nbsp; LP 640_07 Rev.02 "
-        f"&nbsp;&nbsp;|&nbsp;&nbsp; Erstellt: {now}", S_SUBTITLE))
-    story.append(HRFlowable(width="100%", thickness=1.5, color=C_BLUE, spaceAfter=4*mm))
+    story = [
+        Paragraph("BSF GAS-SIMULATOR", S_TITLE),
+        Paragraph(
+            f"Simulationsbericht &nbsp;&nbsp;|&nbsp;&nbsp; "
+            f"°coolsulting × REPLOID Group AG &nbsp;&nbsp;|&nbsp;&nbsp; LP 640_07 Rev.02 "
+            f"&nbsp;&nbsp;|&nbsp;&nbsp; Erstellt: {now}", S_SUBTITLE),
+        HRFlowable(width="100%", thickness=1.5, color=_RLP.CP_BLUE, spaceAfter=_RLP.M4),
+    ]
 
     # ── ZUSAMMENFASSUNG ────────────────────────────────────────
-    story.append(Paragraph("1. Simulationsparameter", S_H1))
-
     data_params = [
         ["Parameter", "Zone 01", "Zone 02"],
         ["Raumvolumen [m³]",       f"{p['vol_z1']:.1f}",   f"{p['vol_z2']:.1f}"],
@@ -854,45 +971,35 @@ def generate_pdf_report(params: dict) -> bytes:
         ["Lüfter Volumenstrom",    f"{p['q1']:.0f} m³/h ({p['pct1']}%)",
                                    f"{p['q2']:.0f} m³/h"],
         ["Luftwechsel [ACH]",      f"{p['ach1']:.2f}",     f"{p['ach2']:.2f}"],
-        ["CO<sub>2</sub> Emissionsrate",  f"{p['co2_rate']:.3f} g/kg/h (Ø)", "—"],
-        ["NH<sub>3</sub> Emissionsrate",  f"{p['nh3_rate']:.5f} g/kg/h (Basis)", "—"],
+        # Nur Zellen mit <sub> brauchen einen Paragraph, Rest stylt die TableStyle
+        [Paragraph("CO<sub>2</sub> Emissionsrate", S_TC_BODY),
+                                   f"{p['co2_rate']:.3f} g/kg/h (Ø)", "—"],
+        [Paragraph("NH<sub>3</sub> Emissionsrate", S_TC_BODY),
+                                   f"{p['nh3_rate']:.5f} g/kg/h (Basis)", "—"],
     ]
-    cw = [75*mm, 52*mm, 42*mm]
-    story.append(tbl([[Paragraph(c, sty(f"tc{i}", fontSize=8.5,
-                       textColor=C_WHITE if r==0 else C_DARK,
-                       fontName="Helvetica-Bold" if r==0 else "Helvetica"))
-                       for i,c in enumerate(row)]
-                      for r,row in enumerate(data_params)], cw))
-    story.append(Spacer(1, 4*mm))
+    story.extend([
+        Paragraph("1. Simulationsparameter", S_H1),
+        tbl(data_params, _RLP.CW_PARAMS, [('TEXTCOLOR', (0,1),(-1,-1), _RLP.CP_DARK)]),
+        Spacer(1, _RLP.M4),
+    ])
 
     # ── ISTWERTE ──────────────────────────────────────────────
-    story.append(Paragraph("2. Aktuelle Gaswerte (Masttag)", S_H1))
-
-    def status_col(val, s1, s2, s3):
-        if val >= s3: return C_RED
-        if val >= s2: return C_ORANGE
-        if val >= s1: return C_GREEN
-        return C_DARK
-
-    def status_txt(val, s1, s2, s3):
-        if val >= s3: return "ALARM"
-        if val >= s2: return "STUFE 2"
-        if val >= s1: return "STUFE 1"
-        return "ECO / OK"
-
-    co2_col_z1 = status_col(p['co2_z1'], p['co2_s1'], p['co2_s2'], p['co2_s3'])
-    nh3_col_z1 = status_col(p['nh3_z1'], p['nh3_s1'], p['nh3_s2'], p['nh3_s3'])
-    co2_col_z2 = status_col(p['co2_z2'], p['co2_s1'], p['co2_s2'], p['co2_s3'])
-    nh3_col_z2 = status_col(p['nh3_z2'], p['nh3_s1'], p['nh3_s2'], p['nh3_s3'])
+    # Stufenindex 0..3 = Anzahl erreichter Schwellen (>=), für beide Zonen auf einmal
+    co2_i1, co2_i2 = np.searchsorted([p['co2_s1'], p['co2_s2'], p['co2_s3']],
+                                     [p['co2_z1'], p['co2_z2']], side='right')
+    nh3_i1, nh3_i2 = np.searchsorted([p['nh3_s1'], p['nh3_s2'], p['nh3_s3']],
+                                     [p['nh3_z1'], p['nh3_z2']], side='right')
+    co2_col_z1, co2_col_z2 = _RLP.STATUS_COLS[co2_i1], _RLP.STATUS_COLS[co2_i2]
+    nh3_col_z1, nh3_col_z2 = _RLP.STATUS_COLS[nh3_i1], _RLP.STATUS_COLS[nh3_i2]
 
     data_ist = [
         ["Gas", "Zone 01 [ppm]", "Status Z1", "Zone 02 [ppm]", "Status Z2"],
         [f"CO2",
-         f"{p['co2_z1']:.0f}", status_txt(p['co2_z1'],p['co2_s1'],p['co2_s2'],p['co2_s3']),
-         f"{p['co2_z2']:.0f}", status_txt(p['co2_z2'],p['co2_s1'],p['co2_s2'],p['co2_s3'])],
+         f"{p['co2_z1']:.0f}", _STATUS_TXT[co2_i1],
+         f"{p['co2_z2']:.0f}", _STATUS_TXT[co2_i2]],
         [f"NH3",
-         f"{p['nh3_z1']:.1f}", status_txt(p['nh3_z1'],p['nh3_s1'],p['nh3_s2'],p['nh3_s3']),
-         f"{p['nh3_z2']:.1f}", status_txt(p['nh3_z2'],p['nh3_s1'],p['nh3_s2'],p['nh3_s3'])],
+         f"{p['nh3_z1']:.1f}", _STATUS_TXT[nh3_i1],
+         f"{p['nh3_z2']:.1f}", _STATUS_TXT[nh3_i2]],
     ]
     style_ist = [
         ('TEXTCOLOR',(1,1),(1,1), co2_col_z1), ('FONTNAME',(1,1),(1,1),'Helvetica-Bold'),
@@ -904,45 +1011,51 @@ def generate_pdf_report(params: dict) -> bytes:
         ('TEXTCOLOR',(3,2),(3,2), nh3_col_z2), ('FONTNAME',(3,2),(3,2),'Helvetica-Bold'),
         ('TEXTCOLOR',(4,2),(4,2), nh3_col_z2), ('FONTNAME',(4,2),(4,2),'Helvetica-Bold'),
     ]
-    story.append(tbl(data_ist, [35*mm,38*mm,38*mm,36*mm,22*mm], style_ist))
-    story.append(Spacer(1, 4*mm))
+    story.extend([
+        Paragraph("2. Aktuelle Gaswerte (Masttag)", S_H1),
+        tbl(data_ist, _RLP.CW_IST, style_ist),
+        Spacer(1, _RLP.M4),
+    ])
 
     # ── SCHWELLENWERTE ────────────────────────────────────────
-    story.append(Paragraph("3. Lüfterstufen & Schwellenwerte", S_H1))
     data_sw = [
-        ["Stufe", "Lüfter [%]", "CO<sub>2</sub>-Schwelle [ppm]", "NH<sub>3</sub>-Schwelle [ppm]", "Farbe"],
+        ["Stufe", "Lüfter [%]", Paragraph("CO<sub>2</sub>-Schwelle [ppm]", S_TC_HEADER),
+         Paragraph("NH<sub>3</sub>-Schwelle [ppm]", S_TC_HEADER), "Farbe"],
         ["ECO",     f"{p['s_pct'][0]}%", f"< {p['s_co2'][1]:,}",  f"< {p['s_nh3'][1]}", "●"],
         ["STUFE 1", f"{p['s_pct'][1]}%", f"≥ {p['s_co2'][1]:,}",  f"≥ {p['s_nh3'][1]}", "●"],
         ["STUFE 2", f"{p['s_pct'][2]}%", f"≥ {p['s_co2'][2]:,}",  f"≥ {p['s_nh3'][2]}", "●"],
         ["ALARM",   f"{p['s_pct'][3]}%", f"≥ {p['s_co2'][3]:,}",  f"≥ {p['s_nh3'][3]}", "●"],
     ]
-    dot_colors = [C_MUTED, C_GREEN, C_ORANGE, C_RED]
+    dot_colors = [_RLP.CP_MUTED, _RLP.CP_GREEN, _RLP.CP_ORANGE, _RLP.CP_RED]
     style_sw = [(('TEXTCOLOR',(4,i+1),(4,i+1), dot_colors[i])) for i in range(4)]
-    story.append(tbl(data_sw, [30*mm,28*mm,47*mm,47*mm,17*mm], style_sw))
-    story.append(Spacer(1, 4*mm))
+    story.extend([
+        Paragraph("3. Lüfterstufen & Schwellenwerte", S_H1),
+        tbl(data_sw, _RLP.CW_SW, style_sw),
+        Spacer(1, _RLP.M4),
+    ])
 
     # ── PHYSIK / METHODIK ─────────────────────────────────────
-    story.append(Paragraph("4. Berechnungsgrundlagen", S_H1))
-    story.append(Paragraph(
-        "<b>Massenbilanz-Gleichgewicht (Steady-State):</b>", S_H2))
-    story.append(Paragraph(
-        "c [ppm] = c_Aussenluft + (Emissionsrate [m³/h] / Volumenstrom [m³/h]) × 10⁶", S_BODY))
-    story.append(Paragraph(
-        "<b>CO<sub>2</sub>-Kurvenform:</b> Glockenform (Sinus-Peak Tag 4), "
-        f"Ø-Rate: {p['co2_rate']:.3f} g/kg/h, Peak ≈ {p['co2_rate']*3:.3f} g/kg/h "
-        f"| Dichte CO<sub>2</sub>: 1.842 kg/m³", S_BODY))
-    story.append(Paragraph(
-        "<b>NH<sub>3</sub>-Kurvenform:</b> Exponentiell ab Tag 4, "
-        f"Basis-Rate: {p['nh3_rate']:.5f} g/kg/h "
-        f"| Dichte NH<sub>3</sub>: 0.769 kg/m³", S_BODY))
-    story.append(Paragraph(
-        "<b>Quellen:</b> Global 2000 (2024) — 1.414 g CO<sub>2</sub>/kg/8d; "
-        "Chen et al. 2019 (Brill) — NH<sub>3</sub>-Exponentialanstieg; "
-        "Engineering For Change — Mikroklima-Faktor 1.4–2.4×", S_SMALL))
-    story.append(Spacer(1, 4*mm))
+    story.extend([
+        Paragraph("4. Berechnungsgrundlagen", S_H1),
+        Paragraph("<b>Massenbilanz-Gleichgewicht (Steady-State):</b>", S_H2),
+        Paragraph(
+            "c [ppm] = c_Aussenluft + (Emissionsrate [m³/h] / Volumenstrom [m³/h]) × 10⁶", S_BODY),
+        Paragraph(
+            "<b>CO<sub>2</sub>-Kurvenform:</b> Glockenform (Sinus-Peak Tag 4), "
+            f"Ø-Rate: {p['co2_rate']:.3f} g/kg/h, Peak ≈ {p['co2_rate']*3:.3f} g/kg/h "
+            f"| Dichte CO<sub>2</sub>: 1.842 kg/m³", S_BODY),
+        Paragraph(
+            "<b>NH<sub>3</sub>-Kurvenform:</b> Exponentiell ab Tag 4, "
+            f"Basis-Rate: {p['nh3_rate']:.5f} g/kg/h "
+            f"| Dichte NH<sub>3</sub>: 0.769 kg/m³", S_BODY),
+        Paragraph(
+            "<b>Quellen:</b> Global 2000 (2024) — 1.414 g CO<sub>2</sub>/kg/8d; "
+            "Chen et al. 2019 (Brill) — NH<sub>3</sub>-Exponentialanstieg; "
+            "Engineering For Change — Mikroklima-Faktor 1.4–2.4×", S_SMALL),
+        Spacer(1, _RLP.M4),
+    ])
 
     # ── RAUMPARAMETER ─────────────────────────────────────────
-    story.append(Paragraph("5. Anlagenparameter", S_H1))
     data_anlage = [
         ["Eigenschaft", "Zone 01", "Zone 02"],
         ["Abmessungen [m]",       "21.36 × 9.75 × 3.80",  "3.80 × 2.90 × 3.80"],
@@ -952,19 +1065,20 @@ def generate_pdf_report(params: dict) -> bytes:
         ["Max. Larvenmasse [kg]", "51.858",                 "7.560"],
         ["Projekt",               "REPLOID Group AG",       "LP 640_07 Rev.02"],
     ]
-    story.append(tbl(data_anlage, [60*mm,57*mm,52*mm]))
-    story.append(Spacer(1, 6*mm))
-
-    # ── FOOTER ────────────────────────────────────────────────
-    story.append(HRFlowable(width="100%", thickness=0.5, color=C_MUTED, spaceAfter=2*mm))
-    story.append(Paragraph(
-        f"BSF Gas-Simulator v5.0 &nbsp;|&nbsp; °coolsulting GmbH &nbsp;|&nbsp; "
-        f"Simulationsbericht automatisch erstellt am {now} &nbsp;|&nbsp; "
-        "Alle Werte sind Simulationswerte — keine Messwerte.", S_SMALL))
+    story.extend([
+        Paragraph("5. Anlagenparameter", S_H1),
+        tbl(data_anlage, _RLP.CW_ANLAGE),
+        Spacer(1, _RLP.M6),
+        # ── FOOTER ────────────────────────────────────────────
+        HRFlowable(width="100%", thickness=0.5, color=_RLP.CP_MUTED, spaceAfter=_RLP.M2),
+        Paragraph(
+            f"BSF Gas-Simulator v5.0 &nbsp;|&nbsp; °coolsulting GmbH &nbsp;|&nbsp; "
+            f"Simulationsbericht automatisch erstellt am {now} &nbsp;|&nbsp; "
+            "Alle Werte sind Simulationswerte — keine Messwerte.", S_SMALL),
+    ])
 
     doc.build(story)
-    buf.seek(0)
-    return buf.read()
+    return buf.getvalue()
 
 st.set_page_config(
     page_title="BSF Gas-Simulator v3.1 | coolsulting",
@@ -974,7 +1088,11 @@ st.set_page_config(
 )
 
 # ── CSS ────────────────────────────────────────────────────────
-st.markdown(f"""
+# Formatiertes Stylesheet prozessweit gecacht — das f-String-Template (~30 Farben)
+# wird nicht bei jedem Rerun neu gebaut
+@st.cache_resource(show_spinner=False)
+def _css_html():
+    return f"""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Barlow:wght@300;400;500;600;700&family=JetBrains+Mono:wght@300;400;700&display=swap');
 
@@ -1044,6 +1162,9 @@ button[kind="header"] {{
 .sec.red {{ color:{RED}; border-color:#200810; }}
 
 /* KPI Cards */
+/* KPI-Zeile: 4 Karten in einem Markdown-Element, Abstand wie st.columns */
+.kpi-row {{ display:grid; grid-template-columns:repeat(4, minmax(0, 1fr)); gap:1rem; margin-bottom:1rem; }}
+@media (max-width: 640px) {{ .kpi-row {{ grid-template-columns:1fr; }} }}
 .kpi {{
     background:{CARD}; border:1px solid {BORDER}; border-top:3px solid {BLUE};
     border-radius:10px; padding:18px 18px; text-align:center; height:100%;
@@ -1100,25 +1221,42 @@ section[data-testid="stSidebar"] label {{ color:#4a6888 !important; font-size:.9
 section[data-testid="stSidebar"] p {{ color:#4a6888; font-size:.9rem; }}
 hr {{ border-color:{BORDER}; margin:8px 0; }}
 .foot {{ font-family: var(--font-mono); font-size:.62rem; color:#1C2C3C; letter-spacing:2px; }}
+
+/* PDF-Button in der Sidebar: hellblau mit dunkelgrauer Schrift */
+div[data-testid="stSidebar"] div.stButton > button[kind="primary"] {{
+    background-color: {BLUE} !important;
+    color: #1A2535 !important;
+    font-family: 'JetBrains Mono', monospace !important;
+    font-weight: 700 !important;
+    border: none !important;
+}}
+div[data-testid="stSidebar"] div.stButton > button[kind="primary"]:hover {{
+    background-color: #5BBFE8 !important;
+    color: #07090E !important;
+}}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_css_html(), unsafe_allow_html=True)
 
 # ── SESSION STATE ────────────────────────────────────────────
 _def = dict(
     sim_active=False, sim_step=0, mast_day=1.0,
     flow_z1=30.0, flow_z2=25.0,
-    hist_t=[0.0], hist_co2_z1=[420.0], hist_nh3_z1=[0.2],
-    hist_co2_z2=[420.0], hist_nh3_z2=[0.2], hist_flow_z1=[30.0],
 )
 for k, v in _def.items():
     if k not in st.session_state: st.session_state[k] = v
 
 # ── PHYSIK-ENGINE (korrekte Massenbilanz) ────────────────────
+# Skalare Raten über math statt NumPy (kein 0-d-Array-Overhead je Aufruf);
+# für Arrays von Masttagen die *_series-Varianten darunter
 def co2_rate_g_kg_h(day, rate_avg=None):
     """CO2-Emissionsrate g/kg Substrat/h — Gauskurve, Peak Tag 4"""
     r = rate_avg if rate_avg is not None else CO2_RATE_AVG
-    x = day / CO2_DAYS
-    return r * (0.3 + 2.7 * np.sin(np.pi * x) ** 1.8)
+    s = math.sin(math.pi * day / CO2_DAYS)
+    if s < 0.0:            # nach Tag 8: negative Basis → NaN wie bei NumPy (Python gäbe complex)
+        return math.nan
+    return r * (0.3 + 2.7 * s ** 1.8)
 
 def nh3_rate_g_kg_h(day, rate_base=None):
     """NH3-Emissionsrate g/kg Substrat/h — exponentiell ab Tag 4"""
@@ -1126,7 +1264,36 @@ def nh3_rate_g_kg_h(day, rate_base=None):
     x = day / CO2_DAYS
     if x < 0.45:
         return b * (1.0 + 0.5 * x / 0.45)
-    return b * 1.5 * np.exp(2.6 * (x - 0.45))
+    return b * 1.5 * math.exp(2.6 * (x - 0.45))
+
+def co2_rate_series(days, rate_avg=None):
+    """co2_rate_g_kg_h für ein ndarray von Masttagen"""
+    r = rate_avg if rate_avg is not None else CO2_RATE_AVG
+    x = np.asarray(days, dtype=float) / CO2_DAYS
+    return r * (0.3 + 2.7 * np.sin(np.pi * x) ** 1.8)
+
+def nh3_rate_series(days, rate_base=None):
+    """nh3_rate_g_kg_h für ein ndarray von Masttagen"""
+    b = rate_base if rate_base is not None else NH3_RATE_BASE
+    x = np.asarray(days, dtype=float) / CO2_DAYS
+    return np.where(x < 0.45, b * (1.0 + 0.5 * x / 0.45), b * 1.5 * np.exp(2.6 * (x - 0.45)))
+
+# Autopilot: Masttag je Simulationsschritt liegt fest → Raten einmal tabellieren
+# (cache_resource: jeder Tick ist ein Rerun, Modul-Globals würden neu berechnet).
+# Schlüssel = die in der Sidebar editierbaren Raten, sonst bliebe die Tabelle auf den Defaults.
+SIM_STEPS = 120                                     # Tag 1 → 8 in 120 Schritten
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def sim_rate_lut(co2_r, nh3_r):
+    """(Masttag, CO2-Rate, NH3-Rate) je Simulationsschritt 0..SIM_STEPS, schreibgeschützt"""
+    days = np.minimum(8.0, 1.0 + np.arange(SIM_STEPS + 1) * (7.0 / SIM_STEPS))
+    lut = (days, co2_rate_series(days, co2_r), nh3_rate_series(days, nh3_r))
+    for a in lut: a.flags.writeable = False         # prozessweit geteilt
+    return lut
+
+def _round1(c):
+    """auf 0.1 ppm runden (c ≥ 0); NaN (Rate jenseits Tag 8) bleibt NaN → Lücke im Chart"""
+    return int(c * 10.0 + 0.5) / 10.0 if c == c else c
 
 def calc_ppm(mass_kg, rate_g_kg_h, rho_gas, flow_pct, vol, ambient=CO2_AMBIENT):
     """
@@ -1141,7 +1308,7 @@ def calc_ppm(mass_kg, rate_g_kg_h, rho_gas, flow_pct, vol, ambient=CO2_AMBIENT):
     E_m3_h  = E_kg_h / rho_gas                   # m³ Gas / h
     Q_m3_h  = fan_m3h(flow_pct, vol)             # m³ Frischluft / h
     c_ss    = ambient + (E_m3_h / Q_m3_h) * 1e6  # ppm Gleichgewicht
-    return round(c_ss, 1)
+    return _round1(c_ss)
 
 def macro_co2(mass_kg, flow_pct, vol, day, co2_r=None):
     r = co2_r if co2_r is not None else CO2_RATE_AVG
@@ -1151,6 +1318,35 @@ def macro_nh3(mass_kg, flow_pct, vol, day, nh3_r=None):
     b = nh3_r if nh3_r is not None else NH3_RATE_BASE
     return calc_ppm(mass_kg, nh3_rate_g_kg_h(day, b), RHO_NH3, flow_pct, vol, 0.02)
 
+def calc_ppm_series(mass_kg, rate_arr, rho_gas, flow_pct, vol, ambient=CO2_AMBIENT):
+    """calc_ppm für ein ndarray von Raten bei festem Lüfter — gleiche Rechenreihenfolge.
+    flow_pct als Tupel → (len, N): alle Lüfterstufen in einem Durchlauf über rate_arr"""
+    E_m3_h = mass_kg * rate_arr / 1000.0 / rho_gas
+    q = (np.array([fan_m3h(p, vol) for p in flow_pct])[:, None]
+         if isinstance(flow_pct, tuple) else fan_m3h(flow_pct, vol))
+    c_ss   = ambient + (E_m3_h / q) * 1e6
+    return np.floor(c_ss * 10.0 + 0.5) / 10.0     # NaN bleibt NaN
+
+def macro_co2_series(mass_kg, flow_pct, vol, days, co2_r=None):
+    """macro_co2 für ein ndarray von Masttagen"""
+    return calc_ppm_series(mass_kg, co2_rate_series(days, co2_r), RHO_CO2, flow_pct, vol, CO2_AMBIENT)
+
+def macro_nh3_series(mass_kg, flow_pct, vol, days, nh3_r=None):
+    """macro_nh3 für ein ndarray von Masttagen"""
+    return calc_ppm_series(mass_kg, nh3_rate_series(days, nh3_r), RHO_NH3, flow_pct, vol, 0.02)
+
+def nh3_break_even_pct(mass_t, max_q, days, nh3_s3, nh3_r=None):
+    """Break-Even-Kurve: Lüfter-% (max. 100) je Masttag, bei dem NH3 gerade nh3_s3 (ALARM) erreicht.
+    Q = E / nh3_s3 · 1e6 mit E aus nh3_rate_series (Dichte 0.717 kg/m³ bei 0 °C)"""
+    E = nh3_rate_series(days, nh3_r) * mass_t * 1000 / 1000 / 0.717
+    return np.minimum(100, E / nh3_s3 * 1e6 / max_q * 100)
+
+def fan_step_series(vals, thr, pct):
+    """Lüfter-% je Kurvenpunkt: höchste Stufe i ≥ 1 mit vals ≥ thr[i], sonst pct[0].
+    np.select statt searchsorted — Schwellen sind frei eingebbar (nicht zwingend
+    aufsteigend) und NaN muss wie bisher auf Stufe 0 fallen."""
+    return np.select([vals >= thr[3], vals >= thr[2], vals >= thr[1]], pct[3:0:-1], pct[0])
+
 def micro_factor(day):
     return 1.4 + 1.0 * ((day - 1) / (CO2_DAYS - 1))
 
@@ -1158,24 +1354,51 @@ def ach(flow_pct, vol):
     """Alias für ach_val — rückwärtskompatibel"""
     return ach_val(flow_pct, vol)
 
+def stage_idx(co2, nh3):
+    """Stufe 0..3 = Anzahl überschrittener Schwellen, das kritischere Gas entscheidet.
+    int() nötig: Werte können np.float64 sein, und np.bool_ + np.bool_ ist ein ODER."""
+    return max(int(co2 > CO2_S1) + int(co2 > CO2_S2) + int(co2 > CO2_S3),
+               int(nh3 > NH3_S1) + int(nh3 > NH3_S2) + int(nh3 > NH3_S3))
+
 def autopilot_flow(co2, nh3, day, base_pct):
     """Autopilot: Lüfter-% basierend auf aktuellen Gaswerten"""
-    if co2 > CO2_S3 or nh3 > NH3_S3: return 100.0
-    if co2 > CO2_S2 or nh3 > NH3_S2: return 70.0
-    if co2 > CO2_S1 or nh3 > NH3_S1: return 40.0
-    return base_pct
+    return (base_pct, 40.0, 70.0, 100.0)[stage_idx(co2, nh3)]
+
+def sim_step(m1_kg, m2_kg, co2_r, nh3_r, day):
+    """
+    Ein Autopilot-Tick für beide Zonen in einem Aufruf — ersetzt 8× macro_* + 2× autopilot_flow.
+    Q über fan_m3h, Rundung über _round1 — dieselben Bausteine wie calc_ppm, die Emission
+    je Gas wird nur einmal statt je Lüfterstand gerechnet.
+    Rückgabe: (flow_z1, flow_z2, co2_z1, nh3_z1, co2_z2, nh3_z2)
+    """
+    flows, vals = [], []
+    for m_kg, vol, base in ((m1_kg, VOL_Z1, 28.0), (m2_kg, VOL_Z2, 22.0)):
+        e_co2 = m_kg * co2_r / 1000.0 / RHO_CO2   # m³ Gas / h
+        e_nh3 = m_kg * nh3_r / 1000.0 / RHO_NH3
+        # Stufenwahl bei Lüfter 0 % (Q = Untergrenze aus fan_m3h)
+        q0 = fan_m3h(0, vol)
+        f = autopilot_flow(_round1(CO2_AMBIENT + (e_co2 / q0) * 1e6),
+                           _round1(0.02 + (e_nh3 / q0) * 1e6), day, base)
+        q = fan_m3h(f, vol)
+        flows.append(f)
+        vals += (_round1(CO2_AMBIENT + (e_co2 / q) * 1e6),
+                 _round1(0.02 + (e_nh3 / q) * 1e6))
+    return (*flows, *vals)
+
+# Betriebsstufen, Index = stage_idx()
+_STUFE_TABLE = (
+    (0, "STANDBY / ECO",       MUTED,  ""),
+    (1, "BETRIEB STUFE 1",     GREEN,  "grn"),
+    (2, "WARNUNG opt/akust",   ORANGE, "ora"),
+    (3, "ALARM — EVAKUIERUNG", RED,    "red"),
+)
 
 def fan_stage(co2, nh3):
-    if co2 > CO2_S3 or nh3 > NH3_S3: return 3, "ALARM — 100%",  RED,    100
-    if co2 > CO2_S2 or nh3 > NH3_S2: return 2, "STUFE 2 — 70%", ORANGE,  70
-    if co2 > CO2_S1 or nh3 > NH3_S1: return 1, "STUFE 1 — 40%", GREEN,   40
-    return 0, "ECO — 20%", MUTED, 20
+    i = stage_idx(co2, nh3)
+    return i, FAN_LABEL[i], FAN_COLOR[i], int(FAN_PCT[i])
 
 def get_stufe(co2, nh3):
-    if co2 > CO2_S3 or nh3 > NH3_S3: return 3, "ALARM — EVAKUIERUNG", RED,    "red"
-    if co2 > CO2_S2 or nh3 > NH3_S2: return 2, "WARNUNG opt/akust",   ORANGE, "ora"
-    if co2 > CO2_S1 or nh3 > NH3_S1: return 1, "BETRIEB STUFE 1",     GREEN,  "grn"
-    return 0, "STANDBY / ECO",                                          MUTED,  ""
+    return _STUFE_TABLE[stage_idx(co2, nh3)]
 
 # ── SIDEBAR ──────────────────────────────────────────────────
 with st.sidebar:
@@ -1277,7 +1500,7 @@ with st.sidebar:
 
     # Anzeige der resultierenden Peak-Werte
     co2_peak_val = CO2_RATE_AVG * 3.0   # ca. Faktor 3 durch Sinus-Kurve
-    nh3_peak_val = NH3_RATE_BASE * 1.5 * __import__("math").exp(2.6 * (1.0 - 0.45))
+    nh3_peak_val = NH3_RATE_BASE * NH3_PEAK_MULT
     st.markdown(f"""
 <div style='font-family:JetBrains Mono;font-size:.72rem;line-height:1.9;margin:4px 0;'>
 <span style='color:{BLUE};'>CO₂ Peak (Tag 4): ~{co2_peak_val:.3f} g/kg/h</span><br>
@@ -1294,8 +1517,6 @@ with st.sidebar:
         st.session_state.update(dict(
             sim_active=True, sim_step=0, mast_day=1.0,
             flow_z1=30.0, flow_z2=25.0,
-            hist_t=[0.0], hist_co2_z1=[420.0], hist_nh3_z1=[0.2],
-            hist_co2_z2=[420.0], hist_nh3_z2=[0.2], hist_flow_z1=[30.0],
         ))
     if sb.button("⏹ STOP", use_container_width=True):
         st.session_state.sim_active = False
@@ -1303,20 +1524,27 @@ with st.sidebar:
         for k, v in _def.items(): st.session_state[k] = v
         st.rerun()
 
-    if st.session_state.sim_active:
+    # Autopilot-Status als eigenes Fragment: _main_view schreibt je Tick mast_day/flow_*,
+    # die Sidebar selbst läuft aber nur bei vollen Reruns — ohne Fragment stünde die Anzeige still
+    @st.fragment(run_every=0.25 if st.session_state.sim_active else None)
+    def _sim_status():
+        if not st.session_state.sim_active:
+            return
         d = st.session_state.mast_day
-        fz1_now = int(st.session_state.flow_z1)
-        fz2_now = int(st.session_state.flow_z2)
+        # Autopilot-Stufen liegen in 0..100 % → int direkt als Progress-Prozent, ohne min()/Division
+        fz1_now, fz2_now = int(st.session_state.flow_z1), int(st.session_state.flow_z2)
         # Progress zeigt Lüfterstärke, nicht Masttag
         st.markdown(f"<p style='font-family:JetBrains Mono;font-size:.72rem;color:{MUTED};margin:6px 0 2px 0;'>Masttag {d:.1f}/8</p>", unsafe_allow_html=True)
-        st.progress(min(1.0, fz1_now/100.0), text=f"Z1: {fan_m3h(fz1_now,VOL_Z1,FAN_Z1_MAX_M3H):.0f} m³/h ({fz1_now}%)")
-        st.progress(min(1.0, fz2_now/100.0), text=f"Z2: {fan_m3h_z2(fz2_now):.0f} m³/h ({fz2_now}%)")
+        st.progress(fz1_now, text=f"Z1: {fan_m3h(fz1_now,VOL_Z1,FAN_Z1_MAX_M3H):.0f} m³/h ({fz1_now}%)")
+        st.progress(fz2_now, text=f"Z2: {fan_m3h_z2(fz2_now):.0f} m³/h ({fz2_now}%)")
         st.markdown(f"""
 <div style='font-family:JetBrains Mono;font-size:.78rem;margin:6px 0;line-height:1.8;'>
 <span style='color:{BLUE};'>▶ Z1: {fz1_now}% &nbsp; {ach(fz1_now,VOL_Z1):.2f} ACH</span><br>
 <span style='color:{GREEN};'>▶ Z2: {fz2_now}% &nbsp; {ach(fz2_now,VOL_Z2):.2f} ACH</span>
 </div>""", unsafe_allow_html=True)
 
+    _sim_status()
+
 # Emissionsraten aus Sidebar (editierbar)
 CO2_RATE_AVG  = st.session_state.get("co2_rate_avg",  0.125)
 NH3_RATE_BASE = st.session_state.get("nh3_rate_base", 0.001)   # g/kg/h = 1 mg/kg/h — realistischer BSF-Default
@@ -1325,385 +1553,304 @@ NH3_RATE_BASE = st.session_state.get("nh3_rate_base", 0.001)   # g/kg/h = 1 mg/k
 with st.sidebar:
     st.divider()
     st.markdown(f"<p style='font-family:JetBrains Mono;font-size:.72rem;color:{MUTED};letter-spacing:2px;font-weight:600;'>PDF BERICHT</p>", unsafe_allow_html=True)
-    # Button-Farbe: hellblau mit dunkelgrauer Schrift
-    st.markdown(f"""<style>
-div[data-testid="stSidebar"] div.stButton > button[kind="primary"] {{
-    background-color: {BLUE} !important;
-    color: #1A2535 !important;
-    font-family: 'JetBrains Mono', monospace !important;
-    font-weight: 700 !important;
-    border: none !important;
-}}
-div[data-testid="stSidebar"] div.stButton > button[kind="primary"]:hover {{
-    background-color: #5BBFE8 !important;
-    color: #07090E !important;
-}}
-</style>""", unsafe_allow_html=True)
     if st.button("📄 BERICHT GENERIEREN", use_container_width=True, type="primary"):
-        with st.spinner("Generiere PDF..."):
-            # flow_z1/z2 aus session_state (werden weiter unten gesetzt, Fallback auf Defaults)
-            _flow_z1     = st.session_state.get("fz1_pct_computed", 20)
-            _q1_m3h      = st.session_state.get("fz1_m3h_computed", int(0.2 * FAN_Z1_MAX_M3H))
-            _flow_z2_m3h = st.session_state.get("fz2_m3h_computed", int(0.2 * FAN_Z2_MAX_M3H))
-            _flow_z2     = max(1, int(_flow_z2_m3h / FAN_Z2_MAX_M3H * 100))
-            _co2_z1 = macro_co2(mass_z1*1000, _flow_z1, VOL_Z1, mast_day)
-            _nh3_z1 = macro_nh3(mass_z1*1000, _flow_z1, VOL_Z1, mast_day)
-            _co2_z2 = macro_co2(mass_z2*1000, _flow_z2, VOL_Z2, mast_day)
-            _nh3_z2 = macro_nh3(mass_z2*1000, _flow_z2, VOL_Z2, mast_day)
-            _q1 = _q1_m3h
-            _q2 = _flow_z2_m3h
-            _stufen_co2 = [st.session_state.get(f"s_co2_{i}", d) for i,d in enumerate([420,3000,5000,10000])]
-            _stufen_nh3 = [st.session_state.get(f"s_nh3_{i}", d) for i,d in enumerate([0,12,25,50])]
-            _stufen_pct = [st.session_state.get(f"s_pct_{i}", d) for i,d in enumerate([20,40,70,100])]
-            pdf_params = dict(
-                date      = datetime.now().strftime("%d.%m.%Y %H:%M"),
-                mast_day  = mast_day,
-                mass_z1   = mass_z1, mass_z2   = mass_z2,
-                mass_z1_kg= mass_z1*1000, mass_z2_kg= mass_z2*1000,
-                vol_z1    = VOL_Z1,   vol_z2    = VOL_Z2,
-                z1_l=Z1_L, z1_b=Z1_B, z1_h=Z1_H,
-                z2_l=Z2_L, z2_b=Z2_B, z2_h=Z2_H,
-                flow_z1   = _flow_z1,  flow_z2  = _flow_z2,
-                q1=_q1, q2=_q2,
-                ach_z1    = _q1/max(VOL_Z1,1), ach_z2 = max(_flow_z2_m3h,1)/VOL_Z2,
-                fan_z1_max= FAN_Z1_MAX_M3H, fan_z2_max= FAN_Z2_MAX_M3H,
-                boxes_z1  = 201, box_kg_z1 = 258,
-                boxes_z2  = 63,  box_kg_z2 = 120,
-                co2_z1=_co2_z1, nh3_z1=_nh3_z1,
-                co2_z2=_co2_z2, nh3_z2=_nh3_z2,
-                co2_s1=CO2_S1, co2_s2=CO2_S2, co2_s3=CO2_S3,
-                nh3_s1=NH3_S1, nh3_s2=NH3_S2, nh3_s3=NH3_S3,
-                co2_rate  = CO2_RATE_AVG,
-                nh3_rate  = NH3_RATE_BASE,
-                stufen    = dict(co2=_stufen_co2, nh3=_stufen_nh3, pct=_stufen_pct),
-            )
-            try:
-                pdf_bytes = make_pdf_report(pdf_params)
-                fname = f"BSF_Bericht_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-                st.download_button(
-                    label="⬇ PDF HERUNTERLADEN",
-                    data=pdf_bytes,
-                    file_name=fname,
-                    mime="application/pdf",
-                    use_container_width=True,
-                )
-                st.success("Bericht bereit!")
-            except ImportError as e:
-                st.error("📦 reportlab fehlt!")
-                st.code("pip install reportlab", language="bash")
-                st.info("Bitte obigen Befehl im Terminal ausführen, dann Streamlit neu starten.")
-            except Exception as e:
-                st.error(f"PDF Fehler: {e}")
-                import traceback; st.code(traceback.format_exc())
-
-# ── SIMULATION ───────────────────────────────────────────────
-if st.session_state.sim_active:
-    st.session_state.sim_step += 1
-    step = st.session_state.sim_step
-    st.session_state.mast_day = min(8.0, 1.0 + step * (7.0 / 120.0))
-    mast_day = st.session_state.mast_day
-
-    flow_z1 = autopilot_flow(
-        macro_co2(mass_z1*1000, 0, VOL_Z1, mast_day),
-        macro_nh3(mass_z1*1000, 0, VOL_Z1, mast_day), mast_day, 28.0)
-    flow_z2 = autopilot_flow(
-        macro_co2(mass_z2*1000, 0, VOL_Z2, mast_day),
-        macro_nh3(mass_z2*1000, 0, VOL_Z2, mast_day), mast_day, 22.0)
-    st.session_state.flow_z1 = flow_z1
-    st.session_state.flow_z2 = flow_z2
-
-    co2_z1 = macro_co2(mass_z1*1000, flow_z1, VOL_Z1, mast_day)
-    nh3_z1 = macro_nh3(mass_z1*1000, flow_z1, VOL_Z1, mast_day)
-    co2_z2 = macro_co2(mass_z2*1000, flow_z2, VOL_Z2, mast_day)
-    nh3_z2 = macro_nh3(mass_z2*1000, flow_z2, VOL_Z2, mast_day)
-
-    t_val = (step * 0.25) / 60.0
-    for lst, val in [("hist_t", t_val), ("hist_co2_z1", co2_z1),
-                     ("hist_nh3_z1", nh3_z1), ("hist_co2_z2", co2_z2),
-                     ("hist_nh3_z2", nh3_z2), ("hist_flow_z1", flow_z1)]:
-        st.session_state[lst].append(val)
-        if len(st.session_state[lst]) > 200:
-            st.session_state[lst] = st.session_state[lst][-200:]
-else:
-    mast_day = mast_day  # vom Slider
-    flow_z1 = flow_z1_manual   # % — m³/h = q1_manual
-    flow_z2 = flow_z2_manual
-    co2_z1 = macro_co2(mass_z1*1000, flow_z1, VOL_Z1, mast_day)
-    nh3_z1 = macro_nh3(mass_z1*1000, flow_z1, VOL_Z1, mast_day)
-    co2_z2 = macro_co2(mass_z2*1000, flow_z2, VOL_Z2, mast_day)
-    nh3_z2 = macro_nh3(mass_z2*1000, flow_z2, VOL_Z2, mast_day)
-    # Manueller Modus: History mit aktuellem Wert befüllen (für Echtzeit-Charts)
-    t_val = len(st.session_state.hist_t) * 0.25 / 60.0
-    for lst, val in [("hist_t", t_val), ("hist_co2_z1", co2_z1),
-                     ("hist_nh3_z1", nh3_z1), ("hist_co2_z2", co2_z2),
-                     ("hist_nh3_z2", nh3_z2), ("hist_flow_z1", flow_z1)]:
-        st.session_state[lst].append(val)
-        if len(st.session_state[lst]) > 200:
-            st.session_state[lst] = st.session_state[lst][-200:]
-
-mf = micro_factor(mast_day)
-co2_micro = co2_z1 * mf
-nh3_micro = nh3_z1 * mf
-s1, t1, c1, cl1 = get_stufe(co2_z1, nh3_z1)
-s2, t2, c2, cl2 = get_stufe(co2_z2, nh3_z2)
-fs_nr, fs_txt, fs_col, fs_pct = fan_stage(co2_z1, nh3_z1)
-
-# ── TOPBAR ───────────────────────────────────────────────────
-st.markdown(f"""
-<div class='topbar'>
-  <div>
-    <div class='tb-title'>BSF Kühllager Gas-Simulator</div>
-    <div class='tb-meta'>
-      Henke / Steyerberg &nbsp;|&nbsp; LP 640_07 Rev.02 &nbsp;|&nbsp;
-      REPLOID Group AG &nbsp;&times;&nbsp; coolsulting &nbsp;|&nbsp; v3.1
-    </div>
-  </div>
-  <div class='tb-right'>
-    {datetime.now().strftime('%d.%m.%Y  %H:%M:%S')}<br>
-    Masttag: <span style='color:{YELLOW};'>{mast_day:.1f}/8</span> &nbsp;&nbsp;
-    CO2-Rate: <span style='color:{ORANGE};'>{co2_rate_g_kg_h(mast_day):.1f} g/kg/h</span> &nbsp;&nbsp;
-    NH3-Rate: <span style='color:{RED};'>{nh3_rate_g_kg_h(mast_day)*1000:.0f} mg/kg/h</span> &nbsp;&nbsp;
-    Luefter-Stufe: <span style='color:{fs_col};'>{fs_txt}</span>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
-# ── BESCHREIBUNG (aufklappbar) ────────────────────────────────
-with st.expander("ℹ️  Über diese Simulation — Funktionsweise & Bedienung", expanded=False):
-    st.markdown(f"""
-<div style='font-family:Barlow,Helvetica,sans-serif;font-size:1rem;line-height:1.9;color:{WHITE};padding:4px 0;'>
-
-<p style='font-family:JetBrains Mono;font-size:.75rem;color:{BLUE};letter-spacing:3px;text-transform:uppercase;margin-bottom:14px;font-weight:600;'>
-BSF KÜHLLAGER GAS-SIMULATOR — REPLOID GROUP AG × COOLSULTING</p>
-
-<p>Diese interaktive Simulation visualisiert die <strong style='color:{BLUE};'>Gaskonzentrationen CO₂ und NH₃</strong> 
-in einem BSF-Larvenkühllager (Schwarze Soldatenfliege / <em>Hermetia illucens</em>) über den gesamten 8-tägigen 
-Mastzyklus — basierend auf wissenschaftlichen Emissionsdaten.</p>
-
-<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{GREEN};letter-spacing:2px;'>WISSENSCHAFTLICHE BASIS</p>
-<ul style='margin:6px 0 12px 20px;'>
-  <li><strong style='color:{BLUE};'>CO₂:</strong> 1.414 g/kg Biomasse über 8 Masttage (Global 2000 Abschlussbericht EIP-Projekt Larvenzucht)</li>
-  <li><strong style='color:{ORANGE};'>NH₃:</strong> Exponentieller Anstieg ab Tag 4 — bis zu 15× höher als am Einlagertag (Chen et al. 2019, Brill 2024)</li>
-  <li><strong style='color:{GREEN};'>Mikroklima:</strong> Direkt über dem Larvenbett ist die Konzentration 1,4× bis 2,4× höher als im Raumschnitt (Engineering For Change)</li>
-</ul>
-
-<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{BLUE};letter-spacing:2px;'>RAUMZONEN (LP 640_07 Rev.02)</p>
-<ul style='margin:6px 0 12px 20px;'>
-  <li><strong>Zone 01 — Mastlarven:</strong> 21,36 × 9,75 × 3,80 m (≈ 790 m³) — max. 10 °C — 201 Palettenboxen à 258 kg = 51,9 t</li>
-  <li><strong>Zone 02 — Junglarven:</strong> 3,80 × 2,90 × 3,80 m (≈ 43 m³) — max. 13 °C — 63 Holzboxen à 120 kg = 7,6 t</li>
-</ul>
-
-<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{YELLOW};letter-spacing:2px;'>LÜFTUNGSKONZEPT</p>
-<ul style='margin:6px 0 12px 20px;'>
-  <li><strong style='color:{BLUE};'>CO₂ (ρ = 1,84 kg/m³, schwerer als Luft):</strong> Absaugung bodennah hinten rechts</li>
-  <li><strong style='color:{YELLOW};'>NH₃ (ρ = 0,77 kg/m³, leichter als Luft):</strong> Absaugung deckennah hinten rechts</li>
-  <li><strong style='color:{GREEN};'>Diagonalströmung:</strong> Frischluft vorne links oben + unten — verhindert Totzonen</li>
-  <li>Chemischer/Biologischer Abluft-Wäscher reduziert NH₃-Emissionen um bis zu 82 %</li>
-</ul>
-
-<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{RED};letter-spacing:2px;'>GRENZWERTE</p>
-<table style='font-size:.9rem;border-collapse:collapse;margin:6px 0 12px 0;'>
-  <tr style='color:{MUTED};font-family:JetBrains Mono;font-size:.68rem;'>
-    <td style='padding:3px 20px 3px 0;'>Stufe</td>
-    <td style='padding:3px 20px 3px 0;'>CO₂</td>
-    <td style='padding:3px 20px 3px 0;'>NH₃</td>
-    <td style='padding:3px 0;'>Maßnahme</td>
-  </tr>
-  <tr style='color:{GREEN};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S0 Optimal</td><td>&lt; 1.000 ppm</td><td>&lt; 8 ppm</td><td>Standby / ECO</td></tr>
-  <tr style='color:{GREEN};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S1 Betrieb</td><td>&gt; 3.000 ppm</td><td>&gt; 12 ppm</td><td>Lüfter Stufe 1 — 40%</td></tr>
-  <tr style='color:{ORANGE};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S2 Warnung</td><td>&gt; 5.000 ppm</td><td>&gt; 25 ppm</td><td>Lüfter Stufe 2 — 70% + opt. Alarm</td></tr>
-  <tr style='color:{RED};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S3 Alarm</td><td>&gt; 10.000 ppm</td><td>&gt; 50 ppm</td><td>100% + Evakuierung</td></tr>
-</table>
-
-<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{MUTED};letter-spacing:2px;'>BEDIENUNG</p>
-<ul style='margin:6px 0 0 20px;color:{MUTED};'>
-  <li><strong style='color:{WHITE};'>Manuell:</strong> Masttag-Slider bewegen → Gaskonzentration ändert sich live</li>
-  <li><strong style='color:{WHITE};'>Autopilot START:</strong> Simuliert den kompletten 8-Tage-Zyklus — Lüftung regelt automatisch</li>
-  <li><strong style='color:{WHITE};'>3D-Ansicht:</strong> Zeigt CO₂-Bodenschicht (rot) und NH₃-Deckenakkumulation (gelb) + Strömungsvektoren</li>
-</ul>
-</div>
-""", unsafe_allow_html=True)
-
-# ════════════════════════════════════════════════
-# BLOCK 1 — KPI ZONE 01 (4 Spalten)
-# ════════════════════════════════════════════════
-st.markdown("<div class='sec'>Zone 01 — Mastlarven — Makroklima (Raumluft) — max. 10 °C — 201 Boxen à 258 kg</div>", unsafe_allow_html=True)
-
-def kpi_html(lbl, val, unit, cls=""):
-    return f"""<div class='kpi {cls}'>
-  <div class='kpi-lbl'>{lbl}</div>
-  <div class='kpi-num {cls}'>{val}</div>
-  <div class='kpi-unit'>{unit}</div>
-</div>"""
-
-co2c = "red" if co2_z1>CO2_S3 else "ora" if co2_z1>CO2_S2 else "grn" if co2_z1<CO2_S1 else ""
-nh3c = "red" if nh3_z1>NH3_S3 else "ora" if nh3_z1>NH3_S2 else "grn" if nh3_z1<NH3_S1 else ""
-
-ka, kb, kc, kd = st.columns(4)
-ka.markdown(kpi_html("CO2 Makroklima", f"{int(co2_z1):,}", "ppm", co2c), unsafe_allow_html=True)
-kb.markdown(kpi_html("NH3 Makroklima", f"{nh3_z1:.1f}", "ppm", nh3c), unsafe_allow_html=True)
-kc.markdown(kpi_html("Luefter Z1", f"{int(flow_z1)}", "%"), unsafe_allow_html=True)
-kd.markdown(f"""<div class='kpi' style='border-top-color:{c1};'>
-  <div class='kpi-lbl'>Status Zone 01</div>
-  <div style='font-family:JetBrains Mono;font-size:.78rem;font-weight:700;color:{c1};margin:8px 0 5px;line-height:1.4;'>{t1}</div>
-  <div class='kpi-unit'>ACH: {ach(flow_z1,VOL_Z1):.1f} /h &nbsp;|&nbsp; Vol: {VOL_Z1:.0f} m³</div>
-</div>""", unsafe_allow_html=True)
-
-# MIKROKLIMA
-st.markdown("<div class='sec grn' style='margin-top:10px;'>Mikroklima — direkt über Larvenbett (CO2 schwerer: sammelt sich über Wannen)</div>", unsafe_allow_html=True)
-ma, mb, mc, md = st.columns(4)
-co2mc = "red" if co2_micro>CO2_S3 else "ora" if co2_micro>CO2_S2 else ""
-nh3mc = "red" if nh3_micro>NH3_S3 else "ora" if nh3_micro>NH3_S2 else ""
-ma.markdown(kpi_html("CO2 Mikroklima", f"{int(co2_micro):,}", "ppm am Bett", co2mc), unsafe_allow_html=True)
-mb.markdown(kpi_html("NH3 Mikroklima", f"{nh3_micro:.1f}", "ppm am Bett", nh3mc), unsafe_allow_html=True)
-mc.markdown(f"""<div class='micro-badge'>
-MIKRO / MAKRO FAKTOR<br>
-<span style='font-size:1.6rem;color:{GREEN};font-family:JetBrains Mono;font-weight:700;'>{mf:.2f}×</span><br>
-<span style='font-size:.62rem;color:{MUTED};'>steigt von 1.4× (Tag 1) → 2.4× (Tag 8)</span>
-</div>""", unsafe_allow_html=True)
-md.markdown(f"""<div class='macro-badge'>
-BED VENTILATION<br>
-<span style='font-size:.85rem;'>Direktabsaugung über Wannen</span><br>
-<span style='font-size:.62rem;color:{MUTED};'>Reduktion Mikroklima: −40 bis −60%<br>
-Engineering For Change (Sanergy)</span>
-</div>""", unsafe_allow_html=True)
-
-# ZONE 02
-st.markdown("<div class='sec grn' style='margin-top:10px;'>Zone 02 — Junglarven — max. 13 °C — 63 Holzboxen à 120 kg</div>", unsafe_allow_html=True)
-ja, jb, jc, jd = st.columns(4)
-co2c2 = "red" if co2_z2>CO2_S3 else "ora" if co2_z2>CO2_S2 else ""
-nh3c2 = "red" if nh3_z2>NH3_S3 else "ora" if nh3_z2>NH3_S2 else ""
-ja.markdown(kpi_html("CO2 Zone 02", f"{int(co2_z2):,}", "ppm", co2c2), unsafe_allow_html=True)
-jb.markdown(kpi_html("NH3 Zone 02", f"{nh3_z2:.1f}", "ppm", nh3c2), unsafe_allow_html=True)
-jc.markdown(kpi_html("Luefter Z2", f"{int(flow_z2)}", "%"), unsafe_allow_html=True)
-jd.markdown(f"""<div class='kpi' style='border-top-color:{c2};'>
-  <div class='kpi-lbl'>Status Zone 02</div>
-  <div style='font-family:JetBrains Mono;font-size:.78rem;font-weight:700;color:{c2};margin:8px 0 5px;'>{t2}</div>
-  <div class='kpi-unit'>ACH: {ach(flow_z2,VOL_Z2):.1f} /h &nbsp;|&nbsp; Vol: {VOL_Z2:.0f} m³</div>
-</div>""", unsafe_allow_html=True)
-
-st.divider()
-
-# ════════════════════════════════════════════════
-# BLOCK 2 — 3D VISUALISIERUNG (volle Breite, unten)
-# ════════════════════════════════════════════════
-
-# ── DIAGRAMME LINKS + SCHALTSTUFEN/INFO RECHTS ──
-# Diagramme volle Breite
-if True:
-    days = np.linspace(1, 8, 100)
-    ht   = st.session_state.hist_t       or [0, 0.5]
-    hc1  = st.session_state.hist_co2_z1  or [co2_z1]*2
-    hn1  = st.session_state.hist_nh3_z1  or [nh3_z1]*2
-    hc2  = st.session_state.hist_co2_z2  or [co2_z2]*2
-    hn2  = st.session_state.hist_nh3_z2  or [nh3_z2]*2
-    hfl  = st.session_state.hist_flow_z1 or [flow_z1]*2
-
-    CHART_H   = 420
-    FONT_SIZE = 14
-
-    # Dynamische Kurven: CO2/NH3 ppm über alle 8 Tage
-    # bei aktueller Larvenmasse UND aktueller Lüfterleistung
-    co2_ppm_arr  = [macro_co2(mass_z1*1000, flow_z1, VOL_Z1, d) for d in days]
-    nh3_ppm_arr  = [macro_nh3(mass_z1*1000, flow_z1, VOL_Z1, d) for d in days]
-    # Zusätzlich: bei 100% Lüfter als Referenz (Minimum)
-    co2_100_arr  = [macro_co2(mass_z1*1000, 100,     VOL_Z1, d) for d in days]
-    nh3_100_arr  = [macro_nh3(mass_z1*1000, 100,     VOL_Z1, d) for d in days]
-    # Bei 20% ECO (Maximum / Worst Case)
-    co2_20_arr   = [macro_co2(mass_z1*1000, 20,      VOL_Z1, d) for d in days]
-    nh3_20_arr   = [macro_nh3(mass_z1*1000, 20,      VOL_Z1, d) for d in days]
-
-    q_now = fan_m3h(flow_z1, VOL_Z1)
-
-    # ════════════════════════════════════════════════
-    # DIAGRAMME — sauber, 4 Stück, klar strukturiert
-    # ════════════════════════════════════════════════
-    # X-Achse: Stunden 0–96 (= 4 Tage Mastdauer sichtbar)
-    hours = np.linspace(0, 288, 400)         # 0..288 h = 12 Tage
-    days  = 1.0 + hours / 24.0              # Masttag für Physik-Funktionen (0..288h)
-    h_now = (mast_day - 1.0) * 24.0         # aktueller Masttag → Stunden
-
-    CH   = 400   # Chart-Höhe CO2 px
-    CH_NH3 = 800  # Chart-Höhe NH3 px (doppelt)
-    FS   = 13    # Font-Size
-
-    def base_layout(y_range=None, title_y2=None, nh3=False):
-        lo = dict(
-            height=CH_NH3 if nh3 else CH, paper_bgcolor=DARK, plot_bgcolor=DARK,
-            font=dict(color=WHITE, size=FS),
-            xaxis=dict(title="Stunden [h]", color=WHITE, gridcolor=BORDER,
-                       tickmode='linear', dtick=24,
-                       range=[0, 288],
-                       tickfont=dict(size=FS), title_font=dict(size=FS, color=WHITE),
-                       # Tag-Markierungen als vertikale Hilfslinien
-                       ),
-            yaxis=dict(title="ppm", color=WHITE, gridcolor=BORDER,
-                       tickfont=dict(size=FS), title_font=dict(size=FS, color=WHITE),
-                       range=y_range),
-            legend=dict(font=dict(size=12, color=WHITE), bgcolor='rgba(0,0,0,0)',
-                        x=0.01, y=0.99, xanchor='left', yanchor='top'),
-            margin=dict(l=60, r=90, t=20, b=50),
+        # flow_z1/z2 aus session_state (werden weiter unten gesetzt, Fallback auf Defaults)
+        _flow_z1     = st.session_state.get("fz1_pct_computed", 20)
+        _q1_m3h      = st.session_state.get("fz1_m3h_computed", int(0.2 * FAN_Z1_MAX_M3H))
+        _flow_z2_m3h = st.session_state.get("fz2_m3h_computed", int(0.2 * FAN_Z2_MAX_M3H))
+        _flow_z2     = max(1, int(_flow_z2_m3h / FAN_Z2_MAX_M3H * 100))
+        _co2_r  = co2_rate_g_kg_h(mast_day)
+        _nh3_r  = nh3_rate_g_kg_h(mast_day)
+        _co2_z1 = calc_ppm(mass_z1*1000, _co2_r, RHO_CO2, _flow_z1, VOL_Z1, CO2_AMBIENT)
+        _nh3_z1 = calc_ppm(mass_z1*1000, _nh3_r, RHO_NH3, _flow_z1, VOL_Z1, 0.02)
+        _co2_z2 = calc_ppm(mass_z2*1000, _co2_r, RHO_CO2, _flow_z2, VOL_Z2, CO2_AMBIENT)
+        _nh3_z2 = calc_ppm(mass_z2*1000, _nh3_r, RHO_NH3, _flow_z2, VOL_Z2, 0.02)
+        _q1 = _q1_m3h
+        _q2 = _flow_z2_m3h
+        _stufen_co2 = [st.session_state.get(f"s_co2_{i}", d) for i,d in enumerate([420,3000,5000,10000])]
+        _stufen_nh3 = [st.session_state.get(f"s_nh3_{i}", d) for i,d in enumerate([0,12,25,50])]
+        _stufen_pct = [st.session_state.get(f"s_pct_{i}", d) for i,d in enumerate([20,40,70,100])]
+        pdf_params = dict(
+            date      = datetime.now().strftime("%d.%m.%Y %H:%M"),
+            mast_day  = mast_day,
+            mass_z1   = mass_z1, mass_z2   = mass_z2,
+            mass_z1_kg= mass_z1*1000, mass_z2_kg= mass_z2*1000,
+            vol_z1    = VOL_Z1,   vol_z2    = VOL_Z2,
+            z1_l=Z1_L, z1_b=Z1_B, z1_h=Z1_H,
+            z2_l=Z2_L, z2_b=Z2_B, z2_h=Z2_H,
+            flow_z1   = _flow_z1,  flow_z2  = _flow_z2,
+            q1=_q1, q2=_q2,
+            ach_z1    = _q1/max(VOL_Z1,1), ach_z2 = max(_flow_z2_m3h,1)/VOL_Z2,
+            fan_z1_max= FAN_Z1_MAX_M3H, fan_z2_max= FAN_Z2_MAX_M3H,
+            boxes_z1  = 201, box_kg_z1 = 258,
+            boxes_z2  = 63,  box_kg_z2 = 120,
+            co2_z1=_co2_z1, nh3_z1=_nh3_z1,
+            co2_z2=_co2_z2, nh3_z2=_nh3_z2,
+            co2_s1=CO2_S1, co2_s2=CO2_S2, co2_s3=CO2_S3,
+            nh3_s1=NH3_S1, nh3_s2=NH3_S2, nh3_s3=NH3_S3,
+            co2_rate  = CO2_RATE_AVG,
+            nh3_rate  = NH3_RATE_BASE,
+            stufen    = dict(co2=_stufen_co2, nh3=_stufen_nh3, pct=_stufen_pct),
         )
-        if title_y2:
-            lo['yaxis2'] = dict(
-                title=title_y2, overlaying='y', side='right',
-                color=YELLOW, tickfont=dict(size=12),
-                title_font=dict(size=12, color=YELLOW),
-                range=[0, 120], showgrid=False,
+        fname = f"BSF_Bericht_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+        # Gleiche Parameter → vorhandenes (ggf. noch laufendes) Future wiederverwenden
+        _key = _pdf_params_key(pdf_params)
+        _pdf_cache = st.session_state.setdefault("pdf_cache", {})
+        _fut = _pdf_cache.pop(_key, None) or _PDF_POOL.submit(make_pdf_report, pdf_params)
+        _pdf_cache[_key] = _fut  # ans Ende → zuletzt benutzt
+        while len(_pdf_cache) > _PDF_CACHE_MAX:
+            _pdf_cache.pop(next(iter(_pdf_cache)))
+        st.session_state.pdf_fut = (_fut, fname, _key)
+
+    # PDF läuft im Hintergrund — Status als Fragment pollen: während des Baus läuft nur
+    # dieser Block alle 0.25 s neu, bei Fertigstellung genau ein voller Rerun
+    _pdf_job = st.session_state.get("pdf_fut")
+    _pdf_pending = _pdf_job is not None and not _pdf_job[0].done()
+
+    @st.fragment(run_every=0.25 if _pdf_pending else None)
+    def _pdf_status(polling):
+        _pdf_job = st.session_state.get("pdf_fut")
+        if _pdf_job is None:
+            return
+        if not _pdf_job[0].done():
+            st.info("⏳ Generiere PDF...")
+            return
+        if polling:
+            st.rerun()   # fertig → voller Rerun, run_every wird neu bestimmt und das Polling endet
+        _fut, fname, _key = _pdf_job
+        try:
+            pdf_bytes = _fut.result()
+            st.download_button(
+                label="⬇ PDF HERUNTERLADEN",
+                data=pdf_bytes,
+                file_name=fname,
+                mime="application/pdf",
+                use_container_width=True,
             )
-        return lo
-
-    def add_day_markers(fig, ymax):
-        """Tag 1–12 als vertikale Markierungen alle 24h"""
-        for d in range(1, 13):
-            h = (d-1)*24
-            fig.add_vline(x=h, line_color=BORDER, line_dash="dot", line_width=1)
-            fig.add_annotation(x=h+1, y=ymax*0.97, text=f"T{d}", showarrow=False,
-                font=dict(color=MUTED, size=10, family="JetBrains Mono"), xanchor="left")
-
-    def vline_now(fig, x_h, y, label, color):
-        fig.add_vline(x=x_h, line_color=YELLOW, line_dash="dash", line_width=2)
-        fig.add_annotation(x=x_h, y=y, text=f" {x_h:.0f}h: {label}",
-            showarrow=False, font=dict(color=color, size=12, family="JetBrains Mono"),
-            xanchor="left", bgcolor="rgba(0,0,0,0.5)")
-
-    # ─────────────────────────────────────────────────
-    # CHART 1 — CO2 Zone 01
-    # ─────────────────────────────────────────────────
-    c1_ist  = macro_co2(mass_z1*1000, flow_z1, VOL_Z1, mast_day)
-    c1_soll = CO2_S1   # Zielwert = S1
-    c1_arr  = [macro_co2(mass_z1*1000, flow_z1, VOL_Z1, d) for d in days]
-    fl_arr  = [autopilot_flow(macro_co2(mass_z1*1000,flow_z1,VOL_Z1,d),
-                              macro_nh3(mass_z1*1000,flow_z1,VOL_Z1,d), d, 20)
-               for d in days]
-
-    st.markdown(
-        f"<div class='sec'>Zone 01 — CO₂ &nbsp;|&nbsp; IST: <b style='color:{BLUE};'>{c1_ist:.0f} ppm</b>"
-        f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{fan_m3h(flow_z1,VOL_Z1):.0f} m³/h</b></div>",
-        unsafe_allow_html=True)
+            st.success("Bericht bereit!")
+        except ImportError as e:
+            st.session_state.pdf_cache.pop(_key, None)
+            st.error("📦 reportlab fehlt!")
+            st.code("pip install reportlab", language="bash")
+            st.info("Bitte obigen Befehl im Terminal ausführen, dann Streamlit neu starten.")
+        except Exception as e:
+            st.session_state.pdf_cache.pop(_key, None)
+            st.error(f"PDF Fehler: {e}")
+            import traceback; st.code(traceback.format_exc())
+
+    _pdf_status(_pdf_pending)
+
+# ── DIAGRAMM-LAYOUT ──────────────────────────────────────────
+# Statischer Teil einmal beim Import; base_layout() patcht nur Höhe, y-Range, y2.
+CH     = 400   # Chart-Höhe CO2 px
+CH_NH3 = 800   # Chart-Höhe NH3 px (doppelt)
+FS     = 13    # Font-Size
+
+# X-Achse der Diagramme: 0..288 h = 12 Tage, Masttag für die Physik-Funktionen —
+# fest, daher einmal beim Import und schreibgeschützt (Diagramme teilen die Arrays)
+_HOURS_288 = np.linspace(0, 288, 400)
+_DAYS_288  = 1.0 + _HOURS_288 / 24.0
+_HOURS_288.setflags(write=False); _DAYS_288.setflags(write=False)
+
+# An Plotly gehen die Kurven als float32 (halbe bdata-Nutzlast je Rerun), gerechnet wird in float64
+_HOURS_F32 = _HOURS_288.astype(np.float32)
+_HOURS_ENV = np.concatenate([_HOURS_F32, _HOURS_F32[::-1]])   # x der Risiko-Hülle (hin + zurück)
+HOV_PPM0, HOV_PPM1, HOV_PCT = '%{y:.0f} ppm', '%{y:.1f} ppm', '%{y:.0f} %'
+
+def f32(a):
+    return np.asarray(a, dtype=np.float32)
+
+def envelope_y(lo, hi):
+    """y der Risiko-Hülle zu _HOURS_ENV: lo hin, hi zurück — ein float32-Puffer statt
+    concatenate + Cast (je Aufruf neu: die Figuren von Chart 2 sind prozessweit gecacht)"""
+    n = len(lo)
+    out = np.empty(2 * n, dtype=np.float32)
+    out[:n], out[n:] = lo, hi[::-1]
+    return out
+
+# Füllfarben der Diagramme als Konstanten — kein rgba_*-Aufruf beim Figurenbau
+_FILL_CO2_Z1, _FILL_CO2_Z2 = RGBA['blue', 0.13],   RGBA['green', 0.13]
+_FILL_NH3_Z1, _FILL_NH3_Z2 = RGBA['orange', 0.14], RGBA['yellow', 0.14]
+_FILL_RISK,   _FILL_EXPO   = RGBA['red', 0.07],    RGBA['red', 0.05]
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def zone_curves(mass_t, vol, flow_pct, eco_pct, max_q, co2_r, nh3_r, nh3_s3):
+    """Kurven einer Zone über _DAYS_288: (CO2, NH3, NH3 bei ECO-Lüfter, Break-Even-%).
+    Unabhängig vom Masttag → Autopilot-Ticks und Tag-Slider treffen den Cache."""
+    m_kg = mass_t * 1000
+    # NH3 bei Ist- und ECO-Lüfter in einem Durchlauf → (2, N)
+    n_arr, n_noq = calc_ppm_series(m_kg, nh3_rate_series(_DAYS_288, nh3_r), RHO_NH3,
+                                   (flow_pct, eco_pct), vol, 0.02)
+    return (calc_ppm_series(m_kg, co2_rate_series(_DAYS_288, co2_r), RHO_CO2, flow_pct, vol, CO2_AMBIENT),
+            n_arr, n_noq,
+            nh3_break_even_pct(mass_t, max_q, _DAYS_288, nh3_s3, nh3_r))
+
+_LAYOUT_BASE = dict(
+    paper_bgcolor=DARK, plot_bgcolor=DARK,
+    font=dict(color=WHITE, size=FS),
+    xaxis=dict(title="Stunden [h]", color=WHITE, gridcolor=BORDER,
+               tickmode='linear', dtick=24, range=[0, 288],
+               tickfont=dict(size=FS), title_font=dict(size=FS, color=WHITE)),
+    yaxis=dict(title="ppm", color=WHITE, gridcolor=BORDER,
+               tickfont=dict(size=FS), title_font=dict(size=FS, color=WHITE)),
+    legend=dict(font=dict(size=12, color=WHITE), bgcolor='rgba(0,0,0,0)',
+                x=0.01, y=0.99, xanchor='left', yanchor='top'),
+    margin=dict(l=60, r=90, t=20, b=50),
+)
+_LAYOUT_Y2 = dict(overlaying='y', side='right', color=YELLOW, tickfont=dict(size=12),
+                  title_font=dict(size=12, color=YELLOW), range=[0, 120], showgrid=False)
+
+def base_layout(y_range=None, title_y2=None, nh3=False):
+    """Flache Kopie des Templates; nur yaxis wird neu gebaut (Plotly mutiert Eingaben nicht)."""
+    lo = {**_LAYOUT_BASE, 'height': CH_NH3 if nh3 else CH,
+          'yaxis': {**_LAYOUT_BASE['yaxis'], 'range': y_range}}
+    if title_y2:
+        lo['yaxis2'] = {'title': title_y2, **_LAYOUT_Y2}   # title vor title_font, sonst überschreibt es die Font
+    return lo
+
+# Linien + Beschriftungen als fertige Dicts: je Diagramm ein update_layout(shapes=, annotations=)
+# statt einzelner add_hline/add_vline/add_annotation (die das Layout jedes Mal neu aufbauen)
+def hline_decor(levels, size):
+    """Schwellen [(y, Farbe, Breite, Text)] → (shapes, annotations), Text rechts neben der Linie"""
+    return ([dict(type='line', xref='x domain', x0=0, x1=1, yref='y', y0=y, y1=y,
+                  line=dict(color=c, dash='dash', width=w)) for y, c, w, _ in levels],
+            [dict(text=t, font=dict(color=c, size=size), showarrow=False, xref='x domain', x=1,
+                  yref='y', y=y, xanchor='left', yanchor='middle') for y, c, _, t in levels])
+
+def vline_shape(x, color, dash, width):
+    return dict(type='line', xref='x', x0=x, x1=x, yref='y domain', y0=0, y1=1,
+                line=dict(color=color, dash=dash, width=width))
+
+# Schwellenlinien aus den Stufen-Argumenten der build_*-Diagramme (nicht aus CO2_S*/NH3_S*-Globals),
+# sonst zeigen prozessweit gecachte Figuren die Schwellen einer anderen Sitzung
+def co2_decor(s, alarm=""):
+    """CO2-Linien S1..S3 aus stufen_co2 → (shapes, annotations); alarm = Zusatz am S3-Text"""
+    return hline_decor([(s[1], GREEN, 1.5, f"{s[1]:,} ppm"), (s[2], ORANGE, 1.5, f"{s[2]:,} ppm"),
+                        (s[3], RED, 1.5, f"{s[3]:,} ppm{alarm}")], 12)
+
+def nh3_decor(s):
+    """NH3-Linien (feste Raster + S1..S3 aus stufen_nh3) → (shapes, annotations)"""
+    return hline_decor([(5, MUTED, 1.0, "5 ppm"), (10, MUTED, 1.0, "10 ppm"), (15, MUTED, 1.0, "15 ppm"),
+                        (s[1], GREEN, 1.8, f"{s[1]} ppm — S1"), (s[2], ORANGE, 1.8, f"{s[2]} ppm — S2"),
+                        (40, ORANGE, 1.0, "40 ppm"), (s[3], RED, 1.8, f"{s[3]} ppm — ALARM")], 11)
+
+_NH3_VRECT  = dict(type='rect', xref='x', x0=72, x1=288, yref='y domain', y0=0, y1=1,
+                   fillcolor=_FILL_EXPO, line=dict(width=0))
+_DAY_SHAPES = [vline_shape((d-1)*24, BORDER, 'dot', 1) for d in range(1, 13)]
+
+def day_labels(ymax):
+    """Tag 1–12 als Beschriftung der Tageslinien (_DAY_SHAPES) alle 24h"""
+    return [dict(x=(d-1)*24+1, y=ymax*0.97, text=f"T{d}", showarrow=False,
+                 font=dict(color=MUTED, size=10, family="JetBrains Mono"), xanchor="left")
+            for d in range(1, 13)]
+
+@st.cache_resource(show_spinner=False)
+def stream_t(n_pts):
+    """Bahnparameter der 3D-Stromfäden: (t, t je Segment, Zuluft-Querschnitt je Segment), schreibgeschützt"""
+    t = np.linspace(0, 1, n_pts)
+    t_seg = t[:-1]
+    # Querschnitt: breit am Anfang (Aufweitung), dann normalisiert
+    out = (t, t_seg, 0.2 + 0.8 * np.sin(np.pi * t_seg * 0.6 + 0.1) ** 0.5)
+    for a in out:
+        a.flags.writeable = False
+    return out
+
+@st.cache_resource(show_spinner=False)
+def stream_rgb(n_pts):
+    """Farb-LUT der 3D-Stromfäden: 'rgba(r,g,b,'-Präfixe je Segment für (Zuluft, CO2, NH3).
+    RGB hängt nur von t ab → einmal pro Prozess; je Frame wird nur noch Alpha angehängt."""
+    t = stream_t(n_pts)[1]
+    def pre(r, g, b):   # r/g/b wie int() abgeschnitten
+        return tuple(f"rgba({ri},{gi},{bi}," for ri, gi, bi in
+                     zip(*(np.asarray(c).astype(int).tolist() for c in (r, g, b))))
+    # Zuluft: KALT (blau) rein → aufwärmen im Raum (orange Mitte) → vom Verdampfer gekühlt
+    v = np.sin(np.pi * t * 0.85)
+    return (pre(54 + (240 - 54) * v, 169 + (100 - 169) * v, 225 + (40 - 225) * v),
+            # CO2 wird gasreicher → dunkler orange/rot
+            pre(255 * np.minimum(1.0, t * 1.5), 100 * (1 - t * 0.6), np.full_like(t, 40)),
+            pre(255 * np.minimum(1.0, t), 209 * (1 - t * 0.5), 102 * (1 - t * 0.7)))
+
+def rgba_row(rgb, a):
+    """rgba()-Strings aus LUT-Präfixen (stream_rgb) und Alpha (Skalar oder Array)"""
+    return [f"{p}{ai})" for p, ai in zip(rgb, np.broadcast_to(a, len(rgb)).tolist())]
+
+def add_segments3d(fig, x, y, z, cols, lws, w_step=0.5):
+    """Stromfäden (S, N) als Liniensegmente i→i+1 mit eigener Farbe/Breite (S, N-1) in wenigen
+    Scatter3d-Spuren: Segmente durch NaN getrennt, Farbe je Vertex, eine Spur je (auf w_step
+    gerundeter) Breite — line.width ist bei Scatter3d nicht pro Punkt möglich."""
+    x, y, z = (np.asarray(a, dtype=np.float32) for a in (x, y, z))
+    S, N = x.shape
+    def seg(a):   # (S, N-1, 3): [p_i, p_i+1, NaN]
+        out = np.full((S, N - 1, 3), np.nan, dtype=np.float32)
+        out[:, :, 0], out[:, :, 1] = a[:, :-1], a[:, 1:]
+        return out
+    xs, ys, zs = seg(x), seg(y), seg(z)
+    cs = np.repeat(np.asarray(cols)[:, :, None], 3, axis=2)
+    wq = np.round(np.asarray(lws, dtype=float) / w_step) * w_step
+    for w in np.unique(wq):
+        m = wq == w
+        fig.add_trace(go.Scatter3d(x=xs[m].ravel(), y=ys[m].ravel(), z=zs[m].ravel(), mode='lines',
+            line=dict(color=cs[m].ravel().tolist(), width=float(w)),
+            showlegend=False, hoverinfo='none'))
+
+@st.cache_resource(show_spinner=False)
+def gas_grid(l, b, h, nx=10, ny=7, nz=5):
+    """Gitter des 3D-Gaskörpers, flach: (x, y, z als float32, CO2-Profil, NH3-Profil).
+    Profil = Höhenverlauf × Rampe vorne→hinten; je Frame bleibt nur co2n·P_CO2 + nh3n·P_NH3."""
+    xv, yv, zv = (a.ravel() for a in np.meshgrid(
+        np.linspace(0, l, nx), np.linspace(0, b, ny), np.linspace(0, h, nz), indexing='ij'))
+    ramp = 0.3 + 0.7 * (xv / l)
+    out = (f32(xv), f32(yv), f32(zv),
+           (1 - zv / h)**2.5 * ramp,     # CO2 bodennah, steigt von vorne nach hinten
+           (zv / h)**2.0 * ramp)         # NH3 deckennah, steigt von vorne nach hinten
+    for a in out:
+        a.flags.writeable = False
+    return out
+
+@st.cache_resource(show_spinner=False)
+def box_edges(l, b, h):
+    """12 Kanten eines Quaders als (x, y, z) float32 mit NaN-Trennern → eine Scatter3d-Spur"""
+    C = np.array([(0,0,0),(l,0,0),(0,b,0),(l,b,0),(0,0,h),(l,0,h),(0,b,h),(l,b,h)], dtype=np.float32)
+    E = [(0,1),(0,2),(1,3),(2,3),(4,5),(4,6),(5,7),(6,7),(0,4),(1,5),(2,6),(3,7)]
+    pts = np.full((len(E), 3, 3), np.nan, dtype=np.float32)   # Kante × [i, j, NaN] × xyz
+    pts[:, 0], pts[:, 1] = C[[i for i, _ in E]], C[[j for _, j in E]]
+    out = tuple(pts[:, :, k].ravel() for k in range(3))
+    for a in out:
+        a.flags.writeable = False
+    return out
+
+def now_decor(x_h, y, label, color):
+    """IST-Marker: gestrichelte Linie + Beschriftung → (shape, annotation)"""
+    return (vline_shape(x_h, YELLOW, 'dash', 2),
+            dict(x=x_h, y=y, text=f" {x_h:.0f}h: {label}", showarrow=False,
+                 font=dict(color=color, size=12, family="JetBrains Mono"),
+                 xanchor="left", bgcolor="rgba(0,0,0,0.5)"))
+
+# ── DIAGRAMME ────────────────────────────────────────────────
+# Figuren prozessweit gecacht: Reruns ohne Änderung (Autopilot-Poll, andere Widgets)
+# bauen keine Plotly-Objekte neu. st.plotly_chart verändert die Figur nicht.
+# Achsen (hours, days) gehen als Argument mit in den Cache-Schlüssel.
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_co2_chart(hours, days, mass_z1, flow_z1, mast_day, stufen_co2, stufen_pct, co2_r):
+    """Diagramm CO2 Zone 01 (Kurve, Lüfter-Treppe, Peak, IST-Marker)"""
+    h_now  = (mast_day - 1.0) * 24.0
+    c1_ist = macro_co2(mass_z1*1000, flow_z1, VOL_Z1, mast_day, co2_r)
+    c1_arr = macro_co2_series(mass_z1*1000, flow_z1, VOL_Z1, days, co2_r)
 
     # Treppenkurve: welche Lüfterstufe wird bei welchem CO2-Wert aktiv?
     # Stufe schaltet wenn CO2-Kurve die Schwelle überschreitet
-    fan_step_arr = []
-    for co2_val in c1_arr:
-        if   co2_val >= stufen_co2[3]: fan_step_arr.append(stufen_pct[3])
-        elif co2_val >= stufen_co2[2]: fan_step_arr.append(stufen_pct[2])
-        elif co2_val >= stufen_co2[1]: fan_step_arr.append(stufen_pct[1])
-        else:                          fan_step_arr.append(stufen_pct[0])
+    fan_step_arr = fan_step_series(c1_arr, stufen_co2, stufen_pct)
 
     fig1 = go.Figure()
     # Schwellenwerte CO2 mit ppm-Beschriftung
-    for y, col, lbl in [(CO2_S1,GREEN,f"{CO2_S1:,} ppm"),(CO2_S2,ORANGE,f"{CO2_S2:,} ppm"),(CO2_S3,RED,f"{CO2_S3:,} ppm")]:
-        fig1.add_hline(y=y, line_color=col, line_dash="dash", line_width=1.5,
-            annotation_text=lbl, annotation_font=dict(color=col, size=12),
-            annotation_position="right")
+    shapes, annots = co2_decor(stufen_co2)
     # Errechnete CO2-Kurve
-    fig1.add_trace(go.Scatter(x=hours, y=c1_arr,
+    fig1.add_trace(go.Scatter(x=_HOURS_F32, y=f32(c1_arr), hovertemplate=HOV_PPM0,
         name=f"CO₂ IST ({int(flow_z1)}% / {fan_m3h(flow_z1,VOL_Z1):.0f} m³/h)",
         line=dict(color=BLUE, width=3),
-        fill='tozeroy', fillcolor=rgba_blue(0.13)))
+        fill='tozeroy', fillcolor=_FILL_CO2_Z1))
     # Lüfterstufen-Treppenkurve (2. Achse)
-    fig1.add_trace(go.Scatter(x=hours, y=fan_step_arr,
+    fig1.add_trace(go.Scatter(x=_HOURS_F32, y=f32(fan_step_arr), hovertemplate=HOV_PCT,
         name="Lüfterstufe [%]",
         line=dict(color=YELLOW, width=2, shape='hv'),  # shape='hv' = Treppe!
         yaxis='y2', opacity=0.9))
@@ -1712,320 +1859,167 @@ if True:
     c1_peak_ppm = c1_arr[c1_peak_idx]
     c1_peak_h   = hours[c1_peak_idx]
     c1_peak_day = days[c1_peak_idx]
-    c1_peak_rate = co2_rate_g_kg_h(c1_peak_day)  # g/kg/h am Scheitelpunkt
+    c1_peak_rate = co2_rate_g_kg_h(c1_peak_day, co2_r)  # g/kg/h am Scheitelpunkt
 
     # IST-Marker + Peak-Annotation
-    vline_now(fig1, h_now, c1_ist, f"{c1_ist:.0f} ppm", BLUE)
-    fig1.add_annotation(x=c1_peak_h, y=c1_peak_ppm,
-        text=f"⌃ {c1_peak_ppm:.0f} ppm<br>{c1_peak_rate:.3f} g/kg/h",
-        showarrow=True, arrowhead=2, arrowcolor=BLUE, arrowwidth=1.5,
-        font=dict(color=BLUE, size=12, family="JetBrains Mono"),
-        bgcolor="rgba(7,9,14,0.8)", bordercolor=BLUE, borderwidth=1,
-        ax=0, ay=-45, xanchor="center")
-    _ymax1 = max(max(c1_arr)*1.15, CO2_S3*1.1)
-    fig1.update_layout(**base_layout(y_range=[0, _ymax1], title_y2="Lüfter [%]"))
-    add_day_markers(fig1, _ymax1)
-    st.plotly_chart(fig1, use_container_width=True)
-
-    # ─────────────────────────────────────────────────
-    # CHART 2 — NH3 Zone 01  (exponentiell!)
-    # ─────────────────────────────────────────────────
-    n1_ist = macro_nh3(mass_z1*1000, flow_z1, VOL_Z1, mast_day)
-    n1_arr = [macro_nh3(mass_z1*1000, flow_z1, VOL_Z1, d) for d in days]
+    _now_s, _now_a = now_decor(h_now, c1_ist, f"{c1_ist:.0f} ppm", BLUE)
+    _ymax1 = max(np.nanmax(c1_arr)*1.15, stufen_co2[3]*1.1)
+    fig1.update_layout(**base_layout(y_range=[0, _ymax1], title_y2="Lüfter [%]"),
+        shapes=shapes + [_now_s] + _DAY_SHAPES,
+        annotations=annots + [_now_a, dict(x=c1_peak_h, y=c1_peak_ppm,
+            text=f"⌃ {c1_peak_ppm:.0f} ppm<br>{c1_peak_rate:.3f} g/kg/h",
+            showarrow=True, arrowhead=2, arrowcolor=BLUE, arrowwidth=1.5,
+            font=dict(color=BLUE, size=12, family="JetBrains Mono"),
+            bgcolor="rgba(7,9,14,0.8)", bordercolor=BLUE, borderwidth=1,
+            ax=0, ay=-45, xanchor="center")] + day_labels(_ymax1))
+    return fig1
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_nh3_chart(hours, days, mass_z1, flow_z1, mast_day, stufen_nh3, stufen_pct, nh3_r):
+    """Diagramm NH3 Zone 01 (Risikoband ECO, Lüfter-Treppe, Break-Even, IST-Marker)"""
+    h_now  = (mast_day - 1.0) * 24.0
+    n1_ist = macro_nh3(mass_z1*1000, flow_z1, VOL_Z1, mast_day, nh3_r)
+    n1_arr = macro_nh3_series(mass_z1*1000, flow_z1, VOL_Z1, days, nh3_r)
     # Risikokurve: ECO-Stufe (minimale Lüftung)
     _eco_pct_z1 = stufen_pct[0]
-    n1_noq = [macro_nh3(mass_z1*1000, _eco_pct_z1, VOL_Z1, d) for d in days]
-    _ym1   = max(max(n1_noq)*1.15, max(n1_arr)*1.15, NH3_S3*1.5)
+    n1_noq = macro_nh3_series(mass_z1*1000, _eco_pct_z1, VOL_Z1, days, nh3_r)
+    _ym1   = max(n1_noq.max()*1.15, n1_arr.max()*1.15, stufen_nh3[3]*1.5)
 
     # NH3 Peak = immer Tag 8 = hours[-1]
     n1_peak_ppm  = n1_arr[-1]
-    n1_peak_rate = nh3_rate_g_kg_h(8.0) * 1000  # mg/kg/h
-
-    st.markdown(
-        f"<div class='sec red'>Zone 01 — NH₃ &nbsp;|&nbsp; IST: <b style='color:{ORANGE};'>{n1_ist:.1f} ppm</b>"
-        f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{fan_m3h(flow_z1,VOL_Z1):.0f} m³/h</b></div>",
-        unsafe_allow_html=True)
+    n1_peak_rate = nh3_rate_g_kg_h(8.0, nh3_r) * 1000  # mg/kg/h
 
     fig2 = go.Figure()
-    for y, col, lbl in [(5,MUTED,"5 ppm"),(10,MUTED,"10 ppm"),(15,MUTED,"15 ppm"),
-                        (NH3_S1,GREEN,f"{NH3_S1} ppm — S1"),(NH3_S2,ORANGE,f"{NH3_S2} ppm — S2"),
-                        (40,ORANGE,"40 ppm"),(NH3_S3,RED,f"{NH3_S3} ppm — ALARM")]:
-        fig2.add_hline(y=y, line_color=col,
-            line_dash="dash", line_width=1.0 if y not in [NH3_S1,NH3_S2,NH3_S3] else 1.8,
-            annotation_text=lbl, annotation_font=dict(color=col, size=11),
-            annotation_position="right")
     fig2.add_trace(go.Scatter(
-        x=np.concatenate([hours, hours[::-1]]),
-        y=np.concatenate([n1_noq, n1_arr[::-1]]),
-        fill='toself', fillcolor=rgba_red(0.07),
+        x=_HOURS_ENV, y=envelope_y(n1_noq, n1_arr), hoverinfo='skip',
+        fill='toself', fillcolor=_FILL_RISK,
         line=dict(color='rgba(0,0,0,0)'),
         name=f"Risiko ECO ({stufen_pct[0]}%)", showlegend=True))
-    fan_step_nh3 = []
-    for nh3_val in n1_arr:
-        if   nh3_val >= stufen_nh3[3]: fan_step_nh3.append(stufen_pct[3])
-        elif nh3_val >= stufen_nh3[2]: fan_step_nh3.append(stufen_pct[2])
-        elif nh3_val >= stufen_nh3[1]: fan_step_nh3.append(stufen_pct[1])
-        else:                          fan_step_nh3.append(stufen_pct[0])
-    fig2.add_trace(go.Scatter(x=hours, y=n1_arr,
+    fan_step_nh3 = fan_step_series(n1_arr, stufen_nh3, stufen_pct)
+    fig2.add_trace(go.Scatter(x=_HOURS_F32, y=f32(n1_arr), hovertemplate=HOV_PPM1,
         name=f"NH₃ IST ({int(flow_z1)}% / {fan_m3h(flow_z1,VOL_Z1):.0f} m³/h)",
         line=dict(color=ORANGE, width=3.5),
-        fill='tozeroy', fillcolor=rgba_orange(0.14)))
-    fig2.add_trace(go.Scatter(x=hours, y=fan_step_nh3,
+        fill='tozeroy', fillcolor=_FILL_NH3_Z1))
+    fig2.add_trace(go.Scatter(x=_HOURS_F32, y=f32(fan_step_nh3), hovertemplate=HOV_PCT,
         name="Lüfterstufe NH₃ [%]",
         line=dict(color=YELLOW, width=2, shape='hv'),
         yaxis='y2', opacity=0.9))
-    fig2.add_vrect(x0=72, x1=288, fillcolor=rgba_red(0.05), line_width=0)
     # Peak-Annotation NH3 (Scheitelpunkt = Tag 8 = Ende)
     _n1_ann_y = min(n1_peak_ppm, _ym1 * 0.92)
-    fig2.add_annotation(x=hours[-1], y=_n1_ann_y,
-        text=f"⌃ {n1_peak_ppm:.1f} ppm<br>{n1_peak_rate:.3f} mg/kg/h",
-        showarrow=True, arrowhead=2, arrowcolor=ORANGE, arrowwidth=1.5,
-        font=dict(color=ORANGE, size=12, family="JetBrains Mono"),
-        bgcolor="rgba(7,9,14,0.8)", bordercolor=ORANGE, borderwidth=1,
-        ax=-55, ay=-35, xanchor="right")
-    fig2.add_annotation(x=73, y=_ym1*0.75, text="↑ Exponentialphase ab Tag 4",
-        showarrow=False, font=dict(color=RED, size=12, family="JetBrains Mono"), xanchor="left")
-    # Break-Even Kurve: benötigter Volumenstrom um NH3_S3 (Alarm) nicht zu überschreiten
-    import math as _math
-    _be_q = []
-    for _d in days:
-        _t = _d / 8.0
-        if _t < 0.45:
-            _r = NH3_RATE_BASE * (1.0 + 0.5 * _t / 0.45)
-        else:
-            _r = NH3_RATE_BASE * 1.5 * _math.exp(2.6 * (_t - 0.45))
-        _E = _r * mass_z1 * 1000 / 1000 / 0.717
-        _be_q.append(_E / NH3_S3 * 1e6)
-    _be_ppm = [NH3_S3] * len(days)  # konstant auf Alarm-Schwelle → zeigt als ppm-Linie
-    # Als zweite Y-Achse: benötigter m³/h
-    _be_pct = [min(100, q / FAN_Z1_MAX_M3H * 100) for q in _be_q]
-    fig2.add_trace(go.Scatter(x=hours, y=_be_pct,
-        name=f"Break-Even Lüfter für {NH3_S3} ppm",
+    nh3_shapes, annots = nh3_decor(stufen_nh3)
+    annots += [
+        dict(x=hours[-1], y=_n1_ann_y,
+             text=f"⌃ {n1_peak_ppm:.1f} ppm<br>{n1_peak_rate:.3f} mg/kg/h",
+             showarrow=True, arrowhead=2, arrowcolor=ORANGE, arrowwidth=1.5,
+             font=dict(color=ORANGE, size=12, family="JetBrains Mono"),
+             bgcolor="rgba(7,9,14,0.8)", bordercolor=ORANGE, borderwidth=1,
+             ax=-55, ay=-35, xanchor="right"),
+        dict(x=73, y=_ym1*0.75, text="↑ Exponentialphase ab Tag 4",
+             showarrow=False, font=dict(color=RED, size=12, family="JetBrains Mono"), xanchor="left")]
+    # Break-Even Kurve: benötigter Volumenstrom um S3 (Alarm, stufen_nh3[3]) nicht zu überschreiten
+    # Als zweite Y-Achse: benötigter Lüfter-%
+    _be_pct = nh3_break_even_pct(mass_z1, FAN_Z1_MAX_M3H, days, stufen_nh3[3], nh3_r)
+    fig2.add_trace(go.Scatter(x=_HOURS_F32, y=f32(_be_pct), hovertemplate=HOV_PCT,
+        name=f"Break-Even Lüfter für {stufen_nh3[3]} ppm",
         line=dict(color='#00FFFF', width=2, dash='dot'),
         yaxis='y2', opacity=0.85))
-    fig2.add_annotation(x=hours[len(hours)//2], y=min(95, _be_pct[len(_be_pct)//2]+5),
-        text=f"← min. Lüfter für <{NH3_S3} ppm",
+    annots.append(dict(x=hours[len(hours)//2], y=min(95, _be_pct[len(_be_pct)//2]+5),
+        text=f"← min. Lüfter für <{stufen_nh3[3]} ppm",
         showarrow=False, font=dict(color='#00FFFF', size=11, family="JetBrains Mono"),
-        xanchor="left", yref='y2')
-    vline_now(fig2, h_now, n1_ist, f"{n1_ist:.1f} ppm", ORANGE)
-    fig2.update_layout(**base_layout(y_range=[0, _ym1], title_y2="Lüfter [%]", nh3=True))
-    add_day_markers(fig2, _ym1)
-    st.plotly_chart(fig2, use_container_width=True)
-
-    # ─────────────────────────────────────────────────
-    # CHART 3 — CO2 Zone 02
-    # ─────────────────────────────────────────────────
-    c2_ist = macro_co2(mass_z2*1000, flow_z2, VOL_Z2, mast_day)
-    c2_arr = [macro_co2(mass_z2*1000, flow_z2, VOL_Z2, d) for d in days]
+        xanchor="left", yref='y2'))
+    _now_s, _now_a = now_decor(h_now, n1_ist, f"{n1_ist:.1f} ppm", ORANGE)
+    fig2.update_layout(**base_layout(y_range=[0, _ym1], title_y2="Lüfter [%]", nh3=True),
+        shapes=nh3_shapes + [_NH3_VRECT, _now_s] + _DAY_SHAPES,
+        annotations=annots + [_now_a] + day_labels(_ym1))
+    return fig2
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_co2_z2_chart(hours, days, mass_z2, flow_z2, mast_day, c2_ist, stufen_co2, eco_pct, co2_r, nh3_r, nh3_s3):
+    """Diagramm CO2 Zone 02 (Kurve, Peak, IST-Marker) — Kurven aus zone_curves()
+    (NH3-Argumente nur, damit Chart 3 und 4 denselben zone_curves-Eintrag treffen)"""
+    h_now  = (mast_day - 1.0) * 24.0
+    c2_arr = zone_curves(mass_z2, VOL_Z2, flow_z2, eco_pct, FAN_Z2_MAX_M3H, co2_r, nh3_r, nh3_s3)[0]
     q2     = fan_m3h_z2(flow_z2)
 
     c2_peak_idx  = int(np.argmax(c2_arr))
     c2_peak_ppm  = c2_arr[c2_peak_idx]
     c2_peak_h    = hours[c2_peak_idx]
-    c2_peak_rate = co2_rate_g_kg_h(days[c2_peak_idx])
-
-    st.markdown(
-        f"<div class='sec'>Zone 02 — CO₂ &nbsp;|&nbsp; IST: <b style='color:{GREEN};'>{c2_ist:.0f} ppm</b>"
-        f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{q2:.0f} m³/h</b></div>",
-        unsafe_allow_html=True)
+    c2_peak_rate = co2_rate_g_kg_h(days[c2_peak_idx], co2_r)
 
     fig3 = go.Figure()
-    for y, col, lbl in [(CO2_S1,GREEN,f"{CO2_S1:,} ppm"),(CO2_S2,ORANGE,f"{CO2_S2:,} ppm"),(CO2_S3,RED,f"{CO2_S3:,} ppm — ALARM")]:
-        fig3.add_hline(y=y, line_color=col, line_dash="dash", line_width=1.5,
-            annotation_text=lbl, annotation_font=dict(color=col, size=12),
-            annotation_position="right")
-    fig3.add_trace(go.Scatter(x=hours, y=c2_arr,
+    shapes, annots = co2_decor(stufen_co2, " — ALARM")
+    fig3.add_trace(go.Scatter(x=_HOURS_F32, y=f32(c2_arr), hovertemplate=HOV_PPM0,
         name=f"CO₂ Z02 ({int(flow_z2)}% / {q2:.0f} m³/h)",
         line=dict(color=GREEN, width=3),
-        fill='tozeroy', fillcolor=rgba_green(0.13)))
-    vline_now(fig3, h_now, c2_ist, f"{c2_ist:.0f} ppm", GREEN)
-    fig3.add_annotation(x=c2_peak_h, y=c2_peak_ppm,
-        text=f"⌃ {c2_peak_ppm:.0f} ppm<br>{c2_peak_rate:.3f} g/kg/h",
-        showarrow=True, arrowhead=2, arrowcolor=GREEN, arrowwidth=1.5,
-        font=dict(color=GREEN, size=12, family="JetBrains Mono"),
-        bgcolor="rgba(7,9,14,0.8)", bordercolor=GREEN, borderwidth=1,
-        ax=0, ay=-45, xanchor="center")
-    _ymax3 = max(max(c2_arr)*1.15, CO2_S3*1.1)
-    fig3.update_layout(**base_layout(y_range=[0, _ymax3]))
-    add_day_markers(fig3, _ymax3)
-    st.plotly_chart(fig3, use_container_width=True)
-
-    # ─────────────────────────────────────────────────
-    # CHART 4 — NH3 Zone 02
-    # ─────────────────────────────────────────────────
-    n2_ist = macro_nh3(mass_z2*1000, flow_z2, VOL_Z2, mast_day)
-    n2_arr = [macro_nh3(mass_z2*1000, flow_z2, VOL_Z2, d) for d in days]
-    # Risikokurve: ECO-Stufe (minimale Lüftung)
-    _eco_pct_z2 = stufen_pct[0]
-    n2_noq = [macro_nh3(mass_z2*1000, _eco_pct_z2, VOL_Z2, d) for d in days]
-    _ym2   = max(max(n2_noq)*1.15, max(n2_arr)*1.15, NH3_S3*1.5)
+        fill='tozeroy', fillcolor=_FILL_CO2_Z2))
+    _now_s, _now_a = now_decor(h_now, c2_ist, f"{c2_ist:.0f} ppm", GREEN)
+    _ymax3 = max(np.nanmax(c2_arr)*1.15, stufen_co2[3]*1.1)
+    fig3.update_layout(**base_layout(y_range=[0, _ymax3]),
+        shapes=shapes + [_now_s] + _DAY_SHAPES,
+        annotations=annots + [_now_a, dict(x=c2_peak_h, y=c2_peak_ppm,
+            text=f"⌃ {c2_peak_ppm:.0f} ppm<br>{c2_peak_rate:.3f} g/kg/h",
+            showarrow=True, arrowhead=2, arrowcolor=GREEN, arrowwidth=1.5,
+            font=dict(color=GREEN, size=12, family="JetBrains Mono"),
+            bgcolor="rgba(7,9,14,0.8)", bordercolor=GREEN, borderwidth=1,
+            ax=0, ay=-45, xanchor="center")] + day_labels(_ymax3))
+    return fig3
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_nh3_z2_chart(hours, days, mass_z2, flow_z2, mast_day, n2_ist, stufen_nh3, eco_pct, co2_r, nh3_r):
+    """Diagramm NH3 Zone 02 (Risikoband ECO, Break-Even, IST-Marker) — Kurven aus zone_curves()"""
+    h_now = (mast_day - 1.0) * 24.0
+    # n2_noq = Risikokurve bei ECO-Lüftung
+    _, n2_arr, n2_noq, _be_pct2 = zone_curves(mass_z2, VOL_Z2, flow_z2, eco_pct,
+                                              FAN_Z2_MAX_M3H, co2_r, nh3_r, stufen_nh3[3])
+    q2    = fan_m3h_z2(flow_z2)
+    _ym2  = max(n2_noq.max()*1.15, n2_arr.max()*1.15, stufen_nh3[3]*1.5)
 
     n2_peak_ppm  = n2_arr[-1]
-    n2_peak_rate = nh3_rate_g_kg_h(8.0) * 1000
-
-    st.markdown(
-        f"<div class='sec red'>Zone 02 — NH₃ &nbsp;|&nbsp; IST: <b style='color:{YELLOW};'>{n2_ist:.1f} ppm</b>"
-        f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{q2:.0f} m³/h</b></div>",
-        unsafe_allow_html=True)
+    n2_peak_rate = nh3_rate_g_kg_h(8.0, nh3_r) * 1000
 
     fig4 = go.Figure()
-    for y, col, lbl in [(5,MUTED,"5 ppm"),(10,MUTED,"10 ppm"),(15,MUTED,"15 ppm"),
-                        (NH3_S1,GREEN,f"{NH3_S1} ppm — S1"),(NH3_S2,ORANGE,f"{NH3_S2} ppm — S2"),
-                        (40,ORANGE,"40 ppm"),(NH3_S3,RED,f"{NH3_S3} ppm — ALARM")]:
-        fig4.add_hline(y=y, line_color=col,
-            line_dash="dash", line_width=1.0 if y not in [NH3_S1,NH3_S2,NH3_S3] else 1.8,
-            annotation_text=lbl, annotation_font=dict(color=col, size=11),
-            annotation_position="right")
     fig4.add_trace(go.Scatter(
-        x=np.concatenate([hours, hours[::-1]]),
-        y=np.concatenate([n2_noq, n2_arr[::-1]]),
-        fill='toself', fillcolor=rgba_red(0.07),
+        x=_HOURS_ENV, y=envelope_y(n2_noq, n2_arr), hoverinfo='skip',
+        fill='toself', fillcolor=_FILL_RISK,
         line=dict(color='rgba(0,0,0,0)'),
-        name=f"Risiko ECO ({stufen_pct[0]}%)", showlegend=True))
-    fig4.add_trace(go.Scatter(x=hours, y=n2_arr,
+        name=f"Risiko ECO ({eco_pct}%)", showlegend=True))
+    fig4.add_trace(go.Scatter(x=_HOURS_F32, y=f32(n2_arr), hovertemplate=HOV_PPM1,
         name=f"NH₃ Z02 ({int(flow_z2)}% / {q2:.0f} m³/h)",
         line=dict(color=YELLOW, width=3.5),
-        fill='tozeroy', fillcolor=rgba_yellow(0.14)))
-    fig4.add_vrect(x0=72, x1=288, fillcolor=rgba_red(0.05), line_width=0)
+        fill='tozeroy', fillcolor=_FILL_NH3_Z2))
     _n2_ann_y = min(n2_peak_ppm, _ym2 * 0.92)
-    fig4.add_annotation(x=hours[-1], y=_n2_ann_y,
-        text=f"⌃ {n2_peak_ppm:.1f} ppm<br>{n2_peak_rate:.3f} mg/kg/h",
-        showarrow=True, arrowhead=2, arrowcolor=YELLOW, arrowwidth=1.5,
-        font=dict(color=YELLOW, size=12, family="JetBrains Mono"),
-        bgcolor="rgba(7,9,14,0.8)", bordercolor=YELLOW, borderwidth=1,
-        ax=-55, ay=-35, xanchor="right")
-    fig4.add_annotation(x=73, y=_ym2*0.75, text="↑ Exponentialphase ab Tag 4",
-        showarrow=False, font=dict(color=RED, size=12, family="JetBrains Mono"), xanchor="left")
-    _be_q2 = []
-    for _d in days:
-        _t = _d / 8.0
-        if _t < 0.45:
-            _r2 = NH3_RATE_BASE * (1.0 + 0.5 * _t / 0.45)
-        else:
-            _r2 = NH3_RATE_BASE * 1.5 * _math.exp(2.6 * (_t - 0.45))
-        _E2 = _r2 * mass_z2 * 1000 / 1000 / 0.717
-        _be_q2.append(_E2 / NH3_S3 * 1e6)
-    _be_pct2 = [min(100, q / FAN_Z2_MAX_M3H * 100) for q in _be_q2]
-    fig4.add_trace(go.Scatter(x=hours, y=_be_pct2,
-        name=f"Break-Even Lüfter für {NH3_S3} ppm",
+    nh3_shapes, annots = nh3_decor(stufen_nh3)
+    annots += [
+        dict(x=hours[-1], y=_n2_ann_y,
+             text=f"⌃ {n2_peak_ppm:.1f} ppm<br>{n2_peak_rate:.3f} mg/kg/h",
+             showarrow=True, arrowhead=2, arrowcolor=YELLOW, arrowwidth=1.5,
+             font=dict(color=YELLOW, size=12, family="JetBrains Mono"),
+             bgcolor="rgba(7,9,14,0.8)", bordercolor=YELLOW, borderwidth=1,
+             ax=-55, ay=-35, xanchor="right"),
+        dict(x=73, y=_ym2*0.75, text="↑ Exponentialphase ab Tag 4",
+             showarrow=False, font=dict(color=RED, size=12, family="JetBrains Mono"), xanchor="left")]
+    fig4.add_trace(go.Scatter(x=_HOURS_F32, y=f32(_be_pct2), hovertemplate=HOV_PCT,
+        name=f"Break-Even Lüfter für {stufen_nh3[3]} ppm",
         line=dict(color='#00FFFF', width=2, dash='dot'),
         yaxis='y2', opacity=0.85))
-    fig4.add_annotation(x=hours[len(hours)//2], y=min(95, _be_pct2[len(_be_pct2)//2]+5),
-        text=f"← min. Lüfter für <{NH3_S3} ppm",
+    annots.append(dict(x=hours[len(hours)//2], y=min(95, _be_pct2[len(_be_pct2)//2]+5),
+        text=f"← min. Lüfter für <{stufen_nh3[3]} ppm",
         showarrow=False, font=dict(color='#00FFFF', size=11, family="JetBrains Mono"),
-        xanchor="left", yref='y2')
-    vline_now(fig4, h_now, n2_ist, f"{n2_ist:.1f} ppm", YELLOW)
-    fig4.update_layout(**base_layout(y_range=[0, _ym2], title_y2="Lüfter [%]", nh3=True))
-    add_day_markers(fig4, _ym2)
-    st.plotly_chart(fig4, use_container_width=True)
-
-# ── SCHALTSTUFEN & INFO — VOLLE BREITE UNTEN ──────
-_snames  = ["ECO", "STUFE 1", "STUFE 2", "ALARM"]
-_scols   = [MUTED, GREEN, ORANGE, RED]
-_co2_lbl = [f"{_snames[i]}\n{stufen_pct[i]}%" for i in range(4)]
-_nh3_lbl = [f"{_snames[i]}\n{'<' if i==0 else ''}{stufen_nh3[i]} ppm" for i in range(4)]
-
-aktiv        = [fs_nr == i for i in range(4)]
-nh3_aktiv_nr = 0 if nh3_z1<stufen_nh3[1] else 1 if nh3_z1<stufen_nh3[2] else 2 if nh3_z1<stufen_nh3[3] else 3
-bar_cols_co2 = [_scols[i] if aktiv[i]        else "#0F1825" for i in range(4)]
-bar_cols_nh3 = [_scols[i] if i<=nh3_aktiv_nr else "#0F1825" for i in range(4)]
-
-def _stage_layout(ytitle, yrange):
-    return dict(
-        height=300, paper_bgcolor=DARK, plot_bgcolor=DARK,
-        xaxis=dict(color=WHITE, gridcolor='rgba(0,0,0,0)',
-                   tickfont=dict(size=12, family="JetBrains Mono")),
-        yaxis=dict(title=ytitle, color=WHITE, gridcolor=BORDER,
-                   range=yrange, tickfont=dict(size=11),
-                   title_font=dict(size=11, color=WHITE)),
-        font=dict(color=WHITE, family="JetBrains Mono"),
-        showlegend=False, margin=dict(l=55, r=15, t=28, b=8))
-
-_sc1, _sc2 = st.columns(2)
-
-with _sc1:
-    st.markdown(f"<div class='sec'>CO\u2082-Lüfterstufen Zone 01</div>", unsafe_allow_html=True)
-    _co2_ys   = [stufen_pct[0],
-                 stufen_pct[1] - stufen_pct[0],
-                 stufen_pct[2] - stufen_pct[1],
-                 stufen_pct[3] - stufen_pct[2]]
-    _co2_base = [0, stufen_pct[0], stufen_pct[1], stufen_pct[2]]
-    fig_stages = go.Figure()
-    _aktiv_txt = ["▶ " if aktiv[i] else "" for i in range(4)]
-    fig_stages.add_trace(go.Bar(
-        x=_co2_lbl, y=_co2_ys, base=_co2_base,
-        marker=dict(color=bar_cols_co2, line=dict(color=_scols, width=2)),
-        text=[f"{_aktiv_txt[i]}{stufen_pct[i]}%" for i in range(4)],
-        textfont=dict(color=WHITE, size=13, family="JetBrains Mono"),
-        textposition='inside', width=0.6,
-    ))
-    for i in range(1, 4):
-        fig_stages.add_annotation(
-            x=_co2_lbl[i], y=stufen_pct[i] + 4,
-            text=f"CO\u2082 > {stufen_co2[i]:,} ppm",
-            showarrow=False,
-            font=dict(color=_scols[i], size=10, family="JetBrains Mono"))
-    fig_stages.add_hline(y=flow_z1, line_color=YELLOW, line_dash="dash", line_width=1.5,
-        annotation_text=f"  aktuell: {flow_z1:.0f}%",
-        annotation_font=dict(color=YELLOW, size=10, family="JetBrains Mono"),
-        annotation_position="right")
-    fig_stages.update_layout(**_stage_layout("Lüfterstärke [%]", [0, max(stufen_pct)*1.22]))
-    st.plotly_chart(fig_stages, use_container_width=True)
-
-with _sc2:
-    st.markdown(f"<div class='sec red' style='margin-top:4px;'>NH\u2083-Schwellen Zone 01</div>", unsafe_allow_html=True)
-    _nh3_tops = [stufen_nh3[1], stufen_nh3[2], stufen_nh3[3], stufen_nh3[3]*1.6]
-    _nh3_ys   = [_nh3_tops[i] - (stufen_nh3[i] if i>0 else 0) for i in range(4)]
-    _nh3_base = [0, stufen_nh3[1], stufen_nh3[2], stufen_nh3[3]]
-    _nh3_anno = [stufen_nh3[1], stufen_nh3[2], stufen_nh3[3], int(stufen_nh3[3]*1.6)]
-    fig_ns = go.Figure()
-    fig_ns.add_trace(go.Bar(
-        x=_nh3_lbl, y=_nh3_ys, base=_nh3_base,
-        marker=dict(color=bar_cols_nh3, line=dict(color=_scols, width=2)),
-        text=[f"{_nh3_anno[i]} ppm" for i in range(4)],
-        textfont=dict(color=WHITE, size=12, family="JetBrains Mono"),
-        textposition='inside', width=0.6,
-    ))
-    fig_ns.add_hline(y=nh3_z1, line_color=YELLOW, line_dash="dash", line_width=2,
-        annotation_text=f"  aktuell: {nh3_z1:.1f} ppm",
-        annotation_font=dict(color=YELLOW, size=10, family="JetBrains Mono"),
-        annotation_position="right")
-    _nh3_ymax = stufen_nh3[3] * 1.75
-    fig_ns.update_layout(**_stage_layout("NH\u2083 [ppm]", [0, _nh3_ymax]))
-    st.plotly_chart(fig_ns, use_container_width=True)
-
-# Technische Parameter
-co2_prod  = (mass_z1 * 1000 * co2_rate_g_kg_h(mast_day)) / 1000
-nh3_prod  = (mass_z1 * 1000 * nh3_rate_g_kg_h(mast_day))
-nh3_end_v = nh3_rate_g_kg_h(8.0)*1000
-factor_v  = nh3_end_v / max(nh3_rate_g_kg_h(mast_day)*1000, 0.01)
-st.markdown(f"""<div class='infobox'>
-<h5>Lastenheft &amp; Simulation — Tag {mast_day:.1f}</h5>
-<table style='width:100%;font-size:.92rem;border-collapse:collapse;line-height:2.0;'>
-<tr><td class='lb'>Volumen Z1</td><td class='v'>{VOL_Z1:.0f} m³</td></tr>
-<tr><td class='lb'>Larvenmasse Z1</td><td class='v'>{mass_z1:.1f} t</td></tr>
-<tr><td class='lb'>CO\u2082-Produktion</td><td class='v'>{co2_prod:.2f} kg/h</td></tr>
-<tr><td class='lb'>NH\u2083-Produktion</td><td class='v'>{nh3_prod:.0f} g/h</td></tr>
-<tr><td class='lb'>Luftwechsel Z1</td><td class='v'>{ach(flow_z1,VOL_Z1):.2f} /h</td></tr>
-<tr><td class='lb'>NH\u2083 Anstiegsfaktor</td><td class='v' style='color:{RED};'>{factor_v:.1f}×</td></tr>
-<tr><td class='lb'>Z1 Soll-Temp.</td><td class='v'>max. 10 °C</td></tr>
-<tr><td class='lb'>Liefertermin</td><td class='v' style='color:{YELLOW};'>10.06.2026</td></tr>
-</table></div>""", unsafe_allow_html=True)
-
-if os.path.exists("facility_layout.png"):
-    st.image("facility_layout.png", use_container_width=True,
-             caption="14x40ft Container | Zone 01+02 | Steyerberg")
-
-
-st.divider()
-
-# ── 3D VISUALISIERUNG — VOLLE BREITE UNTEN ────────
-st.markdown("<div class='sec'>3D Luftstrom Zone 01 — Zuluft oben vorne · CO₂-Abluft Boden hinten · NH₃-Abluft Deckenkanal</div>", unsafe_allow_html=True)
-
-if True:
+        xanchor="left", yref='y2'))
+    _now_s, _now_a = now_decor(h_now, n2_ist, f"{n2_ist:.1f} ppm", YELLOW)
+    fig4.update_layout(**base_layout(y_range=[0, _ym2], title_y2="Lüfter [%]", nh3=True),
+        shapes=nh3_shapes + [_NH3_VRECT, _now_s] + _DAY_SHAPES,
+        annotations=annots + [_now_a] + day_labels(_ym2))
+    return fig4
+
+# 3D-Luftstrom hängt nur vom Lüfter und den Zone-01-Konzentrationen ab
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_flow3d(flow_z1, co2_z1, nh3_z1):
+    """3D-Luftstrom Zone 01 (Stromfäden, Gaskörper, Raumkanten, Zu-/Abluft, Verdampfer)"""
     fan_pct = max(flow_z1, 5) / 100.0
     n_pts   = 40
-    t = np.linspace(0, 1, n_pts)
+    t, t_seg, width = stream_t(n_pts)    # t-Profile einmal pro Prozess
+    x_t = t * Z1_L                        # alle Familien laufen vorne → hinten
 
     # ── ZULUFT: oben vorne links (x=0, y=0, z=H) ─────────────────
     # Strom fächert sich von der Einblasecke aus im Raum auf
@@ -2048,30 +2042,16 @@ if True:
         (1.8,  Z1_B*0.88, Z1_H*0.82, Z1_H*0.32, 6),
     ]
 
-    for (y0, y1, z0, z1e, lw_max) in zuluft_streams:
-        x_path = t * Z1_L
-        y_path = np.clip(y0 + (y1 - y0) * t, 0.05, Z1_B - 0.05)
-        z_path = z0 + (z1e - z0) * t
-
-        # Querschnitt: breit am Anfang (Aufweitung), dann normalisiert
-        width = 0.2 + 0.8 * np.sin(np.pi * t * 0.6 + 0.1) ** 0.5
-
-        for i in range(n_pts - 1):
-            # Temperatur: KALT (blau) rein → aufwärmen im Raum (orange Mitte) → 
-            # wird von Verdampfer wieder gekühlt (blau Ende)
-            v = np.sin(np.pi * t[i] * 0.85)   # kalt→warm→kühl
-            r_c = int(54  + (240 - 54)  * v)
-            g_c = int(169 + (100 - 169) * v)
-            b_c = int(225 + (40  - 225) * v)
-            lw  = max(1.5, lw_max * width[i] * fan_pct)
-            fig3.add_trace(go.Scatter3d(
-                x=[x_path[i], x_path[i+1]],
-                y=[y_path[i], y_path[i+1]],
-                z=[z_path[i], z_path[i+1]],
-                mode='lines',
-                line=dict(color=f"rgba({r_c},{g_c},{b_c},{0.82*fan_pct})", width=lw),
-                showlegend=False, hoverinfo='none',
-            ))
+    # Geometrie aller Fäden einer Familie per Broadcasting: Parameter (S, 1) × t (N,) → (S, N);
+    # Farbe hängt nur von t ab → eine Zeile je Familie, Breite (S, N-1) je Segment
+    y0, y1, z0, z1e, lw_max = np.array(zuluft_streams).T[:, :, None]
+    Y = np.clip(y0 + (y1 - y0) * t, 0.05, Z1_B - 0.05)
+    Z = z0 + (z1e - z0) * t
+    # Temperatur kalt→warm→kühl: RGB aus der LUT, nur Alpha folgt dem Lüfter
+    rgb_zu, rgb_co2, rgb_nh3 = stream_rgb(n_pts)
+    cols = rgba_row(rgb_zu, 0.82*fan_pct)
+    add_segments3d(fig3, np.broadcast_to(x_t, Y.shape), Y, Z, [cols] * len(Y),
+                   np.maximum(1.5, lw_max * width * fan_pct))
 
     # ── CO2-Absinkströmung: bodennah zur Abluft hinten unten ─────
     co2_sinks = [
@@ -2079,26 +2059,13 @@ if True:
         (Z1_B*0.5, Z1_B*0.45, Z1_H*0.35, 0.10, 6),
         (Z1_B*0.8, Z1_B*0.75, Z1_H*0.30, 0.08, 5),
     ]
-    for (y0, y1, z_top, z_bot, lw_max) in co2_sinks:
-        x_path = t * Z1_L
-        y_path = y0 + (y1 - y0) * t
-        z_path = z_top + (z_bot - z_top) * t   # absinken
-
-        for i in range(n_pts - 1):
-            progress = t[i]   # CO2 wird gasreicher → dunkler orange/rot
-            r_c = int(255 * min(1.0, progress * 1.5))
-            g_c = int(100 * (1 - progress * 0.6))
-            b_c = int(40)
-            alph = 0.5 * fan_pct * progress   # erst unsichtbar, dann sichtbarer
-            lw   = max(1.2, lw_max * fan_pct * (0.3 + 0.7 * progress))
-            fig3.add_trace(go.Scatter3d(
-                x=[x_path[i], x_path[i+1]],
-                y=[y_path[i], y_path[i+1]],
-                z=[z_path[i], z_path[i+1]],
-                mode='lines',
-                line=dict(color=f"rgba({r_c},{g_c},{b_c},{alph})", width=lw),
-                showlegend=False, hoverinfo='none',
-            ))
+    y0, y1, z_top, z_bot, lw_max = np.array(co2_sinks).T[:, :, None]
+    Y = y0 + (y1 - y0) * t
+    Z = z_top + (z_bot - z_top) * t    # absinken
+    # CO2 wird gasreicher → dunkler orange/rot; erst unsichtbar, dann sichtbarer
+    cols = rgba_row(rgb_co2, 0.5 * fan_pct * t_seg)
+    add_segments3d(fig3, np.broadcast_to(x_t, Y.shape), Y, Z, [cols] * len(Y),
+                   np.maximum(1.2, lw_max * fan_pct * (0.3 + 0.7 * t_seg)))
 
     # ── NH3-Deckenkanal: bleibt oben, wird hinten abgeführt ──────
     nh3_ceiling = [
@@ -2106,42 +2073,21 @@ if True:
         (Z1_B*0.4, Z1_B*0.35, Z1_H*0.93, Z1_H*0.90, 5),
         (Z1_B*0.7, Z1_B*0.65, Z1_H*0.94, Z1_H*0.91, 4),
     ]
-    for (y0, y1, z0, z1e, lw_max) in nh3_ceiling:
-        x_path = t * Z1_L
-        y_path = y0 + (y1 - y0) * t
-        z_path = z0 + (z1e - z0) * t
-
-        for i in range(n_pts - 1):
-            progress = t[i]
-            r_c = int(255 * min(1.0, progress))
-            g_c = int(209 * (1 - progress * 0.5))
-            b_c = int(102 * (1 - progress * 0.7))
-            alph = 0.45 * fan_pct * (0.2 + 0.8 * progress)
-            lw   = max(1.0, lw_max * fan_pct)
-            fig3.add_trace(go.Scatter3d(
-                x=[x_path[i], x_path[i+1]],
-                y=[y_path[i], y_path[i+1]],
-                z=[z_path[i], z_path[i+1]],
-                mode='lines',
-                line=dict(color=f"rgba({r_c},{g_c},{b_c},{alph})", width=lw),
-                showlegend=False, hoverinfo='none',
-            ))
+    y0, y1, z0, z1e, lw_max = np.array(nh3_ceiling).T[:, :, None]
+    Y = y0 + (y1 - y0) * t
+    Z = z0 + (z1e - z0) * t
+    cols = rgba_row(rgb_nh3, 0.45 * fan_pct * (0.2 + 0.8 * t_seg))
+    add_segments3d(fig3, np.broadcast_to(x_t, Y.shape), Y, Z, [cols] * len(Y),
+                   np.broadcast_to(np.maximum(1.0, lw_max * fan_pct), (len(Y), n_pts - 1)))
 
     # ── Gaskörper (Volumen) ──────────────────────────────────────
-    nx, ny, nz = 10, 7, 5
-    xv, yv, zv = np.meshgrid(
-        np.linspace(0,Z1_L,nx), np.linspace(0,Z1_B,ny),
-        np.linspace(0,Z1_H,nz), indexing='ij')
+    xf, yf, zf, p_co2, p_nh3 = gas_grid(Z1_L, Z1_B, Z1_H)
     co2n = np.clip(co2_z1/10000.0, 0, 1)
     nh3n = np.clip(nh3_z1/50.0,   0, 1)
-    # CO2 bodennah, steigt von vorne nach hinten
-    gas_co2 = co2n * (1 - zv/Z1_H)**2.5 * (0.3 + 0.7*(xv/Z1_L))
-    # NH3 deckennah, steigt von vorne nach hinten
-    gas_nh3 = nh3n * (zv/Z1_H)**2.0    * (0.3 + 0.7*(xv/Z1_L))
-    gas = gas_co2 + gas_nh3
-    fig3.add_trace(go.Volume(
-        x=xv.flatten(), y=yv.flatten(), z=zv.flatten(),
-        value=gas.flatten(),
+    gas  = co2n * p_co2 + nh3n * p_nh3
+    fig3.add_trace(go.Volume(    # float32 wie die Diagramme — halbe bdata-Nutzlast
+        x=xf, y=yf, z=zf,
+        value=f32(gas),
         isomin=0.04, isomax=0.70, opacity=0.10, surface_count=8,
         colorscale=[
             [0.0, "rgba(10,20,60,0)"],
@@ -2153,13 +2099,11 @@ if True:
     ))
 
     # ── Raumkanten ───────────────────────────────────────────────
-    C = [(0,0,0),(Z1_L,0,0),(0,Z1_B,0),(Z1_L,Z1_B,0),
-         (0,0,Z1_H),(Z1_L,0,Z1_H),(0,Z1_B,Z1_H),(Z1_L,Z1_B,Z1_H)]
-    for ii,jj in [(0,1),(0,2),(1,3),(2,3),(4,5),(4,6),(5,7),(6,7),(0,4),(1,5),(2,6),(3,7)]:
-        fig3.add_trace(go.Scatter3d(
-            x=[C[ii][0],C[jj][0]], y=[C[ii][1],C[jj][1]], z=[C[ii][2],C[jj][2]],
-            mode='lines', line=dict(color="#1a3045",width=1.5),
-            showlegend=False, hoverinfo='none'))
+    ex, ey, ez = box_edges(Z1_L, Z1_B, Z1_H)
+    fig3.add_trace(go.Scatter3d(
+        x=ex, y=ey, z=ez,
+        mode='lines', line=dict(color="#1a3045",width=1.5),
+        showlegend=False, hoverinfo='none'))
 
     # ── Markierungen: Zu- und Abluft ────────────────────────────
     fig3.add_trace(go.Scatter3d(
@@ -2206,50 +2150,418 @@ if True:
         ),
         paper_bgcolor=DARK, margin=dict(l=0,r=0,b=0,t=0), height=560,
     )
-    st.plotly_chart(fig3, use_container_width=True)
-
-
-# ── RECHTE SPALTE: alle 4 Grafiken übereinander ──
-# ── FOOTER ────────────────────────────────────────────────────
-st.divider()
-
-# ── PDF BERICHT ───────────────────────────────────────────────
-_pdf_col, _foot_col = st.columns([1, 2])
-with _pdf_col:
-    if st.button("📄 PDF-Bericht erstellen", use_container_width=True, type="primary"):
-        _pdf_params = dict(
-            vol_z1=VOL_Z1, vol_z2=VOL_Z2,
-            mass_z1=mass_z1, mass_z2=mass_z2,
-            mast_day=mast_day, h_now=(mast_day-1)*24,
-            q1=fan_m3h(flow_z1, VOL_Z1), pct1=int(flow_z1),
-            q2=fan_m3h_z2(flow_z2),
-            ach1=ach_val(flow_z1, VOL_Z1), ach2=ach_val(flow_z2, VOL_Z2),
-            co2_rate=CO2_RATE_AVG, nh3_rate=NH3_RATE_BASE,
-            co2_z1=co2_z1, nh3_z1=nh3_z1,
-            co2_z2=co2_z2, nh3_z2=nh3_z2,
-            co2_s1=CO2_S1, co2_s2=CO2_S2, co2_s3=CO2_S3,
-            nh3_s1=NH3_S1, nh3_s2=NH3_S2, nh3_s3=NH3_S3,
-            s_pct=stufen_pct, s_co2=stufen_co2, s_nh3=stufen_nh3,
-        )
-        _pdf_bytes = generate_pdf_report(_pdf_params)
-        _fname = f"BSF_GasSim_Tag{mast_day:.1f}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-        st.download_button(
-            label="⬇ PDF herunterladen",
-            data=_pdf_bytes,
-            file_name=_fname,
-            mime="application/pdf",
-            use_container_width=True,
-        )
+    return fig3
 
-with _foot_col:
+# ── INFOBOX-VORLAGE ──────────────────────────────────────────
+# Konstanter Teil (Farben, Volumen, Termin) einmal eingesetzt; je Frame nur %-Ersetzung der Messwerte
+_INFOBOX_TMPL = f"""<div class='infobox'>
+<h5>Lastenheft &amp; Simulation — Tag %(day).1f</h5>
+<table style='width:100%%;font-size:.92rem;border-collapse:collapse;line-height:2.0;'>
+<tr><td class='lb'>Volumen Z1</td><td class='v'>{VOL_Z1:.0f} m³</td></tr>
+<tr><td class='lb'>Larvenmasse Z1</td><td class='v'>%(mass).1f t</td></tr>
+<tr><td class='lb'>CO\u2082-Produktion</td><td class='v'>%(co2_prod).2f kg/h</td></tr>
+<tr><td class='lb'>NH\u2083-Produktion</td><td class='v'>%(nh3_prod).0f g/h</td></tr>
+<tr><td class='lb'>Luftwechsel Z1</td><td class='v'>%(ach).2f /h</td></tr>
+<tr><td class='lb'>NH\u2083 Anstiegsfaktor</td><td class='v' style='color:{RED};'>%(factor).1f×</td></tr>
+<tr><td class='lb'>Z1 Soll-Temp.</td><td class='v'>max. 10 °C</td></tr>
+<tr><td class='lb'>Liefertermin</td><td class='v' style='color:{YELLOW};'>10.06.2026</td></tr>
+</table></div>"""
+
+# ── SIMULATION + HAUPTBEREICH ────────────────────────────────
+# Als Fragment: im Autopilot führt run_every nur diesen Teil neu aus (Tick, KPIs,
+# Diagramme, 3D) — Sidebar und CSS laufen nur bei echten Reruns (Autopilot- und PDF-Status
+# laufen als eigene Fragmente).
+@st.fragment(run_every=0.25 if st.session_state.sim_active else None)
+def _main_view(mast_day):
+    if st.session_state.sim_active:
+        step  = st.session_state.sim_step + 1
+        i_lut = min(step, SIM_STEPS)
+        sim_days, co2_lut, nh3_lut = sim_rate_lut(CO2_RATE_AVG, NH3_RATE_BASE)
+        mast_day = float(sim_days[i_lut])
+
+        # Raten aus der Tabelle statt sin/exp je macro-Aufruf
+        co2_r_now = float(co2_lut[i_lut])
+        nh3_r_now = float(nh3_lut[i_lut])
+        flow_z1, flow_z2, co2_z1, nh3_z1, co2_z2, nh3_z2 = sim_step(
+            mass_z1*1000, mass_z2*1000, co2_r_now, nh3_r_now, mast_day)
+
+        # Tick-Ergebnis in einem Schreibvorgang statt einzelner Setter
+        st.session_state.update(dict(sim_step=step, mast_day=mast_day,
+                                     flow_z1=flow_z1, flow_z2=flow_z2))
+    else:
+        mast_day = mast_day  # vom Slider
+        co2_r_now = co2_rate_g_kg_h(mast_day)
+        nh3_r_now = nh3_rate_g_kg_h(mast_day)
+        flow_z1 = flow_z1_manual   # % — m³/h = q1_manual
+        flow_z2 = flow_z2_manual
+        # Raten sind schon berechnet — direkt in die Massenbilanz statt über macro_*
+        co2_z1 = calc_ppm(mass_z1*1000, co2_r_now, RHO_CO2, flow_z1, VOL_Z1, CO2_AMBIENT)
+        nh3_z1 = calc_ppm(mass_z1*1000, nh3_r_now, RHO_NH3, flow_z1, VOL_Z1, 0.02)
+        co2_z2 = calc_ppm(mass_z2*1000, co2_r_now, RHO_CO2, flow_z2, VOL_Z2, CO2_AMBIENT)
+        nh3_z2 = calc_ppm(mass_z2*1000, nh3_r_now, RHO_NH3, flow_z2, VOL_Z2, 0.02)
+
+    mf = micro_factor(mast_day)
+    co2_micro = co2_z1 * mf
+    nh3_micro = nh3_z1 * mf
+    s1, t1, c1, cl1 = get_stufe(co2_z1, nh3_z1)
+    s2, t2, c2, cl2 = get_stufe(co2_z2, nh3_z2)
+    fs_nr, fs_txt, fs_col, fs_pct = fan_stage(co2_z1, nh3_z1)
+
+    # ── TOPBAR ───────────────────────────────────────────────────
     st.markdown(f"""
+<div class='topbar'>
+  <div>
+    <div class='tb-title'>BSF Kühllager Gas-Simulator</div>
+    <div class='tb-meta'>
+      Henke / Steyerberg &nbsp;|&nbsp; LP 640_07 Rev.02 &nbsp;|&nbsp;
+      REPLOID Group AG &nbsp;&times;&nbsp; coolsulting &nbsp;|&nbsp; v3.1
+    </div>
+  </div>
+  <div class='tb-right'>
+    {datetime.now().strftime('%d.%m.%Y  %H:%M:%S')}<br>
+    Masttag: <span style='color:{YELLOW};'>{mast_day:.1f}/8</span> &nbsp;&nbsp;
+    CO2-Rate: <span style='color:{ORANGE};'>{co2_r_now:.1f} g/kg/h</span> &nbsp;&nbsp;
+    NH3-Rate: <span style='color:{RED};'>{nh3_r_now*1000:.0f} mg/kg/h</span> &nbsp;&nbsp;
+    Luefter-Stufe: <span style='color:{fs_col};'>{fs_txt}</span>
+  </div>
+</div>
+""", unsafe_allow_html=True)
+
+    # ── BESCHREIBUNG (aufklappbar) ────────────────────────────────
+    with st.expander("ℹ️  Über diese Simulation — Funktionsweise & Bedienung", expanded=False):
+        st.markdown(f"""
+<div style='font-family:Barlow,Helvetica,sans-serif;font-size:1rem;line-height:1.9;color:{WHITE};padding:4px 0;'>
+
+<p style='font-family:JetBrains Mono;font-size:.75rem;color:{BLUE};letter-spacing:3px;text-transform:uppercase;margin-bottom:14px;font-weight:600;'>
+BSF KÜHLLAGER GAS-SIMULATOR — REPLOID GROUP AG × COOLSULTING</p>
+
+<p>Diese interaktive Simulation visualisiert die <strong style='color:{BLUE};'>Gaskonzentrationen CO₂ und NH₃</strong> 
+in einem BSF-Larvenkühllager (Schwarze Soldatenfliege / <em>Hermetia illucens</em>) über den gesamten 8-tägigen 
+Mastzyklus — basierend auf wissenschaftlichen Emissionsdaten.</p>
+
+<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{GREEN};letter-spacing:2px;'>WISSENSCHAFTLICHE BASIS</p>
+<ul style='margin:6px 0 12px 20px;'>
+  <li><strong style='color:{BLUE};'>CO₂:</strong> 1.414 g/kg Biomasse über 8 Masttage (Global 2000 Abschlussbericht EIP-Projekt Larvenzucht)</li>
+  <li><strong style='color:{ORANGE};'>NH₃:</strong> Exponentieller Anstieg ab Tag 4 — bis zu 15× höher als am Einlagertag (Chen et al. 2019, Brill 2024)</li>
+  <li><strong style='color:{GREEN};'>Mikroklima:</strong> Direkt über dem Larvenbett ist die Konzentration 1,4× bis 2,4× höher als im Raumschnitt (Engineering For Change)</li>
+</ul>
+
+<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{BLUE};letter-spacing:2px;'>RAUMZONEN (LP 640_07 Rev.02)</p>
+<ul style='margin:6px 0 12px 20px;'>
+  <li><strong>Zone 01 — Mastlarven:</strong> 21,36 × 9,75 × 3,80 m (≈ 790 m³) — max. 10 °C — 201 Palettenboxen à 258 kg = 51,9 t</li>
+  <li><strong>Zone 02 — Junglarven:</strong> 3,80 × 2,90 × 3,80 m (≈ 43 m³) — max. 13 °C — 63 Holzboxen à 120 kg = 7,6 t</li>
+</ul>
+
+<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{YELLOW};letter-spacing:2px;'>LÜFTUNGSKONZEPT</p>
+<ul style='margin:6px 0 12px 20px;'>
+  <li><strong style='color:{BLUE};'>CO₂ (ρ = 1,84 kg/m³, schwerer als Luft):</strong> Absaugung bodennah hinten rechts</li>
+  <li><strong style='color:{YELLOW};'>NH₃ (ρ = 0,77 kg/m³, leichter als Luft):</strong> Absaugung deckennah hinten rechts</li>
+  <li><strong style='color:{GREEN};'>Diagonalströmung:</strong> Frischluft vorne links oben + unten — verhindert Totzonen</li>
+  <li>Chemischer/Biologischer Abluft-Wäscher reduziert NH₃-Emissionen um bis zu 82 %</li>
+</ul>
+
+<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{RED};letter-spacing:2px;'>GRENZWERTE</p>
+<table style='font-size:.9rem;border-collapse:collapse;margin:6px 0 12px 0;'>
+  <tr style='color:{MUTED};font-family:JetBrains Mono;font-size:.68rem;'>
+    <td style='padding:3px 20px 3px 0;'>Stufe</td>
+    <td style='padding:3px 20px 3px 0;'>CO₂</td>
+    <td style='padding:3px 20px 3px 0;'>NH₃</td>
+    <td style='padding:3px 0;'>Maßnahme</td>
+  </tr>
+  <tr style='color:{GREEN};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S0 Optimal</td><td>&lt; 1.000 ppm</td><td>&lt; 8 ppm</td><td>Standby / ECO</td></tr>
+  <tr style='color:{GREEN};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S1 Betrieb</td><td>&gt; 3.000 ppm</td><td>&gt; 12 ppm</td><td>Lüfter Stufe 1 — 40%</td></tr>
+  <tr style='color:{ORANGE};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S2 Warnung</td><td>&gt; 5.000 ppm</td><td>&gt; 25 ppm</td><td>Lüfter Stufe 2 — 70% + opt. Alarm</td></tr>
+  <tr style='color:{RED};'><td style='padding:3px 20px 3px 0;font-family:JetBrains Mono;'>S3 Alarm</td><td>&gt; 10.000 ppm</td><td>&gt; 50 ppm</td><td>100% + Evakuierung</td></tr>
+</table>
+
+<p style='margin-top:12px;font-family:JetBrains Mono;font-size:.68rem;color:{MUTED};letter-spacing:2px;'>BEDIENUNG</p>
+<ul style='margin:6px 0 0 20px;color:{MUTED};'>
+  <li><strong style='color:{WHITE};'>Manuell:</strong> Masttag-Slider bewegen → Gaskonzentration ändert sich live</li>
+  <li><strong style='color:{WHITE};'>Autopilot START:</strong> Simuliert den kompletten 8-Tage-Zyklus — Lüftung regelt automatisch</li>
+  <li><strong style='color:{WHITE};'>3D-Ansicht:</strong> Zeigt CO₂-Bodenschicht (rot) und NH₃-Deckenakkumulation (gelb) + Strömungsvektoren</li>
+</ul>
+</div>
+""", unsafe_allow_html=True)
+
+    # ════════════════════════════════════════════════
+    # BLOCK 1 — KPI ZONE 01 (4 Spalten)
+    # ════════════════════════════════════════════════
+    def kpi_html(lbl, val, unit, cls=""):
+        return f"""<div class='kpi {cls}'>
+  <div class='kpi-lbl'>{lbl}</div>
+  <div class='kpi-num {cls}'>{val}</div>
+  <div class='kpi-unit'>{unit}</div>
+</div>"""
+
+    def kpi_block(sec_html, *cards):
+        """Sektionskopf + 4 Karten als ein Markdown-Element (Grid statt st.columns(4))"""
+        st.markdown(f"{sec_html}\n<div class='kpi-row'>\n" + "\n".join(cards) + "\n</div>",
+                    unsafe_allow_html=True)
+
+    co2c = "red" if co2_z1>CO2_S3 else "ora" if co2_z1>CO2_S2 else "grn" if co2_z1<CO2_S1 else ""
+    nh3c = "red" if nh3_z1>NH3_S3 else "ora" if nh3_z1>NH3_S2 else "grn" if nh3_z1<NH3_S1 else ""
+
+    kpi_block("<div class='sec'>Zone 01 — Mastlarven — Makroklima (Raumluft) — max. 10 °C — 201 Boxen à 258 kg</div>",
+        kpi_html("CO2 Makroklima", f"{int(co2_z1):,}", "ppm", co2c),
+        kpi_html("NH3 Makroklima", f"{nh3_z1:.1f}", "ppm", nh3c),
+        kpi_html("Luefter Z1", f"{int(flow_z1)}", "%"),
+        f"""<div class='kpi' style='border-top-color:{c1};'>
+  <div class='kpi-lbl'>Status Zone 01</div>
+  <div style='font-family:JetBrains Mono;font-size:.78rem;font-weight:700;color:{c1};margin:8px 0 5px;line-height:1.4;'>{t1}</div>
+  <div class='kpi-unit'>ACH: {ach(flow_z1,VOL_Z1):.1f} /h &nbsp;|&nbsp; Vol: {VOL_Z1:.0f} m³</div>
+</div>""")
+
+    # MIKROKLIMA
+    co2mc = "red" if co2_micro>CO2_S3 else "ora" if co2_micro>CO2_S2 else ""
+    nh3mc = "red" if nh3_micro>NH3_S3 else "ora" if nh3_micro>NH3_S2 else ""
+    kpi_block("<div class='sec grn' style='margin-top:10px;'>Mikroklima — direkt über Larvenbett (CO2 schwerer: sammelt sich über Wannen)</div>",
+        kpi_html("CO2 Mikroklima", f"{int(co2_micro):,}", "ppm am Bett", co2mc),
+        kpi_html("NH3 Mikroklima", f"{nh3_micro:.1f}", "ppm am Bett", nh3mc),
+        f"""<div class='micro-badge'>
+MIKRO / MAKRO FAKTOR<br>
+<span style='font-size:1.6rem;color:{GREEN};font-family:JetBrains Mono;font-weight:700;'>{mf:.2f}×</span><br>
+<span style='font-size:.62rem;color:{MUTED};'>steigt von 1.4× (Tag 1) → 2.4× (Tag 8)</span>
+</div>""",
+        f"""<div class='macro-badge'>
+BED VENTILATION<br>
+<span style='font-size:.85rem;'>Direktabsaugung über Wannen</span><br>
+<span style='font-size:.62rem;color:{MUTED};'>Reduktion Mikroklima: −40 bis −60%<br>
+Engineering For Change (Sanergy)</span>
+</div>""")
+
+    # ZONE 02
+    co2c2 = "red" if co2_z2>CO2_S3 else "ora" if co2_z2>CO2_S2 else ""
+    nh3c2 = "red" if nh3_z2>NH3_S3 else "ora" if nh3_z2>NH3_S2 else ""
+    kpi_block("<div class='sec grn' style='margin-top:10px;'>Zone 02 — Junglarven — max. 13 °C — 63 Holzboxen à 120 kg</div>",
+        kpi_html("CO2 Zone 02", f"{int(co2_z2):,}", "ppm", co2c2),
+        kpi_html("NH3 Zone 02", f"{nh3_z2:.1f}", "ppm", nh3c2),
+        kpi_html("Luefter Z2", f"{int(flow_z2)}", "%"),
+        f"""<div class='kpi' style='border-top-color:{c2};'>
+  <div class='kpi-lbl'>Status Zone 02</div>
+  <div style='font-family:JetBrains Mono;font-size:.78rem;font-weight:700;color:{c2};margin:8px 0 5px;'>{t2}</div>
+  <div class='kpi-unit'>ACH: {ach(flow_z2,VOL_Z2):.1f} /h &nbsp;|&nbsp; Vol: {VOL_Z2:.0f} m³</div>
+</div>""")
+
+    st.divider()
+
+    # ════════════════════════════════════════════════
+    # BLOCK 2 — 3D VISUALISIERUNG (volle Breite, unten)
+    # ════════════════════════════════════════════════
+
+    # ── DIAGRAMME LINKS + SCHALTSTUFEN/INFO RECHTS ──
+    # Diagramme volle Breite
+    if True:
+        CHART_H   = 420
+        FONT_SIZE = 14
+
+        q_now = fan_m3h(flow_z1, VOL_Z1)
+
+        # ════════════════════════════════════════════════
+        # DIAGRAMME — sauber, 4 Stück, klar strukturiert
+        # ════════════════════════════════════════════════
+        # X-Achse: Stunden 0–96 (= 4 Tage Mastdauer sichtbar)
+        hours, days = _HOURS_288, _DAYS_288     # feste Achsen, siehe DIAGRAMM-LAYOUT — gehen an die build_*-Diagramme
+
+        # ─────────────────────────────────────────────────
+        # CHART 1 — CO2 Zone 01
+        # ─────────────────────────────────────────────────
+        c1_ist  = co2_z1   # = macro_co2(mass_z1*1000, flow_z1, VOL_Z1, mast_day), oben berechnet
+        c1_soll = CO2_S1   # Zielwert = S1
+
+        st.markdown(
+            f"<div class='sec'>Zone 01 — CO₂ &nbsp;|&nbsp; IST: <b style='color:{BLUE};'>{c1_ist:.0f} ppm</b>"
+            f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{fan_m3h(flow_z1,VOL_Z1):.0f} m³/h</b></div>",
+            unsafe_allow_html=True)
+
+        st.plotly_chart(build_co2_chart(hours, days, mass_z1, flow_z1, mast_day,
+                                        tuple(stufen_co2), tuple(stufen_pct), CO2_RATE_AVG),
+                        use_container_width=True)
+
+        # ─────────────────────────────────────────────────
+        # CHART 2 — NH3 Zone 01  (exponentiell!)
+        # ─────────────────────────────────────────────────
+        n1_ist = nh3_z1
+
+        st.markdown(
+            f"<div class='sec red'>Zone 01 — NH₃ &nbsp;|&nbsp; IST: <b style='color:{ORANGE};'>{n1_ist:.1f} ppm</b>"
+            f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{fan_m3h(flow_z1,VOL_Z1):.0f} m³/h</b></div>",
+            unsafe_allow_html=True)
+
+        st.plotly_chart(build_nh3_chart(hours, days, mass_z1, flow_z1, mast_day,
+                                        tuple(stufen_nh3), tuple(stufen_pct), NH3_RATE_BASE),
+                        use_container_width=True)
+
+        # ─────────────────────────────────────────────────
+        # CHART 3 — CO2 Zone 02
+        # ─────────────────────────────────────────────────
+        c2_ist = co2_z2
+        q2     = fan_m3h_z2(flow_z2)
+
+        st.markdown(
+            f"<div class='sec'>Zone 02 — CO₂ &nbsp;|&nbsp; IST: <b style='color:{GREEN};'>{c2_ist:.0f} ppm</b>"
+            f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{q2:.0f} m³/h</b></div>",
+            unsafe_allow_html=True)
+
+        st.plotly_chart(build_co2_z2_chart(hours, days, mass_z2, flow_z2, mast_day, c2_ist,
+                                           tuple(stufen_co2), stufen_pct[0], CO2_RATE_AVG, NH3_RATE_BASE,
+                                           stufen_nh3[3]),
+                        use_container_width=True)
+
+        # ─────────────────────────────────────────────────
+        # CHART 4 — NH3 Zone 02
+        # ─────────────────────────────────────────────────
+        n2_ist = nh3_z2
+
+        st.markdown(
+            f"<div class='sec red'>Zone 02 — NH₃ &nbsp;|&nbsp; IST: <b style='color:{YELLOW};'>{n2_ist:.1f} ppm</b>"
+            f" &nbsp;|&nbsp; Lüfter: <b style='color:{YELLOW};'>{q2:.0f} m³/h</b></div>",
+            unsafe_allow_html=True)
+
+        st.plotly_chart(build_nh3_z2_chart(hours, days, mass_z2, flow_z2, mast_day, n2_ist,
+                                           tuple(stufen_nh3), stufen_pct[0], CO2_RATE_AVG, NH3_RATE_BASE),
+                        use_container_width=True)
+
+    # ── SCHALTSTUFEN & INFO — VOLLE BREITE UNTEN ──────
+    _snames  = ["ECO", "STUFE 1", "STUFE 2", "ALARM"]
+    _scols   = FAN_COLOR
+    _co2_lbl = [f"{_snames[i]}\n{stufen_pct[i]}%" for i in range(4)]
+    _nh3_lbl = [f"{_snames[i]}\n{'<' if i==0 else ''}{stufen_nh3[i]} ppm" for i in range(4)]
+
+    # Erste Schwelle, die NH3 noch unterschreitet (sonst 3) — argmax statt if-Kette;
+    # Schwellen frei eingebbar → kein searchsorted (wie fan_step_series)
+    _idx         = np.arange(4)
+    aktiv        = _idx == fs_nr
+    nh3_aktiv_nr = int(np.argmax(np.append(nh3_z1 < np.asarray(stufen_nh3[1:]), True)))
+    bar_cols_co2 = np.where(aktiv,                  _scols, "#0F1825").tolist()
+    bar_cols_nh3 = np.where(_idx <= nh3_aktiv_nr, _scols, "#0F1825").tolist()
+
+    # Stufenbalken sind reine Anzeige → staticPlot: kein Hover/Zoom, keine Modebar im Browser
+    _stage_cfg = {'staticPlot': True, 'displayModeBar': False}
+
+    def _stage_layout(ytitle, yrange):
+        return dict(
+            height=300, paper_bgcolor=DARK, plot_bgcolor=DARK,
+            xaxis=dict(color=WHITE, gridcolor='rgba(0,0,0,0)',
+                       tickfont=dict(size=12, family="JetBrains Mono")),
+            yaxis=dict(title=ytitle, color=WHITE, gridcolor=BORDER,
+                       range=yrange, tickfont=dict(size=11),
+                       title_font=dict(size=11, color=WHITE)),
+            font=dict(color=WHITE, family="JetBrains Mono"),
+            showlegend=False, margin=dict(l=55, r=15, t=28, b=8))
+
+    _sc1, _sc2 = st.columns(2)
+
+    with _sc1:
+        st.markdown("<div class='sec'>CO\u2082-Lüfterstufen Zone 01</div>", unsafe_allow_html=True)
+        _co2_ys   = [stufen_pct[0],
+                     stufen_pct[1] - stufen_pct[0],
+                     stufen_pct[2] - stufen_pct[1],
+                     stufen_pct[3] - stufen_pct[2]]
+        _co2_base = [0, stufen_pct[0], stufen_pct[1], stufen_pct[2]]
+        # Schwellen-Beschriftung über den Balken als eine Liste statt add_annotation je Stufe
+        fig_stages = go.Figure(layout=dict(annotations=[
+            dict(x=_co2_lbl[i], y=stufen_pct[i] + 4, text=f"CO\u2082 > {stufen_co2[i]:,} ppm",
+                 showarrow=False, font=dict(color=_scols[i], size=10, family="JetBrains Mono"))
+            for i in range(1, 4)]))
+        _aktiv_txt = ["▶ " if aktiv[i] else "" for i in range(4)]
+        fig_stages.add_trace(go.Bar(
+            x=_co2_lbl, y=_co2_ys, base=_co2_base,
+            marker=dict(color=bar_cols_co2, line=dict(color=_scols, width=2)),
+            text=[f"{_aktiv_txt[i]}{stufen_pct[i]}%" for i in range(4)],
+            textfont=dict(color=WHITE, size=13, family="JetBrains Mono"),
+            textposition='inside', width=0.6,
+        ))
+        fig_stages.add_hline(y=flow_z1, line_color=YELLOW, line_dash="dash", line_width=1.5,
+            annotation_text=f"  aktuell: {flow_z1:.0f}%",
+            annotation_font=dict(color=YELLOW, size=10, family="JetBrains Mono"),
+            annotation_position="right")
+        fig_stages.update_layout(**_stage_layout("Lüfterstärke [%]", [0, max(stufen_pct)*1.22]))
+        st.plotly_chart(fig_stages, use_container_width=True, config=_stage_cfg)
+
+    with _sc2:
+        st.markdown("<div class='sec red' style='margin-top:4px;'>NH\u2083-Schwellen Zone 01</div>", unsafe_allow_html=True)
+        _nh3_tops = [stufen_nh3[1], stufen_nh3[2], stufen_nh3[3], stufen_nh3[3]*1.6]
+        _nh3_ys   = [_nh3_tops[i] - (stufen_nh3[i] if i>0 else 0) for i in range(4)]
+        _nh3_base = [0, stufen_nh3[1], stufen_nh3[2], stufen_nh3[3]]
+        _nh3_anno = [stufen_nh3[1], stufen_nh3[2], stufen_nh3[3], int(stufen_nh3[3]*1.6)]
+        fig_ns = go.Figure()
+        fig_ns.add_trace(go.Bar(
+            x=_nh3_lbl, y=_nh3_ys, base=_nh3_base,
+            marker=dict(color=bar_cols_nh3, line=dict(color=_scols, width=2)),
+            text=[f"{_nh3_anno[i]} ppm" for i in range(4)],
+            textfont=dict(color=WHITE, size=12, family="JetBrains Mono"),
+            textposition='inside', width=0.6,
+        ))
+        fig_ns.add_hline(y=nh3_z1, line_color=YELLOW, line_dash="dash", line_width=2,
+            annotation_text=f"  aktuell: {nh3_z1:.1f} ppm",
+            annotation_font=dict(color=YELLOW, size=10, family="JetBrains Mono"),
+            annotation_position="right")
+        _nh3_ymax = stufen_nh3[3] * 1.75
+        fig_ns.update_layout(**_stage_layout("NH\u2083 [ppm]", [0, _nh3_ymax]))
+        st.plotly_chart(fig_ns, use_container_width=True, config=_stage_cfg)
+
+    # Technische Parameter
+    co2_prod  = (mass_z1 * 1000 * co2_r_now) / 1000
+    nh3_prod  = (mass_z1 * 1000 * nh3_r_now)
+    nh3_end_v = nh3_rate_g_kg_h(8.0)*1000
+    factor_v  = nh3_end_v / max(nh3_r_now*1000, 0.01)
+    st.markdown(_INFOBOX_TMPL % dict(day=mast_day, mass=mass_z1, co2_prod=co2_prod, nh3_prod=nh3_prod,
+                                     ach=ach(flow_z1, VOL_Z1), factor=factor_v),
+                unsafe_allow_html=True)
+
+    _layout_png = img_bytes("facility_layout.png")
+    if _layout_png is not None:
+        st.image(_layout_png, use_container_width=True,
+                 caption="14x40ft Container | Zone 01+02 | Steyerberg")
+
+
+    st.divider()
+
+    # ── 3D VISUALISIERUNG — VOLLE BREITE UNTEN ────────
+    st.markdown("<div class='sec'>3D Luftstrom Zone 01 — Zuluft oben vorne · CO₂-Abluft Boden hinten · NH₃-Abluft Deckenkanal</div>", unsafe_allow_html=True)
+
+    st.plotly_chart(build_flow3d(flow_z1, co2_z1, nh3_z1), use_container_width=True)
+
+
+    # ── RECHTE SPALTE: alle 4 Grafiken übereinander ──
+    # ── FOOTER ────────────────────────────────────────────────────
+    st.divider()
+
+    # ── PDF BERICHT ───────────────────────────────────────────────
+    _pdf_col, _foot_col = st.columns([1, 2])
+    with _pdf_col:
+        if st.button("📄 PDF-Bericht erstellen", use_container_width=True, type="primary"):
+            _pdf_params = dict(
+                date=datetime.now().strftime("%d.%m.%Y %H:%M"),
+                vol_z1=VOL_Z1, vol_z2=VOL_Z2,
+                mass_z1=mass_z1, mass_z2=mass_z2,
+                mast_day=mast_day, h_now=(mast_day-1)*24,
+                q1=fan_m3h(flow_z1, VOL_Z1), pct1=int(flow_z1),
+                q2=fan_m3h_z2(flow_z2),
+                ach1=ach_val(flow_z1, VOL_Z1), ach2=ach_val(flow_z2, VOL_Z2),
+                co2_rate=CO2_RATE_AVG, nh3_rate=NH3_RATE_BASE,
+                co2_z1=co2_z1, nh3_z1=nh3_z1,
+                co2_z2=co2_z2, nh3_z2=nh3_z2,
+                co2_s1=CO2_S1, co2_s2=CO2_S2, co2_s3=CO2_S3,
+                nh3_s1=NH3_S1, nh3_s2=NH3_S2, nh3_s3=NH3_S3,
+                s_pct=stufen_pct, s_co2=stufen_co2, s_nh3=stufen_nh3,
+            )
+            _pdf_bytes = generate_pdf_report(_pdf_params)
+            _fname = f"BSF_GasSim_Tag{mast_day:.1f}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+            st.download_button(
+                label="⬇ PDF herunterladen",
+                data=_pdf_bytes,
+                file_name=_fname,
+                mime="application/pdf",
+                use_container_width=True,
+            )
+
+    with _foot_col:
+        st.markdown(f"""
 <div style='display:flex;justify-content:space-between;padding-top:8px;'>
   <div class='foot'>BSF GAS-SIMULATOR v5.0 &nbsp;|&nbsp; °coolsulting × REPLOID Group AG &nbsp;|&nbsp; LP 640_07 Rev.02</div>
   <div class='foot'>Quellen: Global 2000 (2024), Chen et al. 2019 (Brill), Engineering For Change</div>
 </div>
 """, unsafe_allow_html=True)
 
-# ── AUTOPILOT LOOP ────────────────────────────────────────────
-if st.session_state.sim_active:
-    time.sleep(0.25)
-    st.rerun()
+_main_view(mast_day)